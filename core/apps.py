@@ -11,3 +11,5 @@ class CoreConfig(AppConfig):
 			from . import signals  # noqa: F401
 		except Exception:
 			pass
+		# PRAGMAs de cada conexão SQLite (connection_created)
+		from . import sqlite  # noqa: F401
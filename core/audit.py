@@ -1,11 +1,227 @@
-from django.db import DatabaseError
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, close_old_connections, connections, transaction
+from django.utils import timezone
+from .audit_schema import codigo_acao, dividir_acao
 from .models import Auditoria
+from .metrics import record_audit_call
+
+logger = logging.getLogger(__name__)
+
+
+def _config(name, default):
+    return getattr(settings, name, default)
+
+
+class AuditWriter:
+    """Buffer em memória que grava `Auditoria` em lote numa thread de fundo.
+
+    O lote é gravado com `bulk_create` quando atinge `AUDIT_BATCH_SIZE`
+    registros ou quando `AUDIT_FLUSH_INTERVAL` segundos se passam. Se a fila
+    (limitada a `AUDIT_QUEUE_SIZE`) estiver cheia, aplica `AUDIT_QUEUE_OVERFLOW`:
+    'sync' grava na thread da requisição, 'block' espera vaga e 'drop' descarta.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._flush_requested = threading.Event()
+        self._stopping = False
+        self.dropped = 0
+
+    # --- configuração -------------------------------------------------
+    @property
+    def batch_size(self):
+        return max(1, int(_config('AUDIT_BATCH_SIZE', 100)))
+
+    @property
+    def flush_interval(self):
+        return max(0.05, float(_config('AUDIT_FLUSH_INTERVAL', 1.0)))
+
+    @property
+    def overflow_policy(self):
+        return _config('AUDIT_QUEUE_OVERFLOW', 'sync')
+
+    # --- ciclo de vida ------------------------------------------------
+    def _ensure_started(self):
+        # (re)inicia a thread no processo atual; após fork o worker do pai não existe
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._queue = queue.Queue(maxsize=max(1, int(_config('AUDIT_QUEUE_SIZE', 10000))))
+            self._pid = os.getpid()
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+            self._thread.start()
+
+    def enqueue(self, registro):
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(registro)
+        except queue.Full:
+            policy = self.overflow_policy
+            if policy == 'block':
+                self._flush_requested.set()
+                self._queue.put(registro)
+            elif policy == 'drop':
+                self.dropped += 1
+                logger.warning('Fila de auditoria cheia; registro descartado (%s).', registro.acao)
+                return
+            else:
+                _write_batch([registro])
+                return
+        if self._queue.qsize() >= self.batch_size:
+            self._flush_requested.set()
+
+    def flush(self, timeout=5.0):
+        """Grava imediatamente tudo que estiver pendente na fila."""
+        if self._queue is None or self._pid != os.getpid():
+            return
+        self._flush_requested.set()
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def shutdown(self, timeout=5.0):
+        if self._thread is None or self._pid != os.getpid():
+            return
+        self._stopping = True
+        self._flush_requested.set()
+        self._thread.join(timeout)
+
+    # --- worker -------------------------------------------------------
+    def _drain(self):
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            self._flush_requested.wait(self.flush_interval)
+            self._flush_requested.clear()
+            while True:
+                batch = self._drain()
+                if not batch:
+                    break
+                try:
+                    close_old_connections()
+                    _write_batch(batch)
+                except Exception:
+                    logger.exception('Falha ao gravar lote de auditoria (%d registros).', len(batch))
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+            # a thread tem conexão própria com o BD; não deixa aberta entre lotes
+            connections.close_all()
+            if self._stopping:
+                return
 
-def log_audit(usuario=None, acao='', detalhes=''):
-    """Registra um `Auditoria` com segurança; ignora erros de BD."""
+
+def _write_batch(registros):
     try:
-        Auditoria.objects.create(usuario=usuario, acao=acao, detalhes=detalhes)
+        Auditoria.objects.bulk_create(registros, batch_size=500)
+        return
+    except DatabaseError:
+        pass
+    # lote falhou (ex.: usuário removido antes do flush): grava um a um
+    for r in registros:
+        try:
+            r.save()
+        except IntegrityError:
+            try:
+                r.usuario = None
+                r.save()
+            except DatabaseError:
+                pass
+        except DatabaseError:
+            # evita crash se BD indisponível durante migrações
+            pass
+
+
+writer = AuditWriter()
+atexit.register(writer.shutdown)
+
+
+def _id(obj):
+    return getattr(obj, 'pk', obj)
+
+
+def _registro(usuario, acao, detalhes, data_hora, codigo=None, evento=None, inscricao=None, alvo=None, dados=None):
+    if usuario is not None and not getattr(usuario, 'pk', None):
+        usuario = None
+    if dados is None:
+        # sufixo da ação ("... (Professor)", "... (API)") vai para os dados estruturados
+        via = dividir_acao(acao)[1]
+        dados = {'via': via} if via else None
+    return Auditoria(
+        usuario=usuario, acao=acao, detalhes=detalhes, data_hora=data_hora,
+        codigo=codigo or codigo_acao(acao),
+        evento_id=_id(evento), inscricao_id=_id(inscricao), alvo_usuario_id=_id(alvo),
+        dados=dados,
+    )
+
+
+def log_audit(usuario=None, acao='', detalhes='', **campos):
+    """Registra um `Auditoria` com segurança; ignora erros de BD.
+
+    `campos` opcionais preenchem as colunas estruturadas: `codigo` (derivado
+    de `acao` quando omitido), `evento`, `inscricao`, `alvo` (instância ou id)
+    e `dados` (dict). Com `AUDIT_ASYNC` ativo o registro entra na fila do
+    `writer` e é gravado em lote pela thread de fundo; caso contrário é
+    gravado na hora. Dentro de uma transação (`atomic`) o registro só entra
+    na fila depois do commit: se ela for desfeita, ele é descartado, como
+    seria na gravação síncrona.
+    """
+    record_audit_call()
+    registro = _registro(usuario, acao, detalhes, timezone.now(), **campos)
+    if _config('AUDIT_ASYNC', True):
+        # fora de transação o on_commit roda na hora
+        transaction.on_commit(lambda: writer.enqueue(registro))
+        return
+    try:
+        registro.save()
     except DatabaseError:
         # evita crash se BD indisponível durante migrações
         pass
 
+
+def log_audit_many(entradas):
+    """Registra vários `Auditoria` de uma vez.
+
+    `entradas`: [(usuario, acao, detalhes), ...] ou com um 4º item com os
+    `campos` estruturados de `log_audit`.
+    """
+    agora = timezone.now()
+    registros = []
+    for entrada in entradas:
+        record_audit_call()
+        campos = entrada[3] if len(entrada) > 3 else {}
+        registros.append(_registro(*entrada[:3], agora, **campos))
+    if not registros:
+        return
+    if _config('AUDIT_ASYNC', True):
+        def enfileirar():
+            for r in registros:
+                writer.enqueue(r)
+        transaction.on_commit(enfileirar)
+        return
+    _write_batch(registros)
+
+
+def flush_audit(timeout=5.0):
+    """Força a gravação dos registros de auditoria pendentes."""
+    writer.flush(timeout)
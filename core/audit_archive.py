@@ -0,0 +1,221 @@
+"""Arquivamento da auditoria por período.
+
+`arquivar` move os registros anteriores a uma data para arquivos JSONL
+comprimidos (gzip), um por mês (`AAAA/auditoria_AAAA-MM_<id>-<id>.jsonl.gz`
+em `AUDIT_ARCHIVE_DIR`), registra o intervalo de datas/ids de cada arquivo
+em `AuditoriaArquivo` e apaga as linhas da tabela, que fica só com os
+registros recentes. `registros_arquivados` lê de volta os arquivos cujo
+intervalo cruza um filtro de datas, para a página e a API de auditoria.
+
+Os arquivos são gravados do registro mais recente ao mais antigo
+(`AuditoriaArquivo.decrescente`), a ordem em que são lidos, então a leitura
+é um stream. Os gravados antes, em ordem cronológica, são invertidos com um
+arquivo temporário, com no máximo `CHUNK_SIZE` registros em memória.
+"""
+import gzip
+import json
+import os
+import tempfile
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from .models import Auditoria, AuditoriaArquivo
+
+CHUNK_SIZE = 2000
+
+
+def diretorio():
+    return getattr(settings, 'AUDIT_ARCHIVE_DIR', None) or os.path.join(settings.BASE_DIR, 'auditoria_arquivo')
+
+
+class UsuarioArquivado:
+    """Dados do usuário gravados junto ao registro (mesma interface usada nos templates)."""
+
+    def __init__(self, id, username, nome):
+        self.id = self.pk = id
+        self.username = username or ''
+        self.nome = nome or ''
+
+    def get_full_name(self):
+        return self.nome
+
+    def __str__(self):
+        return self.username
+
+
+class RegistroArquivado:
+    """Registro de auditoria lido de um arquivo; imita os atributos de `Auditoria`."""
+    arquivado = True
+
+    def __init__(self, dados):
+        self.id = self.pk = dados.get('id')
+        self.data_hora = datetime.fromisoformat(dados['data_hora']) if dados.get('data_hora') else None
+        self.usuario_id = dados.get('usuario_id')
+        self.usuario = UsuarioArquivado(self.usuario_id, dados.get('usuario_username'), dados.get('usuario_nome')) if self.usuario_id else None
+        self.acao = dados.get('acao') or ''
+        self.detalhes = dados.get('detalhes')
+        self.codigo = dados.get('codigo') or ''
+        self.evento_id = dados.get('evento_id')
+        self.inscricao_id = dados.get('inscricao_id')
+        self.alvo_usuario_id = dados.get('alvo_usuario_id')
+        self.dados = dados.get('dados')
+
+
+def _serializar(a):
+    u = a.usuario
+    return json.dumps({
+        'id': a.id,
+        'data_hora': a.data_hora.isoformat() if a.data_hora else None,
+        'usuario_id': a.usuario_id,
+        'usuario_username': u.username if u else None,
+        'usuario_nome': u.get_full_name() if u else None,
+        'acao': a.acao,
+        'detalhes': a.detalhes,
+        'codigo': a.codigo,
+        'evento_id': a.evento_id,
+        'inscricao_id': a.inscricao_id,
+        'alvo_usuario_id': a.alvo_usuario_id,
+        'dados': a.dados,
+    }, ensure_ascii=False) + '\n'
+
+
+def _limites_mes(dt):
+    inicio = dt.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    if inicio.month == 12:
+        fim = inicio.replace(year=inicio.year + 1, month=1)
+    else:
+        fim = inicio.replace(month=inicio.month + 1)
+    return inicio, fim
+
+
+def _meses_pendentes(antes_de):
+    """Início (UTC) de cada mês com registros anteriores a `antes_de`."""
+    primeiro = Auditoria.objects.filter(data_hora__lt=antes_de).order_by('data_hora').values_list('data_hora', flat=True).first()
+    meses = []
+    if primeiro is None:
+        return meses
+    inicio, _ = _limites_mes(primeiro.astimezone(dt_timezone.utc))
+    while inicio < antes_de:
+        meses.append(inicio)
+        inicio = _limites_mes(inicio)[1]
+    return meses
+
+
+def _arquivar_mes(inicio_mes, antes_de, dry_run=False):
+    fim_mes = _limites_mes(inicio_mes)[1]
+    fim = min(fim_mes, antes_de)
+    qs = Auditoria.objects.filter(data_hora__gte=inicio_mes, data_hora__lt=fim)
+    if dry_run:
+        return qs.count()
+    ids = qs.order_by('id').values_list('id', flat=True)
+    primeiro_id, ultimo_id = ids.first(), ids.last()
+    if primeiro_id is None:
+        return 0
+    # só os ids já existentes: registros com data antiga gravados depois (writer
+    # assíncrono) ficam para a próxima execução em vez de serem apagados sem arquivo
+    qs = qs.filter(id__lte=ultimo_id)
+    periodo = inicio_mes.strftime('%Y-%m')
+    relativo = os.path.join(inicio_mes.strftime('%Y'), f'auditoria_{periodo}_{primeiro_id}-{ultimo_id}.jsonl.gz')
+    caminho = os.path.join(diretorio(), relativo)
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    tmp = caminho + '.tmp'
+    total = 0
+    data_inicio = data_fim = None
+    with gzip.open(tmp, 'wt', encoding='utf-8') as fh:
+        # do mais recente ao mais antigo: a ordem da página e da API
+        for a in qs.select_related('usuario').order_by('-data_hora', '-id').iterator(chunk_size=CHUNK_SIZE):
+            fh.write(_serializar(a))
+            total += 1
+            data_fim = data_fim or a.data_hora
+            data_inicio = a.data_hora
+    if not total:
+        os.remove(tmp)
+        return 0
+    os.replace(tmp, caminho)
+    with transaction.atomic():
+        AuditoriaArquivo.objects.create(
+            periodo=periodo, arquivo=relativo, data_inicio=data_inicio, data_fim=data_fim,
+            primeiro_id=primeiro_id, ultimo_id=ultimo_id, registros=total, tamanho=os.path.getsize(caminho),
+            decrescente=True,
+        )
+        qs.delete()
+    return total
+
+
+def arquivar(antes_de, dry_run=False, progresso=None):
+    """Arquiva os registros com `data_hora < antes_de`; retorna {periodo: registros}."""
+    resultado = {}
+    for inicio_mes in _meses_pendentes(antes_de):
+        total = _arquivar_mes(inicio_mes, antes_de, dry_run=dry_run)
+        if total:
+            periodo = inicio_mes.strftime('%Y-%m')
+            resultado[periodo] = resultado.get(periodo, 0) + total
+            if progresso:
+                progresso(periodo, total)
+    return resultado
+
+
+def arquivos_no_intervalo(inicio=None, fim=None):
+    """Arquivos cujo intervalo cruza [inicio, fim), do mais recente ao mais antigo."""
+    qs = AuditoriaArquivo.objects.all()
+    if inicio is not None:
+        qs = qs.filter(data_fim__gte=inicio)
+    if fim is not None:
+        qs = qs.filter(data_inicio__lt=fim)
+    return qs.order_by('-data_fim', '-ultimo_id')
+
+
+def alcanca_arquivo(inicio=None, fim=None):
+    """Se um filtro de datas chega a algum período arquivado (sem filtro: não)."""
+    if inicio is None and fim is None:
+        return False
+    return arquivos_no_intervalo(inicio, fim).exists()
+
+
+def _linhas(arquivo):
+    with gzip.open(os.path.join(diretorio(), arquivo.arquivo), 'rb') as fh:
+        for linha in fh:
+            if linha.strip():
+                yield linha
+
+
+def _invertidas(arquivo):
+    """Linhas de um arquivo cronológico de trás para frente, em blocos de `CHUNK_SIZE`."""
+    with tempfile.TemporaryFile() as tmp:
+        # descomprime para o disco guardando só o início de cada bloco
+        blocos = []
+        for n, linha in enumerate(_linhas(arquivo)):
+            if n % CHUNK_SIZE == 0:
+                blocos.append(tmp.tell())
+            tmp.write(linha if linha.endswith(b'\n') else linha + b'\n')
+        for inicio in reversed(blocos):
+            tmp.seek(inicio)
+            bloco = [tmp.readline() for _ in range(CHUNK_SIZE)]
+            yield from reversed([linha for linha in bloco if linha])
+
+
+def _ler(arquivo):
+    """Registros do arquivo, do mais recente ao mais antigo."""
+    linhas = _linhas(arquivo) if arquivo.decrescente else _invertidas(arquivo)
+    for linha in linhas:
+        yield RegistroArquivado(json.loads(linha))
+
+
+def registros_arquivados(inicio=None, fim=None, filtro=None):
+    """Registros arquivados em [inicio, fim) que passam em `filtro`, do mais recente ao mais antigo.
+
+    Lê um arquivo por vez, em stream (cada um guarda no máximo um mês).
+    """
+    for arquivo in arquivos_no_intervalo(inicio, fim):
+        try:
+            for r in _ler(arquivo):
+                if fim is not None and r.data_hora >= fim:
+                    continue
+                if inicio is not None and r.data_hora < inicio:
+                    # o resto do arquivo é mais antigo
+                    break
+                if filtro is None or filtro(r):
+                    yield r
+        except FileNotFoundError:
+            continue
@@ -0,0 +1,288 @@
+"""Filtros e exportação em streaming da auditoria.
+
+`filtrar_auditoria` aplica os mesmos filtros da página de auditoria e
+`exportar_response` devolve um `StreamingHttpResponse` (TXT, CSV ou JSONL,
+opcionalmente gzip) que percorre o queryset em blocos com `iterator()`, sem
+montar o arquivo inteiro em memória (também no ASGI, ver `core.streaming`). Quando o filtro de datas alcança
+períodos arquivados (`core.audit_archive`), esses registros entram em seguida
+aos da tabela.
+"""
+import csv
+import io
+import json
+import re
+import zlib
+from datetime import datetime, timedelta
+from itertools import chain, islice
+
+from django.conf import settings
+from django.utils import timezone
+from django.contrib.auth import get_user_model
+from .audit_archive import alcanca_arquivo, registros_arquivados
+from .audit_schema import ACOES, codigo_acao
+from .audit_search import corresponde_texto, filtrar_texto
+from .models import Auditoria
+from .streaming import resposta
+
+User = get_user_model()
+ACESSO_AUDITORIA = 'auditoria.acesso'
+
+FORMATOS = {
+    'txt': ('text/plain; charset=utf-8', 'txt'),
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'jsonl': ('application/x-ndjson; charset=utf-8', 'jsonl'),
+}
+CSV_HEADER = ['id', 'data_hora', 'usuario_id', 'usuario', 'acao', 'codigo', 'evento_id', 'inscricao_id', 'alvo_usuario_id', 'detalhes', 'dados']
+
+# linhas lidas do banco por vez e linhas agrupadas por pedaço da resposta
+CHUNK_SIZE = 2000
+LINHAS_POR_PEDACO = 500
+
+
+def filtrar_auditoria(params, ranquear=False):
+    """Aplica os filtros de `params` (GET da página de auditoria).
+
+    `q` é a busca textual (FTS5, ver `core.audit_search`); com `ranquear` os
+    resultados de `q` vêm ordenados por relevância em vez de data.
+
+    Retorna `(qs, filtros)`; `filtros` traz os valores normalizados usados
+    pelo template (action, usuario, date_from, date_to, exclude_access) e o
+    intervalo resultante das datas (`inicio`, `fim`; None quando ausentes).
+    """
+    qs = Auditoria.objects.select_related('usuario').order_by('-data_hora')
+    texto_q = (params.get('q') or '').strip()
+    action_q = (params.get('action') or '').strip()
+    usuario_q = (params.get('usuario') or '').strip()
+    date_from = (params.get('date_from') or '').strip()
+    date_to = (params.get('date_to') or '').strip()
+    evento_id = _int(params.get('evento'))
+    inscricao_id = _int(params.get('inscricao'))
+
+    # `action` é um código do catálogo (índice codigo+data_hora); texto livre
+    # que não seja código continua sendo buscado em `acao`
+    codigo = action_q if action_q in ACOES else None
+    usuario_id = None
+    if codigo:
+        qs = qs.filter(codigo=codigo)
+    elif action_q:
+        qs = qs.filter(acao__icontains=action_q)
+    if usuario_q:
+        # aceita valores do datalist como "1 - Nome" ou id/username
+        m = re.match(r'^\s*(\d+)', usuario_q)
+        if m:
+            usuario_id = int(m.group(1))
+            qs = qs.filter(usuario_id=usuario_id)
+        else:
+            # resolve os usuários primeiro para usar o índice usuario+data_hora
+            qs = qs.filter(usuario_id__in=User.objects.filter(username__icontains=usuario_q).values('id'))
+    if evento_id is not None:
+        qs = qs.filter(evento_id=evento_id)
+    if inscricao_id is not None:
+        qs = qs.filter(inscricao_id=inscricao_id)
+    if texto_q:
+        qs = filtrar_texto(qs, texto_q, ranquear=ranquear)
+    inicio, fim = intervalo_datas(date_from, date_to)
+    if inicio is not None:
+        qs = qs.filter(data_hora__gte=inicio)
+    if fim is not None:
+        qs = qs.filter(data_hora__lt=fim)
+
+    # na primeira visita (sem GET) os acessos à própria auditoria ficam ocultos;
+    # se o formulário foi enviado sem o checkbox, o usuário o desmarcou
+    if 'exclude_access' in params:
+        exclude_access = params.get('exclude_access') in ('1', 'true', 'on')
+    else:
+        exclude_access = not params
+    if exclude_access:
+        qs = qs.exclude(codigo=ACESSO_AUDITORIA)
+
+    filtros = {
+        'q': texto_q, 'action': action_q, 'usuario': usuario_q, 'date_from': date_from, 'date_to': date_to,
+        'evento': evento_id, 'inscricao': inscricao_id, 'exclude_access': exclude_access,
+        'codigo': codigo, 'usuario_id': usuario_id, 'inicio': inicio, 'fim': fim,
+    }
+    return qs, filtros
+
+
+def _int(valor):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def _data(valor):
+    """'AAAA-MM-DD' -> início do dia no fuso atual; datas inválidas são ignoradas."""
+    if not valor:
+        return None
+    try:
+        return timezone.make_aware(datetime.strptime(valor, '%Y-%m-%d'))
+    except ValueError:
+        return None
+
+
+def intervalo_datas(date_from, date_to):
+    """Intervalo [inicio, fim) dos filtros de data (dias inteiros, fim inclusivo)."""
+    inicio, fim = _data(date_from), _data(date_to)
+    if fim is not None:
+        fim += timedelta(days=1)
+    return inicio, fim
+
+
+def corresponde(registro, filtros):
+    """Aplica em Python os filtros não-data de `filtrar_auditoria` (registros arquivados)."""
+    acao = (registro.acao or '').lower()
+    codigo = getattr(registro, 'codigo', '') or codigo_acao(registro.acao)
+    if filtros['codigo']:
+        if codigo != filtros['codigo']:
+            return False
+    elif filtros['action'] and filtros['action'].lower() not in acao:
+        return False
+    if filtros['evento'] is not None and getattr(registro, 'evento_id', None) != filtros['evento']:
+        return False
+    if filtros['inscricao'] is not None and getattr(registro, 'inscricao_id', None) != filtros['inscricao']:
+        return False
+    if filtros['usuario']:
+        u = registro.usuario
+        if filtros['usuario_id'] is not None:
+            if registro.usuario_id != filtros['usuario_id']:
+                return False
+        elif not u or filtros['usuario'].lower() not in u.username.lower():
+            return False
+    if filtros['exclude_access'] and codigo == ACESSO_AUDITORIA:
+        return False
+    if filtros['q'] and not corresponde_texto(registro, filtros['q']):
+        return False
+    return True
+
+
+def arquivados(filtros):
+    """Registros arquivados que atendem aos filtros (vazio se as datas não alcançam o arquivo)."""
+    if not alcanca_arquivo(filtros['inicio'], filtros['fim']):
+        return iter(())
+    return registros_arquivados(filtros['inicio'], filtros['fim'], lambda r: corresponde(r, filtros))
+
+
+class ResultadoAuditoria:
+    """Registros da tabela seguidos dos arquivados, paginável com `Paginator`.
+
+    Os arquivados são limitados a `AUDIT_ARCHIVE_QUERY_LIMIT` por consulta.
+    """
+
+    def __init__(self, qs, filtros):
+        self.qs = qs
+        limite = getattr(settings, 'AUDIT_ARCHIVE_QUERY_LIMIT', 10000)
+        self.arquivados = list(islice(arquivados(filtros), limite))
+        self.truncado = len(self.arquivados) >= limite
+        self._quentes = None
+
+    def count(self):
+        if self._quentes is None:
+            self._quentes = self.qs.count()
+        return self._quentes + len(self.arquivados)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            return self[item:item + 1][0]
+        start, stop = item.start or 0, item.stop if item.stop is not None else self.count()
+        quentes = self.count() - len(self.arquivados)
+        itens = list(self.qs[start:min(stop, quentes)]) if start < quentes else []
+        if stop > quentes:
+            itens += self.arquivados[max(0, start - quentes):stop - quentes]
+        return itens
+
+
+def _usuario_repr(a):
+    u = a.usuario
+    return f"{u.get_full_name() or u.username} (id:{u.id})" if u else '-'
+
+
+def linha_txt(a):
+    try:
+        ts = a.data_hora.strftime('%d/%m/%Y %H:%M:%S')
+    except Exception:
+        ts = str(a.data_hora)
+    return f"{ts}\t{_usuario_repr(a)}\t{a.acao}\t{a.detalhes}\n"
+
+
+def _linha_jsonl(a):
+    return json.dumps({
+        'id': a.id,
+        'data_hora': a.data_hora.isoformat() if a.data_hora else None,
+        'usuario_id': a.usuario_id,
+        'usuario': _usuario_repr(a) if a.usuario_id else None,
+        'acao': a.acao,
+        'codigo': a.codigo,
+        'evento_id': a.evento_id,
+        'inscricao_id': a.inscricao_id,
+        'alvo_usuario_id': a.alvo_usuario_id,
+        'detalhes': a.detalhes,
+        'dados': a.dados,
+    }, ensure_ascii=False) + '\n'
+
+
+def iter_linhas(qs, formato='txt', extra=()):
+    """Gera o conteúdo exportado em pedaços de texto (`extra`: registros após o queryset)."""
+    rows = chain(qs.iterator(chunk_size=CHUNK_SIZE), extra)
+    if formato == 'csv':
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(CSV_HEADER)
+        n = 0
+        for a in rows:
+            writer.writerow([
+                a.id, a.data_hora.isoformat() if a.data_hora else '', a.usuario_id or '', _usuario_repr(a), a.acao,
+                a.codigo, a.evento_id or '', a.inscricao_id or '', a.alvo_usuario_id or '', a.detalhes or '',
+                json.dumps(a.dados, ensure_ascii=False) if a.dados else '',
+            ])
+            n += 1
+            if n % LINHAS_POR_PEDACO == 0:
+                yield buf.getvalue()
+                buf.seek(0)
+                buf.truncate()
+        if buf.tell():
+            yield buf.getvalue()
+        return
+    fmt = _linha_jsonl if formato == 'jsonl' else linha_txt
+    pedaco = []
+    for a in rows:
+        pedaco.append(fmt(a))
+        if len(pedaco) >= LINHAS_POR_PEDACO:
+            yield ''.join(pedaco)
+            pedaco = []
+    if pedaco:
+        yield ''.join(pedaco)
+
+
+def iter_bytes(qs, formato='txt', comprimir=False, extra=()):
+    """Como `iter_linhas`, em UTF-8 e opcionalmente comprimido (gzip)."""
+    if not comprimir:
+        for pedaco in iter_linhas(qs, formato, extra):
+            yield pedaco.encode('utf-8')
+        return
+    z = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: cabeçalho gzip
+    for pedaco in iter_linhas(qs, formato, extra):
+        dados = z.compress(pedaco.encode('utf-8'))
+        if dados:
+            yield dados
+    yield z.flush()
+
+
+def escrever(fh, qs, formato='txt', comprimir=False):
+    """Grava a exportação em um arquivo binário aberto, em streaming."""
+    for dados in iter_bytes(qs, formato, comprimir):
+        fh.write(dados)
+
+
+def exportar_response(request, qs, formato='txt', comprimir=False, nome='auditoria', extra=()):
+    content_type, ext = FORMATOS.get(formato, FORMATOS['txt'])
+    filename = f'{nome}.{ext}'
+    if comprimir:
+        content_type = 'application/gzip'
+        filename += '.gz'
+    resp = resposta(request, iter_bytes(qs, formato, comprimir, extra), content_type=content_type)
+    resp['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return resp
@@ -0,0 +1,113 @@
+"""Códigos de ação e campos estruturados da auditoria.
+
+`ACOES` é o catálogo de códigos (usado no filtro da página de auditoria);
+`codigo_acao` deriva o código a partir do texto de `acao` e `extrair_campos`
+recupera ids e pares `chave=valor` do texto livre de `detalhes` (usado pelo
+comando `preencher_auditoria` nos registros antigos).
+"""
+import re
+
+ACOES = {
+    'api.consulta': 'Consulta API',
+    'api.login': 'API Login',
+    'api.overview': 'Acesso API Overview',
+    'auditoria.acesso': 'Acesso Auditoria',
+    'auditoria.arquivada': 'Arquivou auditoria',
+    'auditoria.limpa': 'Limpou auditoria',
+    'certificado.exportado': 'Exportou certificados',
+    'certificado.gerado': 'Gerou certificado',
+    'certificado.visualizado': 'Visualizou/Baixou certificado',
+    'evento.codigo_gerado': 'Gerou código de confirmação',
+    'evento.criado': 'Criou evento',
+    'evento.editado': 'Editou evento',
+    'evento.removido': 'Removeu evento',
+    'inscricao.acesso': 'Acesso Inscritos',
+    'inscricao.cancelada': 'Cancelou inscrição',
+    'inscricao.criada': 'Inscrição criada',
+    'presenca.confirmada': 'Confirmou presença',
+    'presenca.revogada': 'Revogou presença',
+    'sessao.login': 'Login',
+    'sessao.logout': 'Logout',
+    'usuario.criado': 'Criação de Usuário',
+    'usuario.dados_alterados': 'Alterou dados',
+    'usuario.removido': 'Removeu usuário',
+    'usuario.senha_alterada': 'Alterou senha',
+    'verificacao.confirmada': 'Confirmou verificação',
+    'verificacao.enviada': 'Enviou verificação',
+    'verificacao.reenviada': 'Reenviou verificação',
+}
+
+# textos de acao que não coincidem com o rótulo do catálogo
+_SINONIMOS = {
+    'Criou inscrição': 'inscricao.criada',
+    'Visualizou Auditoria': 'auditoria.acesso',
+}
+_POR_ROTULO = {rotulo.lower(): codigo for codigo, rotulo in ACOES.items()}
+_POR_ROTULO.update({rotulo.lower(): codigo for rotulo, codigo in _SINONIMOS.items()})
+
+_SUFIXO = re.compile(r'^(?P<base>.*?)\s*\((?P<via>[^()]*)\)\s*$')
+_ALVO = re.compile(r'^(Inscrição|Inscricao|Evento|Verification)\s+id=(\d+)', re.IGNORECASE)
+_PAR = re.compile(r'(\w+)=("[^"]*"|\S+)')
+_EVENTO_ID = re.compile(r'\bevento id=(\d+)', re.IGNORECASE)
+_IDS_ALVO = ('participante_id', 'acting_as')
+
+
+def dividir_acao(acao):
+    """'Cancelou inscrição (Professor)' -> ('Cancelou inscrição', 'Professor')."""
+    m = _SUFIXO.match(acao or '')
+    if m:
+        return m.group('base'), m.group('via')
+    return acao or '', None
+
+
+def codigo_acao(acao):
+    """Código do catálogo para o texto de `acao` ('' se desconhecido)."""
+    base, _ = dividir_acao(acao)
+    return _POR_ROTULO.get((acao or '').lower()) or _POR_ROTULO.get(base.lower(), '')
+
+
+def _int(valor):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def extrair_campos(acao, detalhes):
+    """Campos estruturados a partir do texto livre de um registro antigo.
+
+    Retorna dict com `codigo`, `evento_id`, `inscricao_id`, `alvo_usuario_id`
+    e `dados` (demais pares chave=valor da primeira linha e o sufixo da ação).
+    """
+    campos = {'codigo': codigo_acao(acao), 'evento_id': None, 'inscricao_id': None, 'alvo_usuario_id': None, 'dados': None}
+    dados = {}
+    _, via = dividir_acao(acao)
+    if via:
+        dados['via'] = via
+    primeira = (detalhes or '').split('\n', 1)[0]
+    m = _ALVO.match(primeira)
+    if m:
+        tipo, ident = m.group(1).lower(), int(m.group(2))
+        if tipo.startswith('inscri'):
+            campos['inscricao_id'] = ident
+        elif tipo == 'evento':
+            campos['evento_id'] = ident
+        else:
+            dados['verification_id'] = ident
+        primeira = primeira[m.end():]
+    else:
+        m = _EVENTO_ID.search(primeira)
+        if m:
+            campos['evento_id'] = int(m.group(1))
+    for chave, valor in _PAR.findall(primeira):
+        valor = valor.strip('"')
+        if chave == 'id':
+            continue
+        if chave == 'evento_id':
+            campos['evento_id'] = campos['evento_id'] or _int(valor)
+        elif chave in _IDS_ALVO:
+            campos['alvo_usuario_id'] = campos['alvo_usuario_id'] or _int(valor)
+        else:
+            dados[chave] = valor
+    campos['dados'] = dados or None
+    return campos
@@ -0,0 +1,128 @@
+"""Busca textual na auditoria com SQLite FTS5.
+
+A tabela virtual `core_auditoria_fts` (FTS5 com conteúdo externo em
+`core_auditoria`) indexa `acao` e `detalhes` e é mantida por triggers criados
+na migração 0014 (ou pelo comando `reindexar_auditoria`). Cada termo digitado vira uma busca por prefixo e todos os
+termos precisam aparecer (`insc cancel` encontra "Cancelou inscrição").
+Sem FTS5 (outro banco ou SQLite compilado sem o módulo) a busca volta a ser
+`icontains` em `acao`/`detalhes`.
+"""
+import re
+import unicodedata
+
+from django.db import DatabaseError, connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+TABELA = 'core_auditoria_fts'
+
+SQL_CRIAR = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABELA} USING fts5("
+    "acao, detalhes, content='core_auditoria', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS {TABELA}_ai AFTER INSERT ON core_auditoria BEGIN "
+    f"INSERT INTO {TABELA}(rowid, acao, detalhes) VALUES (new.id, new.acao, new.detalhes); END",
+    f"CREATE TRIGGER IF NOT EXISTS {TABELA}_ad AFTER DELETE ON core_auditoria BEGIN "
+    f"INSERT INTO {TABELA}({TABELA}, rowid, acao, detalhes) VALUES ('delete', old.id, old.acao, old.detalhes); END",
+    f"CREATE TRIGGER IF NOT EXISTS {TABELA}_au AFTER UPDATE OF acao, detalhes ON core_auditoria BEGIN "
+    f"INSERT INTO {TABELA}({TABELA}, rowid, acao, detalhes) VALUES ('delete', old.id, old.acao, old.detalhes); "
+    f"INSERT INTO {TABELA}(rowid, acao, detalhes) VALUES (new.id, new.acao, new.detalhes); END",
+]
+SQL_REMOVER = [
+    f"DROP TRIGGER IF EXISTS {TABELA}_ai",
+    f"DROP TRIGGER IF EXISTS {TABELA}_ad",
+    f"DROP TRIGGER IF EXISTS {TABELA}_au",
+    f"DROP TABLE IF EXISTS {TABELA}",
+]
+
+_TERMO = re.compile(r'\w+', re.UNICODE)
+_disponivel = {}
+
+
+def fts_disponivel(using='default'):
+    """Se o índice FTS5 existe neste banco (resultado guardado por alias)."""
+    if using not in _disponivel:
+        connection = connections[using]
+        if connection.vendor != 'sqlite':
+            _disponivel[using] = False
+        else:
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [TABELA])
+                    _disponivel[using] = cursor.fetchone() is not None
+            except DatabaseError:
+                _disponivel[using] = False
+    return _disponivel[using]
+
+
+def criar_indice(using='default', reconstruir=True):
+    """Cria tabela e triggers (se faltarem) e reconstrói o índice; False sem FTS5."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return False
+    try:
+        with connection.cursor() as cursor:
+            for sql in SQL_CRIAR:
+                cursor.execute(sql)
+            if reconstruir:
+                cursor.execute(f"INSERT INTO {TABELA}({TABELA}) VALUES ('rebuild')")
+    except DatabaseError:
+        return False
+    finally:
+        _disponivel.pop(using, None)
+    return True
+
+
+def otimizar(using='default'):
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"INSERT INTO {TABELA}({TABELA}) VALUES ('optimize')")
+
+
+def termos(q):
+    return _TERMO.findall(q or '')
+
+
+def expressao_fts(q):
+    """'insc cancel' -> '"insc"* "cancel"*' (termos entre aspas, sem sintaxe do usuário)."""
+    return ' '.join(f'"{t}"*' for t in termos(q))
+
+
+def filtrar_texto(qs, q, ranquear=False):
+    """Restringe `qs` aos registros que contêm todos os termos de `q`.
+
+    Com `ranquear`, ordena por relevância (bm25) e depois pela data. Sem FTS5,
+    usa `icontains` em `acao`/`detalhes` para cada termo.
+    """
+    lista = termos(q)
+    if not lista:
+        return qs
+    if fts_disponivel(qs.db):
+        expr = expressao_fts(q)
+        if ranquear:
+            # junção direta com a tabela FTS: bm25 é calculado uma vez por
+            # resultado (uma subconsulta correlacionada refaria o MATCH por linha)
+            return qs.extra(
+                tables=[TABELA],
+                where=[f'{TABELA}.rowid = core_auditoria.id', f'{TABELA} MATCH %s'],
+                params=[expr],
+                select={'relevancia': f'bm25({TABELA})'},
+            ).order_by('relevancia', '-data_hora')
+        return qs.filter(id__in=RawSQL(f'SELECT rowid FROM {TABELA} WHERE {TABELA} MATCH %s', [expr]))
+    for t in lista:
+        qs = qs.filter(Q(acao__icontains=t) | Q(detalhes__icontains=t))
+    return qs
+
+
+def _normalizar(texto):
+    # como o tokenizer (remove_diacritics): minúsculas e sem acentos
+    texto = unicodedata.normalize('NFKD', texto.lower())
+    return ''.join(c for c in texto if not unicodedata.combining(c))
+
+
+def corresponde_texto(registro, q):
+    """Mesma regra em Python (registros arquivados): todos os termos como prefixo de palavra."""
+    lista = [_normalizar(t) for t in termos(q)]
+    if not lista:
+        return True
+    palavras = termos(_normalizar(f'{registro.acao} {registro.detalhes or ""}'))
+    return all(any(p.startswith(t) for p in palavras) for t in lista)
@@ -0,0 +1,161 @@
+"""Cache da autenticação (token da API e usuário da sessão).
+
+Sem cache, cada requisição da API com token faz um SELECT em
+`authtoken_token` + `auth_user`, e cada requisição com sessão carrega o
+usuário de novo. Aqui o token (com o usuário) e o usuário da sessão ficam num
+LRU em memória por processo, limitado a `AUTH_CACHE_TAMANHO` entradas e com
+validade de `AUTH_CACHE_TTL` segundos: no regime normal a autenticação não
+faz nenhuma query.
+
+Os signals (`core.signals`) descartam as entradas quando o token é apagado e
+quando o usuário é salvo (desativação, troca de senha ou de dados) ou
+removido. O cache é por processo, então nos outros workers a mudança vale
+quando a entrada expira; o TTL é esse limite. Cada requisição recebe uma
+cópia do usuário em cache, nunca a instância compartilhada.
+
+Com `TOKEN_VALIDADE_HORAS` os tokens expiram; o login da API (`token_para`)
+troca o token expirado por um novo (ou quando o cliente pede a rotação).
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import backends
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework import authentication, exceptions
+from rest_framework.authtoken.models import Token
+
+
+def _config(nome, padrao):
+    return getattr(settings, nome, padrao)
+
+
+class CacheLRU:
+    """Dicionário limitado (descarta o menos usado) com validade por entrada; thread-safe."""
+
+    def __init__(self, tamanho, ttl):
+        self.tamanho = tamanho
+        self.ttl = ttl
+        self._dados = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, chave):
+        with self._lock:
+            item = self._dados.get(chave)
+            if item is None:
+                return None
+            valor, expira = item
+            if expira <= time.monotonic():
+                del self._dados[chave]
+                return None
+            self._dados.move_to_end(chave)
+            return valor
+
+    def set(self, chave, valor):
+        if self.tamanho <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._dados[chave] = (valor, time.monotonic() + self.ttl)
+            self._dados.move_to_end(chave)
+            while len(self._dados) > self.tamanho:
+                self._dados.popitem(last=False)
+
+    def remover(self, chave):
+        with self._lock:
+            self._dados.pop(chave, None)
+
+    def remover_se(self, condicao):
+        with self._lock:
+            for chave in [c for c, (valor, _) in self._dados.items() if condicao(valor)]:
+                del self._dados[chave]
+
+    def limpar(self):
+        with self._lock:
+            self._dados.clear()
+
+    def __len__(self):
+        return len(self._dados)
+
+
+# chave do token -> (token, usuário); id -> usuário (sessões)
+tokens = CacheLRU(int(_config('AUTH_CACHE_TAMANHO', 10000)), float(_config('AUTH_CACHE_TTL', 60)))
+usuarios = CacheLRU(int(_config('AUTH_CACHE_TAMANHO', 10000)), float(_config('AUTH_CACHE_TTL', 60)))
+
+
+def _descartar_usuario(user_id):
+    usuarios.remover(user_id)
+    tokens.remover_se(lambda valor: valor[1].pk == user_id)
+
+
+def invalidar_token(chave):
+    tokens.remover(chave)
+    transaction.on_commit(lambda: tokens.remover(chave))
+
+
+def invalidar_usuario(user_id):
+    # de novo após o commit: uma leitura concorrente pode ter guardado a linha antiga
+    _descartar_usuario(user_id)
+    transaction.on_commit(lambda: _descartar_usuario(user_id))
+
+
+def expirado(token):
+    horas = float(_config('TOKEN_VALIDADE_HORAS', 0) or 0)
+    return bool(horas) and token.created + timedelta(hours=horas) <= timezone.now()
+
+
+def token_para(user, rotacionar=False):
+    """Token do login da API: reaproveita o atual, ou cria um novo se não houver, se expirou ou se `rotacionar`."""
+    token = Token.objects.filter(user=user).first()
+    if token is not None and (rotacionar or expirado(token)):
+        token.delete()
+        token = None
+    if token is None:
+        try:
+            token = Token.objects.create(user=user)
+        except IntegrityError:
+            # login simultâneo do mesmo usuário criou o token primeiro
+            token = Token.objects.get(user=user)
+    # a primeira chamada com o token novo já não consulta o banco
+    tokens.set(token.key, (token, copy.copy(user)))
+    return token
+
+
+class TokenAuthentication(authentication.TokenAuthentication):
+    """`TokenAuthentication` do DRF com o token e o usuário em cache (e expiração opcional)."""
+
+    def authenticate_credentials(self, key):
+        item = tokens.get(key)
+        if item is None:
+            try:
+                token = Token.objects.select_related('user').get(key=key)
+            except Token.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            item = (token, token.user)
+            if token.user.is_active:
+                # só na leitura do banco: um acerto não renova a validade da entrada
+                tokens.set(key, item)
+        token, user = item
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+        if expirado(token):
+            invalidar_token(key)
+            raise exceptions.AuthenticationFailed('Token expirado; faça login novamente.')
+        return copy.copy(user), token
+
+
+class ModelBackend(backends.ModelBackend):
+    """`ModelBackend` com o usuário da sessão em cache (`get_user` roda em toda requisição)."""
+
+    def get_user(self, user_id):
+        user = usuarios.get(user_id)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is None:
+                return None
+            usuarios.set(user_id, user)
+        return copy.copy(user)
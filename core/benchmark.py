@@ -0,0 +1,162 @@
+"""Cenários de carga contra a aplicação WSGI (`benchmark`).
+
+Cada cenário monta uma lista de requisições a partir do dataset de
+`core.carga` (semente fixa) e a executa com `core.benchmark_worker`, em vários
+processos chamando a aplicação WSGI diretamente. O relatório traz, por
+cenário, vazão, latência e queries por requisição (p50/p95/p99), em JSON, para
+comparar commits.
+
+Cenários:
+- `inscricoes`: corrida de inscrições (POST /api/inscricoes/) em poucos eventos;
+- `feed`: navegação na home (GET /home/?page=N) com sessão;
+- `confirmacao`: confirmação de presença em lote pelo administrador;
+- `certificados`: download de certificados em PDF.
+
+O que os cenários gravam é desfeito no fim (inscrições, presenças, sessões).
+"""
+import random
+import subprocess
+import sys
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.contrib.sessions.models import Session
+from django.db.models import F
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from . import certificados
+from .benchmark_worker import executar
+from .carga import PREFIXO, admin_username
+from .models import Evento, Inscricao
+from .vagas import recalcular_vagas
+
+User = get_user_model()
+
+CENARIOS = ('inscricoes', 'feed', 'confirmacao', 'certificados')
+
+
+def _tokens(user_ids):
+    existentes = dict(Token.objects.filter(user_id__in=user_ids).values_list('user_id', 'key'))
+    novos = [Token(user_id=u, key=Token.generate_key()) for u in user_ids if u not in existentes]
+    Token.objects.bulk_create(novos, batch_size=1000)
+    existentes.update({t.user_id: t.key for t in novos})
+    return existentes
+
+
+def _sessoes(user_ids):
+    """Sessões autenticadas criadas direto no banco: {user_id: session_key}."""
+    from importlib import import_module
+    store = import_module(settings.SESSION_ENGINE).SessionStore
+    usuarios = User.objects.filter(id__in=user_ids)
+    chaves = {}
+    for u in usuarios:
+        s = store()
+        s[SESSION_KEY] = str(u.pk)
+        s[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        s[HASH_SESSION_KEY] = u.get_session_auth_hash()
+        s.create()
+        chaves[u.pk] = s.session_key
+    return chaves
+
+
+def _alunos(rng, n, fora_de=()):
+    """`n` alunos do dataset sorteados; `fora_de` exclui os já inscritos nesses eventos."""
+    qs = User.objects.filter(username__startswith=f'{PREFIXO}_', groups__name='Aluno')
+    if fora_de:
+        qs = qs.exclude(inscricoes__evento_id__in=fora_de)
+    ids = list(qs.order_by('id').values_list('id', flat=True))
+    return rng.sample(ids, min(n, len(ids)))
+
+
+def preparar(cenario, n, rng):
+    """(requisições, função de limpeza) do cenário."""
+    cookie = settings.SESSION_COOKIE_NAME
+    if cenario == 'inscricoes':
+        # poucos eventos futuros com vaga: todos disputam as mesmas linhas
+        eventos = list(Evento.objects.filter(data_inicio__gt=timezone.now(), vagas__gt=F('vagas_ocupadas'),
+                                             responsavel__username__startswith=f'{PREFIXO}_')
+                       .order_by('id').values_list('id', flat=True)[:3])
+        tokens = _tokens(_alunos(rng, n, fora_de=eventos))
+        requisicoes = [('POST', '/api/inscricoes/', {'evento': rng.choice(eventos)}, {'Authorization': f'Token {chave}'})
+                       for chave in tokens.values()]
+        inicio = timezone.now()
+
+        def limpar():
+            Inscricao.objects.filter(evento_id__in=eventos, data_inscricao__gte=inicio).delete()
+            recalcular_vagas(Evento.objects.filter(id__in=eventos))
+        return requisicoes, limpar
+    if cenario == 'feed':
+        sessoes = _sessoes(_alunos(rng, max(1, n // 10)))
+        paginas = max(1, min(20, Evento.objects.count() // 6))
+        requisicoes = [('GET', f'/home/?page={rng.randint(1, paginas)}', None, {'Cookie': f'{cookie}={rng.choice(list(sessoes.values()))}'})
+                       for _ in range(n)]
+        return requisicoes, lambda: Session.objects.filter(session_key__in=list(sessoes.values())).delete()
+    if cenario == 'confirmacao':
+        admin = User.objects.get(username=admin_username())
+        chave = _tokens([admin.pk])[admin.pk]
+        pendentes = list(Inscricao.objects.filter(presenca_confirmada=False, evento__data_fim__lt=timezone.now(),
+                                                  participante__username__startswith=f'{PREFIXO}_')
+                         .order_by('id').values_list('id', flat=True)[:n * 50])
+        lotes = [pendentes[i:i + 50] for i in range(0, len(pendentes), 50)][:n]
+        requisicoes = [('POST', '/api/internal/inscricoes/bulk/', {'action': 'confirm', 'inscricao_ids': ids}, {'Authorization': f'Token {chave}'})
+                       for ids in lotes]
+
+        def limpar():
+            ids = [i for lote in lotes for i in lote]
+            Inscricao.objects.filter(id__in=ids).update(presenca_confirmada=False, certificado_gerado=False, certificado_emitido_em=None)
+            certificados.invalidar(ids)
+        return requisicoes, limpar
+    if cenario == 'certificados':
+        # metade das requisições repete documentos (arquivo já gerado)
+        pares = list(Inscricao.objects.filter(certificado_gerado=True, participante__username__startswith=f'{PREFIXO}_')
+                     .order_by('id').values_list('id', 'participante_id')[:max(1, n // 2) * 20])
+        escolhidos = rng.sample(pares, min(len(pares), max(1, n // 2)))
+        sessoes = _sessoes({participante for _, participante in escolhidos})
+        requisicoes = []
+        for _ in range(n if escolhidos else 0):
+            inscricao, participante = rng.choice(escolhidos)
+            requisicoes.append(('GET', f'/certificado/{inscricao}/?formato=pdf', None, {'Cookie': f'{cookie}={sessoes[participante]}'}))
+
+        def limpar():
+            Session.objects.filter(session_key__in=list(sessoes.values())).delete()
+            certificados.invalidar([inscricao for inscricao, _ in escolhidos])
+        return requisicoes, limpar
+    raise ValueError(f'Cenário desconhecido: {cenario}')
+
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, cwd=settings.BASE_DIR, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def rodar(cenarios=CENARIOS, requisicoes=400, processos=4, threads=4, semente=42, throttle=False, log=print):
+    """Executa os cenários em sequência e devolve o relatório completo (dict serializável)."""
+    rng = random.Random(semente)
+    resultado = {
+        'gerado_em': timezone.now().isoformat(),
+        'commit': _commit(),
+        'python': sys.version.split()[0],
+        'config': {'requisicoes': requisicoes, 'processos': processos, 'threads': threads, 'semente': semente,
+                   'banco': str(settings.DATABASES['default']['NAME']), 'throttle': throttle},
+        'dataset': {
+            'usuarios': User.objects.filter(username__startswith=f'{PREFIXO}_').count(),
+            'eventos': Evento.objects.count(),
+            'inscricoes': Inscricao.objects.count(),
+        },
+        'cenarios': {},
+    }
+    for cenario in cenarios:
+        reqs, limpar = preparar(cenario, requisicoes, rng)
+        if not reqs:
+            log(f'{cenario}: sem dados para o cenário (rode gerar_carga).')
+            continue
+        log(f'{cenario}: {len(reqs)} requisições, {processos} processo(s) x {threads} thread(s)...')
+        try:
+            resultado['cenarios'][cenario] = executar(reqs, processos, threads, throttle)
+        finally:
+            limpar()
+        r = resultado['cenarios'][cenario]
+        log(f"  {r['vazao_rps']} req/s, p50 {r['latencia_ms']['p50']} ms, p95 {r['latencia_ms']['p95']} ms, p99 {r['latencia_ms']['p99']} ms, status {r['status']}")
+    return resultado
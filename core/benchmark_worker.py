@@ -0,0 +1,161 @@
+"""Execução das requisições de `core.benchmark` em processos de carga.
+
+As requisições são divididas entre processos `spawn`, cada um com algumas
+threads chamando `setup.wsgi.application` diretamente: o caminho completo de
+middleware, views e banco, sem servidor HTTP no meio. Os processos esperam
+numa barreira e só então começam, para a vazão medir a carga simultânea. Por
+requisição são medidos a latência, o status e o número de queries (cabeçalho
+`Server-Timing` de `core.middleware`).
+
+Os processos importam este módulo antes do `django.setup()`, por isso ele não
+importa models. Neles `DEBUG` é desligado, a pré-renderização de certificados
+é desativada e, salvo `throttle=True`, os limites de throttle ficam altos (a
+escrita no balde continua sendo medida).
+"""
+import io
+import json
+import multiprocessing
+import queue
+import re
+import threading
+import time
+from collections import Counter
+from wsgiref.util import setup_testing_defaults
+
+from .metrics import _percentile
+
+_QUERIES = re.compile(r'db;desc="(\d+) queries"')
+
+
+def _iniciar_processo(throttle):
+    import django
+    django.setup()
+    from django.conf import settings
+    from rest_framework.throttling import SimpleRateThrottle
+    settings.DEBUG = False
+    settings.CERTIFICADO_PRERENDER = False
+    settings.REQUEST_METRICS_ENABLED = True
+    if not throttle:
+        SimpleRateThrottle.THROTTLE_RATES = {escopo: '100000000/day' for escopo in SimpleRateThrottle.THROTTLE_RATES}
+
+
+def chamar(app, metodo, caminho, corpo=None, cabecalhos=None):
+    """Executa uma requisição na aplicação WSGI; devolve (ms, status, queries)."""
+    caminho, _, query = caminho.partition('?')
+    dados = json.dumps(corpo).encode('utf-8') if corpo is not None else b''
+    environ = {
+        'REQUEST_METHOD': metodo, 'PATH_INFO': caminho, 'QUERY_STRING': query,
+        'HTTP_HOST': 'localhost', 'SERVER_NAME': 'localhost', 'REMOTE_ADDR': '127.0.0.1',
+        'wsgi.input': io.BytesIO(dados), 'CONTENT_LENGTH': str(len(dados)),
+        'wsgi.multithread': True, 'wsgi.multiprocess': True,
+    }
+    if corpo is not None:
+        environ['CONTENT_TYPE'] = 'application/json'
+    for nome, valor in (cabecalhos or {}).items():
+        environ['HTTP_' + nome.upper().replace('-', '_')] = valor
+    setup_testing_defaults(environ)
+    resposta = {}
+
+    def start_response(status, headers, exc_info=None):
+        resposta['status'] = int(status.split(' ', 1)[0])
+        resposta['headers'] = dict(headers)
+
+    inicio = time.perf_counter()
+    corpo_resposta = app(environ, start_response)
+    try:
+        for _ in corpo_resposta:
+            pass
+    finally:
+        if hasattr(corpo_resposta, 'close'):
+            corpo_resposta.close()
+    ms = (time.perf_counter() - inicio) * 1000.0
+    m = _QUERIES.search(resposta['headers'].get('Server-Timing', ''))
+    return ms, resposta['status'], int(m.group(1)) if m else None
+
+
+def _worker(requisicoes, threads, throttle, barreira, saida):
+    _iniciar_processo(throttle)
+    from setup.wsgi import application
+    from .audit import flush_audit
+    fila = queue.SimpleQueue()
+    for req in requisicoes:
+        fila.put(req)
+    amostras = []
+    lock = threading.Lock()
+
+    def consumir():
+        while True:
+            try:
+                req = fila.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                amostra = chamar(application, *req)
+            except Exception as e:
+                amostra = (0.0, f'erro:{e.__class__.__name__}', None)
+            with lock:
+                amostras.append(amostra)
+
+    barreira.wait()
+    inicio = time.time()
+    grupo = [threading.Thread(target=consumir) for _ in range(threads)]
+    for t in grupo:
+        t.start()
+    for t in grupo:
+        t.join()
+    fim = time.time()
+    flush_audit()
+    saida.put((inicio, fim, amostras))
+
+
+def executar(requisicoes, processos=4, threads=4, throttle=False):
+    """Dispara `requisicoes` [(metodo, caminho, corpo, cabecalhos)] em paralelo; devolve o relatório."""
+    from django.db import connections
+    connections.close_all()
+    contexto = multiprocessing.get_context('spawn')
+    processos = max(1, min(processos, len(requisicoes)))
+    barreira = contexto.Barrier(processos)
+    saida = contexto.Queue()
+    workers = [
+        contexto.Process(target=_worker, args=(requisicoes[i::processos], threads, throttle, barreira, saida), daemon=True)
+        for i in range(processos)
+    ]
+    for w in workers:
+        w.start()
+    resultados = []
+    try:
+        while len(resultados) < len(workers):
+            try:
+                resultados.append(saida.get(timeout=1))
+            except queue.Empty:
+                # um processo que morre antes de responder travaria a espera (e a barreira)
+                if any(w.exitcode not in (None, 0) for w in workers):
+                    raise RuntimeError('Um processo de carga terminou com erro; veja a saída acima.')
+    finally:
+        for w in workers:
+            if len(resultados) < len(workers):
+                w.terminate()
+            w.join()
+    return relatorio(resultados)
+
+
+def _percentis(valores):
+    resultado = {nome: round(_percentile(valores, p), 2) if valores else None for nome, p in (('p50', 50), ('p95', 95), ('p99', 99))}
+    resultado['max'] = round(valores[-1], 2) if valores else None
+    return resultado
+
+
+def relatorio(resultados):
+    """Agrega as amostras [(início, fim, amostras)] dos processos."""
+    inicio = min(r[0] for r in resultados)
+    fim = max(r[1] for r in resultados)
+    amostras = [a for r in resultados for a in r[2]]
+    duracao = max(fim - inicio, 1e-9)
+    return {
+        'requisicoes': len(amostras),
+        'duracao_s': round(duracao, 3),
+        'vazao_rps': round(len(amostras) / duracao, 2),
+        'latencia_ms': _percentis(sorted(a[0] for a in amostras if isinstance(a[1], int))),
+        'queries': _percentis(sorted(a[2] for a in amostras if a[2] is not None)),
+        'status': dict(sorted(Counter(str(a[1]) for a in amostras).items())),
+    }
@@ -0,0 +1,163 @@
+"""Gerador de dataset sintético para testes de carga (`gerar_carga`).
+
+Cria usuários (alunos e professores), eventos passados e futuros, inscrições
+(com presença e certificado nos eventos passados) e registros de auditoria
+com `bulk_create`, em lotes e com um gerador aleatório de semente fixa: a
+mesma semente produz o mesmo dataset, o que permite comparar commits. Os
+usuários gerados têm o prefixo `PREFIXO` no username.
+
+Use um banco separado (`DB_NAME=/tmp/carga.sqlite3`): `bulk_create` não passa
+pelos signals e o dataset não tem como ser removido em bloco do banco de
+desenvolvimento.
+"""
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.db import transaction
+from django.utils import timezone
+from .audit_schema import ACOES
+from .feed import invalidar_feed
+from .models import Auditoria, Evento, Inscricao
+from .versoes import incrementar, reservar
+
+User = get_user_model()
+
+PREFIXO = 'carga'
+SENHA = 'Carga@123'
+LOCAIS = ('Auditório A', 'Auditório B', 'Sala 101', 'Sala 204', 'Laboratório 3', 'Biblioteca', 'Ginásio')
+TEMAS = ('Introdução a', 'Oficina de', 'Seminário de', 'Workshop de', 'Palestra sobre', 'Minicurso de')
+ASSUNTOS = ('Python', 'Django', 'Banco de Dados', 'Redes', 'Estatística', 'Cálculo', 'Física', 'Ética', 'Robótica', 'IA')
+
+
+def admin_username():
+    return f'{PREFIXO}_admin'
+
+
+def _lotes(iteravel, tamanho):
+    lote = []
+    for item in iteravel:
+        lote.append(item)
+        if len(lote) >= tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def _distribuir(total, partes, rng, maximo):
+    """Divide `total` em `partes` contagens desiguais (cauda longa), cada uma <= `maximo`."""
+    pesos = [rng.paretovariate(1.5) for _ in range(partes)]
+    soma = sum(pesos)
+    contagens = [min(maximo, int(total * p / soma)) for p in pesos]
+    falta = total - sum(contagens)
+    i = 0
+    while falta > 0 and i < partes * 4:
+        j = i % partes
+        extra = min(falta, maximo - contagens[j])
+        contagens[j] += extra
+        falta -= extra
+        i += 1
+    return contagens
+
+
+def gerar(usuarios=20000, eventos=2000, inscricoes=1_000_000, auditoria=1_000_000, semente=42, lote=5000, log=print):
+    """Gera o dataset e devolve a contagem de linhas criadas por tabela."""
+    if User.objects.filter(username__startswith=f'{PREFIXO}_').exists():
+        raise ValueError(f'Já existe um dataset "{PREFIXO}" neste banco; use outro DB_NAME.')
+    rng = random.Random(semente)
+    agora = timezone.now().replace(microsecond=0)
+    senha = make_password(SENHA)
+    grupos = {nome: Group.objects.get_or_create(name=nome)[0] for nome in ('Aluno', 'Professor', 'Organizador')}
+
+    # usuários: ~2% professores, o resto alunos, mais um administrador (Organizador)
+    n_professores = max(1, usuarios // 50)
+    def novos_usuarios():
+        for i in range(usuarios):
+            yield User(
+                username=f'{PREFIXO}_{i:06d}', email=f'{PREFIXO}_{i:06d}@example.com', password=senha,
+                first_name=rng.choice(('Ana', 'Bruno', 'Carla', 'Diego', 'Elisa', 'Fábio', 'Gabi', 'Hugo')),
+                last_name=str(i), is_staff=i < n_professores,
+            )
+    for parte in _lotes(novos_usuarios(), lote):
+        User.objects.bulk_create(parte, batch_size=lote)
+    admin = User.objects.create(username=admin_username(), email=f'{admin_username()}@example.com', password=senha, is_staff=True, is_superuser=True)
+    ids = list(User.objects.filter(username__startswith=f'{PREFIXO}_').exclude(pk=admin.pk).order_by('username').values_list('id', flat=True))
+    professores, alunos = ids[:n_professores], ids[n_professores:]
+    Membro = User.groups.through
+    membros = [Membro(user_id=u, group_id=grupos['Professor'].id) for u in professores]
+    membros += [Membro(user_id=u, group_id=grupos['Aluno'].id) for u in alunos]
+    membros.append(Membro(user_id=admin.pk, group_id=grupos['Organizador'].id))
+    Membro.objects.bulk_create(membros, batch_size=lote)
+    log(f'{len(ids) + 1} usuários')
+
+    # eventos: metade já realizados (com presença/certificados), metade futuros
+    contagens = _distribuir(inscricoes, eventos, rng, len(alunos))
+    numeros = iter(reservar(eventos))
+    novos = []
+    for i, inscritos in enumerate(contagens):
+        passado = i % 2 == 0
+        inicio = agora + timedelta(days=rng.randint(-180, -2) if passado else rng.randint(2, 180), hours=rng.randint(8, 20))
+        duracao = rng.choice((60, 90, 120, 240, 480))
+        # alguns eventos futuros ficam lotados
+        folga = 0 if (not passado and rng.random() < 0.1) else rng.randint(1, max(1, inscritos // 2 + 10))
+        novos.append(Evento(
+            nome=f'{rng.choice(TEMAS)} {rng.choice(ASSUNTOS)} #{i}', descricao='Evento gerado para teste de carga.',
+            data_inicio=inicio, data_fim=inicio + timedelta(minutes=duracao), local=rng.choice(LOCAIS),
+            vagas=inscritos + folga, vagas_ocupadas=inscritos, carga_horaria_minutos=duracao,
+            responsavel_id=rng.choice(professores), alteracao=next(numeros),
+        ))
+    Evento.objects.bulk_create(novos, batch_size=lote)
+    eventos_criados = list(Evento.objects.filter(responsavel_id__in=professores).order_by('id'))
+    log(f'{len(eventos_criados)} eventos')
+
+    # inscrições: participantes distintos por evento; snapshot como em core.lote
+    def novas_inscricoes():
+        for evento, inscritos in zip(eventos_criados, contagens):
+            passado = evento.data_fim < agora
+            for participante_id in rng.sample(alunos, inscritos):
+                presente = passado and rng.random() < 0.7
+                yield Inscricao(
+                    evento_id=evento.id, participante_id=participante_id,
+                    participante_email=f'{participante_id}@example.com',
+                    presenca_confirmada=presente, certificado_gerado=presente,
+                    certificado_emitido_em=evento.data_fim + timedelta(days=1) if presente else None,
+                    certificado_evento_nome=evento.nome, certificado_data_inicio=evento.data_inicio,
+                    certificado_local=evento.local, certificado_carga_horaria_minutos=evento.carga_horaria_minutos,
+                )
+    total = 0
+    for parte in _lotes(novas_inscricoes(), lote):
+        with transaction.atomic():
+            Inscricao.objects.bulk_create(parte, batch_size=lote)
+        total += len(parte)
+        if total % (lote * 20) == 0:
+            log(f'  {total} inscrições...')
+    log(f'{total} inscrições')
+
+    # auditoria dentro da retenção (fica na tabela, não no arquivo)
+    dias = int(getattr(settings, 'AUDIT_RETENTION_DAYS', 90))
+    codigos = sorted(ACOES)
+    evento_ids = [e.id for e in eventos_criados]
+    def novos_registros():
+        for _ in range(auditoria):
+            codigo = rng.choice(codigos)
+            evento_id = rng.choice(evento_ids) if evento_ids and codigo.startswith(('evento.', 'inscricao.', 'presenca.', 'certificado.')) else None
+            yield Auditoria(
+                usuario_id=rng.choice(ids), acao=ACOES[codigo], codigo=codigo, evento_id=evento_id,
+                data_hora=agora - timedelta(seconds=rng.randint(0, dias * 86400)),
+                detalhes=f'Registro sintético evento_id={evento_id}' if evento_id else 'Registro sintético',
+            )
+    total_auditoria = 0
+    for parte in _lotes(novos_registros(), lote):
+        with transaction.atomic():
+            Auditoria.objects.bulk_create(parte, batch_size=lote)
+        total_auditoria += len(parte)
+    log(f'{total_auditoria} registros de auditoria')
+
+    # bulk_create não dispara os signals que invalidam feed e ETags
+    invalidar_feed(eventos=True)
+    incrementar()
+    return {'usuarios': len(ids) + 1, 'eventos': len(eventos_criados), 'inscricoes': total, 'auditoria': total_auditoria}
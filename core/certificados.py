@@ -0,0 +1,252 @@
+"""Certificados pré-renderizados (HTML e PDF) em disco.
+
+O conteúdo de um certificado só depende do snapshot gravado na inscrição
+quando ele é emitido (`certificado_*`) e do nome do participante. Os arquivos
+ficam em `CERTIFICADO_CACHE_DIR/<inscricao_id>/<hash do snapshot>.<ext>`:
+o hash serve de ETag e muda sozinho se o snapshot mudar, e a pasta da
+inscrição é apagada quando a presença é revogada (`invalidar`).
+
+Os documentos são gerados logo após a emissão (`agendar`, numa thread depois
+do commit) ou, se ainda não existirem, no primeiro acesso (`documento`).
+"""
+import hashlib
+import io
+import json
+import logging
+import os
+import shutil
+import tempfile
+import textwrap
+import threading
+import unicodedata
+from collections import namedtuple
+from datetime import datetime
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.template.loader import render_to_string
+from django.utils import timezone
+from .models import Inscricao
+
+logger = logging.getLogger(__name__)
+
+# incrementar ao mudar o layout (template ou PDF) para gerar novos arquivos
+VERSAO_LAYOUT = 1
+
+FORMATOS = {
+    'html': 'text/html; charset=utf-8',
+    'pdf': 'application/pdf',
+}
+
+Documento = namedtuple('Documento', 'caminho etag modificado content_type')
+
+
+def diretorio():
+    return getattr(settings, 'CERTIFICADO_CACHE_DIR', None) or os.path.join(settings.BASE_DIR, 'certificados')
+
+
+def _pasta(inscricao_id):
+    return os.path.join(diretorio(), str(inscricao_id))
+
+
+def nome_participante(insc):
+    p = insc.participante
+    if p is None:
+        return ' '.join(filter(None, [insc.participante_first_name, insc.participante_last_name]))
+    return p.get_full_name() or p.username
+
+
+def snapshot(insc):
+    """Dados que definem o conteúdo do certificado (mesmas regras do template)."""
+    evt = insc.evento
+    return {
+        'layout': VERSAO_LAYOUT,
+        'inscricao': insc.id,
+        'participante': nome_participante(insc),
+        'evento': insc.certificado_evento_nome or (evt.nome if evt else ''),
+        'local': insc.certificado_local or (evt.local if evt else ''),
+        'carga_horaria': insc.certificado_carga_horaria_readable if insc.certificado_carga_horaria_minutos else (evt.carga_horaria_readable if evt else ''),
+        'emitido_em': insc.certificado_emitido_em.isoformat() if insc.certificado_emitido_em else None,
+    }
+
+
+def chave(dados):
+    return hashlib.sha256(json.dumps(dados, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def _gravar(caminho, conteudo):
+    # grava num temporário e renomeia: leitores concorrentes nunca veem arquivo pela metade
+    pasta = os.path.dirname(caminho)
+    os.makedirs(pasta, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=pasta, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(conteudo)
+        os.replace(tmp, caminho)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _limpar_antigos(pasta, atual, ext):
+    # versões anteriores (ex.: participante mudou de nome)
+    for nome in os.listdir(pasta):
+        if nome.endswith(f'.{ext}') and nome != atual:
+            try:
+                os.unlink(os.path.join(pasta, nome))
+            except OSError:
+                pass
+
+
+def renderizar_html(insc):
+    emitido = insc.certificado_emitido_em or timezone.now()
+    return render_to_string('core/certificado.html', {'inscricao': insc, 'data_atual': emitido}).encode('utf-8')
+
+
+# fontes TrueType procuradas (também nas pastas de fontes do sistema) para o PDF
+FONTES_PDF = ('DejaVuSans.ttf', 'LiberationSans-Regular.ttf', 'Arial.ttf', 'arial.ttf')
+
+
+@lru_cache(maxsize=None)
+def _fonte(tamanho):
+    """(fonte, suporta_acentos): CERTIFICADO_FONTE, uma das FONTES_PDF ou a fonte embutida do Pillow."""
+    from PIL import ImageFont
+    configurada = getattr(settings, 'CERTIFICADO_FONTE', '')
+    for nome in ((configurada,) if configurada else ()) + FONTES_PDF:
+        try:
+            return ImageFont.truetype(nome, tamanho), True
+        except OSError:
+            continue
+    try:
+        # a fonte embutida não tem acentos: o texto é desenhado sem eles
+        return ImageFont.load_default(size=tamanho), False
+    except (TypeError, OSError):
+        return ImageFont.load_default(), False
+
+
+def _sem_acentos(texto):
+    texto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in texto if not unicodedata.combining(c)).replace('—', '-')
+
+
+def _assinatura():
+    from django.contrib.staticfiles import finders
+    return finders.find('img/signature.png')
+
+
+def _escrever(draw, posicao, texto, tamanho, cor):
+    fonte, acentos = _fonte(tamanho)
+    draw.text(posicao, texto if acentos else _sem_acentos(texto), font=fonte, fill=cor, anchor='mt')
+
+
+def renderizar_pdf(dados):
+    """PDF A4 paisagem (imagem 150 dpi gerada com Pillow) com o texto do certificado."""
+    from PIL import Image, ImageDraw
+
+    largura, altura = 1754, 1240
+    azul, cinza = (0, 51, 102), (85, 85, 85)
+    img = Image.new('RGB', (largura, altura), 'white')
+    draw = ImageDraw.Draw(img)
+    draw.rectangle([40, 40, largura - 41, altura - 41], outline=azul, width=20)
+
+    emitido = dados['emitido_em']
+    data = timezone.localtime(datetime.fromisoformat(emitido)).strftime('%d/%m/%Y') if emitido else ''
+    linhas = [
+        ('CERTIFICADO', 96, azul, 40),
+        ('SGEA - Sistema de Gestão de Eventos Acadêmicos', 40, cinza, 70),
+        ('Certificamos que', 38, (0, 0, 0), 20),
+        (dados['participante'], 50, azul, 40),
+        ('participou com êxito do evento', 38, (0, 0, 0), 20),
+    ]
+    linhas += [(parte, 50, azul, 40) for parte in textwrap.wrap(dados['evento'] or '(evento removido)', 48)]
+    local = dados['local'] or '(local indisponível)'
+    linhas += [
+        (f'Realizado em {local}, com carga horária de {dados["carga_horaria"] or "—"}.', 34, (0, 0, 0), 50),
+        (f'{local}, {data}', 30, (119, 119, 119), 30),
+    ]
+    y = 150
+    for texto, tamanho, cor, depois in linhas:
+        _escrever(draw, (largura / 2, y), texto, tamanho, cor)
+        y += tamanho + depois
+
+    caminho = _assinatura()
+    if caminho:
+        with Image.open(caminho) as assinatura:
+            assinatura = assinatura.convert('RGBA')
+            assinatura.thumbnail((320, 120))
+            img.paste(assinatura, (int((largura - assinatura.width) / 2), y), assinatura)
+            y += assinatura.height + 10
+    draw.line([(largura / 2 - 300, y), (largura / 2 + 300, y)], fill=(51, 51, 51), width=2)
+    _escrever(draw, (largura / 2, y + 15), 'Coordenação Acadêmica', 30, (0, 0, 0))
+
+    buf = io.BytesIO()
+    img.save(buf, 'PDF', resolution=150)
+    return buf.getvalue()
+
+
+def localizar(insc, formato='html'):
+    """(dados do snapshot, caminho do arquivo, etag) sem gerar nada."""
+    dados = snapshot(insc)
+    hash_ = chave(dados)
+    return dados, os.path.join(_pasta(insc.id), f'{hash_}.{formato}'), f'"{hash_[:32]}-{formato}"'
+
+
+def gravar_pdf(dados, caminho):
+    """Renderiza e grava o PDF em `caminho` (se ainda não existir); usado também nos workers do ZIP."""
+    if not os.path.exists(caminho):
+        _gravar(caminho, renderizar_pdf(dados))
+        _limpar_antigos(os.path.dirname(caminho), os.path.basename(caminho), 'pdf')
+    return caminho
+
+
+def documento(insc, formato='html'):
+    """Arquivo do certificado de `insc` no `formato`, gerando-o se ainda não existir."""
+    dados, caminho, etag = localizar(insc, formato)
+    if formato == 'pdf':
+        gravar_pdf(dados, caminho)
+    elif not os.path.exists(caminho):
+        _gravar(caminho, renderizar_html(insc))
+        _limpar_antigos(os.path.dirname(caminho), os.path.basename(caminho), formato)
+    modificado = insc.certificado_emitido_em or timezone.now()
+    return Documento(caminho, etag, modificado, FORMATOS[formato])
+
+
+def preparar(inscricao_ids):
+    """Gera HTML e PDF das inscrições com certificado emitido; devolve quantas."""
+    total = 0
+    qs = Inscricao.objects.filter(id__in=list(inscricao_ids), certificado_gerado=True).select_related('participante', 'evento')
+    for insc in qs.iterator(chunk_size=200):
+        for formato in FORMATOS:
+            documento(insc, formato)
+        total += 1
+    return total
+
+
+def _preparar_em_thread(ids):
+    def run():
+        try:
+            preparar(ids)
+        except Exception:
+            logger.exception('Falha ao pré-renderizar %d certificado(s).', len(ids))
+        finally:
+            connections.close_all()
+    threading.Thread(target=run, name='sgea-certificados', daemon=True).start()
+
+
+def agendar(inscricao_ids):
+    """Pré-renderiza os certificados após o commit da transação atual."""
+    ids = [i for i in inscricao_ids if i]
+    if not ids or not getattr(settings, 'CERTIFICADO_PRERENDER', True):
+        return
+    transaction.on_commit(lambda: _preparar_em_thread(ids))
+
+
+def invalidar(inscricao_ids):
+    """Remove os arquivos gerados (presença revogada ou inscrição removida)."""
+    for inscricao_id in inscricao_ids:
+        if inscricao_id:
+            shutil.rmtree(_pasta(inscricao_id), ignore_errors=True)
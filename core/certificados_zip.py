@@ -0,0 +1,242 @@
+"""Pacote ZIP com os certificados emitidos de um evento (ou de um período).
+
+Os PDFs que ainda não estão em disco (`core.certificados`) são renderizados
+num pool de processos limitado a `CERTIFICADO_ZIP_WORKERS`; os já gerados são
+reaproveitados. Cada arquivo entra no ZIP assim que fica pronto e o ZIP é
+escrito num buffer esvaziado a cada pedaço, então o pacote nunca fica inteiro
+em memória. O progresso de cada exportação fica numa linha de
+`ExportacaoCertificados` (e não no cache, que é por processo): a consulta do
+andamento pode cair em qualquer worker.
+"""
+import io
+import logging
+import multiprocessing
+import os
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+from django.utils.text import slugify
+from .certificados import documento, gravar_pdf, localizar, nome_participante
+from .models import ExportacaoCertificados, Inscricao
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_PEDACO = 64 * 1024
+PROGRESSO_TIMEOUT = 3600
+
+_pool = {'executor': None, 'pid': None}
+_pool_lock = threading.Lock()
+
+
+def max_workers():
+    limite = int(getattr(settings, 'CERTIFICADO_ZIP_WORKERS', 2) or 1)
+    return max(1, min(limite, os.cpu_count() or 1))
+
+
+def _iniciar_worker():
+    # processos "spawn" começam sem Django configurado
+    import django
+    django.setup()
+
+
+def novo_executor(workers=None):
+    # spawn: o worker não herda conexões de BD nem threads do processo web
+    return ProcessPoolExecutor(
+        max_workers=workers or max_workers(),
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_iniciar_worker,
+    )
+
+
+def executor_compartilhado():
+    """Pool único por processo: exportações simultâneas dividem os mesmos workers."""
+    with _pool_lock:
+        if _pool['executor'] is None or _pool['pid'] != os.getpid():
+            _pool['executor'] = novo_executor()
+            _pool['pid'] = os.getpid()
+        return _pool['executor']
+
+
+def _descartar_executor(executor):
+    with _pool_lock:
+        if _pool['executor'] is executor:
+            _pool['executor'] = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def intervalo(date_from, date_to):
+    """'AAAA-MM-DD' -> [inicio, fim) no fuso atual (fim inclusivo); inválidos viram None."""
+    def dia(valor):
+        try:
+            return timezone.make_aware(datetime.strptime(valor, '%Y-%m-%d')) if valor else None
+        except ValueError:
+            return None
+    inicio, fim = dia(date_from), dia(date_to)
+    return inicio, fim + timedelta(days=1) if fim else None
+
+
+def inscricoes(evento_id=None, inicio=None, fim=None):
+    """Inscrições com presença confirmada e certificado emitido (evento e/ou data do evento)."""
+    qs = Inscricao.objects.filter(certificado_gerado=True, presenca_confirmada=True)
+    if evento_id is not None:
+        qs = qs.filter(evento_id=evento_id)
+    # data do snapshot: vale também para eventos já removidos
+    if inicio is not None:
+        qs = qs.filter(certificado_data_inicio__gte=inicio)
+    if fim is not None:
+        qs = qs.filter(certificado_data_inicio__lt=fim)
+    return qs.select_related('participante', 'evento').order_by('evento_id', 'id')
+
+
+def nome_arquivo(insc, formato):
+    pasta = f"{slugify(insc.certificado_evento_nome or 'evento')[:60]}-{insc.evento_id or 'removido'}"
+    return f"{pasta}/{insc.id}-{slugify(nome_participante(insc))[:60] or 'participante'}.{formato}"
+
+
+def chave_job(user_id, job_id):
+    """Id gravado do job: o do cliente, prefixado pelo usuário (outro não sobrescreve nem lê o progresso)."""
+    return f'{user_id}:{job_id}'
+
+
+def progresso(job_id):
+    """{'total', 'prontos', 'status'} do job, ou None (desconhecido ou mais antigo que `PROGRESSO_TIMEOUT`)."""
+    limite = timezone.now() - timedelta(seconds=PROGRESSO_TIMEOUT)
+    return (
+        ExportacaoCertificados.objects.filter(job_id=job_id, atualizado_em__gte=limite)
+        .values('total', 'prontos', 'status').first()
+    )
+
+
+def _registrar_progresso(job_id, total, prontos, status='gerando', inicio=False):
+    if not job_id:
+        return
+    try:
+        if inicio:
+            # jobs antigos não são mais consultados
+            ExportacaoCertificados.objects.filter(atualizado_em__lt=timezone.now() - timedelta(seconds=PROGRESSO_TIMEOUT)).delete()
+        ExportacaoCertificados.objects.update_or_create(job_id=job_id, defaults={'total': total, 'prontos': prontos, 'status': status})
+    except DatabaseError:
+        # o progresso é informativo: não interrompe o download
+        logger.exception('Falha ao registrar o progresso da exportação %s.', job_id)
+
+
+class _Saida(io.RawIOBase):
+    """Destino não-seekable do ZipFile: acumula os bytes até `esvaziar`."""
+
+    def __init__(self):
+        self._pedacos = []
+        self._posicao = 0
+
+    def writable(self):
+        return True
+
+    def write(self, dados):
+        self._pedacos.append(bytes(dados))
+        self._posicao += len(dados)
+        return len(dados)
+
+    def tell(self):
+        return self._posicao
+
+    def esvaziar(self):
+        dados = b''.join(self._pedacos)
+        self._pedacos.clear()
+        return dados
+
+
+def _arquivos(qs, formato, executor, janela_max):
+    """(inscrição, caminho) na ordem do queryset; PDFs faltantes vão para o pool.
+
+    No máximo `janela_max` arquivos ficam pendentes, para não enfileirar o
+    evento inteiro de uma vez.
+    """
+    janela = deque()
+    for insc in qs.iterator(chunk_size=500):
+        dados, caminho, _ = localizar(insc, formato)
+        futuro = None
+        if formato == 'pdf' and executor is not None and not os.path.exists(caminho):
+            try:
+                futuro = executor.submit(gravar_pdf, dados, caminho)
+            except BrokenProcessPool:
+                # pool quebrado (worker morto): o restante é gerado neste processo
+                logger.exception('Pool de certificados indisponível; renderizando localmente.')
+                _descartar_executor(executor)
+                executor = None
+        janela.append((insc, futuro))
+        while len(janela) >= janela_max:
+            yield _resolver(*janela.popleft(), formato)
+    while janela:
+        yield _resolver(*janela.popleft(), formato)
+
+
+def _resolver(insc, futuro, formato):
+    if futuro is not None:
+        try:
+            return insc, futuro.result()
+        except Exception:
+            logger.exception('Worker falhou ao renderizar o certificado da inscrição %s; gerando localmente.', insc.id)
+    return insc, documento(insc, formato).caminho
+
+
+def iter_zip(qs, formato='pdf', job_id=None, workers=None, ao_progresso=None):
+    """Gera o ZIP em pedaços de bytes.
+
+    Sem `workers` usa o pool compartilhado do processo; com `workers` cria um
+    pool próprio desse tamanho (comando). `ao_progresso(prontos, total)` é
+    chamado a cada arquivo.
+    """
+    total = qs.count()
+    prontos = 0
+    _registrar_progresso(job_id, total, prontos, inicio=True)
+    executor = None
+    if formato == 'pdf' and total:
+        executor = novo_executor(workers) if workers else executor_compartilhado()
+    janela_max = (workers or max_workers()) * 4
+    saida = _Saida()
+    try:
+        with zipfile.ZipFile(saida, 'w', zipfile.ZIP_DEFLATED) as zf:
+            for insc, caminho in _arquivos(qs, formato, executor, janela_max):
+                emitido = timezone.localtime(insc.certificado_emitido_em or timezone.now())
+                info = zipfile.ZipInfo(nome_arquivo(insc, formato), date_time=emitido.timetuple()[:6])
+                # PDF já é comprimido (imagem JPEG): só armazena
+                info.compress_type = zipfile.ZIP_STORED if formato == 'pdf' else zipfile.ZIP_DEFLATED
+                try:
+                    with open(caminho, 'rb') as origem, zf.open(info, 'w') as destino:
+                        while True:
+                            pedaco = origem.read(TAMANHO_PEDACO)
+                            if not pedaco:
+                                break
+                            destino.write(pedaco)
+                            dados = saida.esvaziar()
+                            if dados:
+                                yield dados
+                except FileNotFoundError:
+                    # presença revogada durante a exportação
+                    continue
+                prontos += 1
+                if ao_progresso:
+                    ao_progresso(prontos, total)
+                if prontos % 20 == 0:
+                    _registrar_progresso(job_id, total, prontos)
+                dados = saida.esvaziar()
+                if dados:
+                    yield dados
+        _registrar_progresso(job_id, total, prontos, 'concluido')
+        yield saida.esvaziar()
+    except GeneratorExit:
+        # cliente desconectou
+        _registrar_progresso(job_id, total, prontos, 'cancelado')
+        raise
+    except Exception:
+        _registrar_progresso(job_id, total, prontos, 'erro')
+        raise
+    finally:
+        if workers and executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,9 @@
+from django.utils.functional import SimpleLazyObject
+
+from .roles import get_roles
+
+
+def roles(request):
+    """Expõe `roles` (core.roles.UserRoles) aos templates, resolvido sob demanda."""
+    user = getattr(request, 'user', None)
+    return {'roles': SimpleLazyObject(lambda: get_roles(user))}
@@ -0,0 +1,130 @@
+"""Feed de eventos da home com cache.
+
+As páginas do feed (eventos + vagas restantes) são compartilhadas entre todos
+os usuários e guardadas no cache sob uma chave versionada; salvar/remover
+`Evento` ou `Inscricao` incrementa a versão (ver `core.signals`), o que
+invalida todas as páginas de uma vez. A lista de inscrições de cada usuário
+tem chave própria, versionada pelas inscrições do usuário e pelos eventos.
+As versões só mudam depois do commit de quem grava: antes dele, uma leitura
+concorrente ainda vê as linhas antigas e as guardaria sob a versão nova.
+
+O que vai para o cache é sempre lido do banco principal, mesmo quando a home
+lê da réplica (`core.replica`): uma página montada com a réplica atrasada
+ficaria guardada sob a versão nova e seria servida até a quem acabou de
+gravar, quebrando o read-your-writes.
+
+Com o LocMem (padrão) ou o DummyCache não há cache: as versões ficariam em
+cada processo e a invalidação só valeria no worker que gravou.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from .models import Evento, Inscricao
+from .replica import primario
+
+PAGE_SIZE = 6  # igual ao PAGE_SIZE da API
+
+_FEED_VERSION = 'sgea:feed:versao'
+_EVENTOS_VERSION = 'sgea:feed:eventos:versao'
+
+
+def _timeout():
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if backend.endswith('LocMemCache') or backend.endswith('DummyCache'):
+        return 0
+    return int(getattr(settings, 'FEED_CACHE_TIMEOUT', 30) or 0)
+
+
+def _get_version(key):
+    versao = cache.get(key)
+    if versao is None:
+        versao = 1
+        cache.add(key, versao, None)
+    return versao
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 2, None)
+
+
+def _user_version_key(user_id):
+    return f'sgea:feed:usuario:{user_id}:versao'
+
+
+def _aplicar(eventos, participante_id):
+    _bump(_FEED_VERSION)
+    if eventos:
+        _bump(_EVENTOS_VERSION)
+    if participante_id:
+        _bump(_user_version_key(participante_id))
+
+
+def invalidar_feed(eventos=False, participante_id=None):
+    """Invalida as páginas do feed (sempre), a lista de eventos e/ou a de um usuário, após o commit."""
+    transaction.on_commit(lambda: _aplicar(eventos, participante_id))
+
+
+class FeedPage:
+    """Página do feed serializável no cache (mesma interface usada pelo template)."""
+
+    def __init__(self, items, number, num_pages):
+        self.items = items
+        self.number = number
+        self.num_pages = num_pages
+
+    def has_next(self):
+        return self.number < self.num_pages
+
+    def next_page_number(self):
+        return self.number + 1
+
+
+def _montar_pagina(page_num):
+    eventos_qs = Evento.objects.select_related('responsavel').order_by('data_inicio', 'id')
+    paginator = Paginator(eventos_qs, PAGE_SIZE)
+    try:
+        page_obj = paginator.page(page_num)
+    except PageNotAnInteger:
+        page_obj = paginator.page(1)
+    except EmptyPage:
+        page_obj = paginator.page(paginator.num_pages)
+    items = [(evento, evento.vagas_restantes) for evento in page_obj.object_list]
+    return FeedPage(items, page_obj.number, paginator.num_pages)
+
+
+def pagina_feed(page_num):
+    """Retorna `FeedPage` da página pedida, do cache quando possível."""
+    try:
+        page_num = max(1, int(page_num))
+    except (TypeError, ValueError):
+        page_num = 1
+    timeout = _timeout()
+    if not timeout:
+        return _montar_pagina(page_num)
+    key = f'sgea:feed:v{_get_version(_FEED_VERSION)}:p{page_num}'
+    page = cache.get(key)
+    if page is None:
+        with primario():
+            page = _montar_pagina(page_num)
+        cache.set(key, page, timeout)
+    return page
+
+
+def inscricoes_usuario(user):
+    """Inscrições do usuário (com evento) para a home, do cache quando possível."""
+    timeout = _timeout()
+    if not timeout:
+        return list(Inscricao.objects.filter(participante=user).select_related('evento'))
+    key = 'sgea:feed:usuario:{}:v{}:e{}'.format(
+        user.pk, _get_version(_user_version_key(user.pk)), _get_version(_EVENTOS_VERSION)
+    )
+    inscricoes = cache.get(key)
+    if inscricoes is None:
+        with primario():
+            inscricoes = list(Inscricao.objects.filter(participante=user).select_related('evento'))
+        cache.set(key, inscricoes, timeout)
+    return inscricoes
@@ -0,0 +1,248 @@
+"""Validação e variantes redimensionadas de imagens enviadas (banner e foto).
+
+Uploads são validados com Pillow (`validar_imagem`). Depois do commit, um
+pool de threads (`IMAGEM_WORKERS`) gera as variantes de `VARIANTES` em WebP e
+JPEG ao lado do original (`banners/x.jpg` -> `banners/x__card.webp`), sem
+metadados (EXIF/GPS), e regrava o original também sem metadados. Os nomes
+gerados ficam no campo JSON `<campo>_variantes` do modelo; `urls` monta as
+URLs para templates e serializers, usando o original enquanto as variantes
+não existem.
+"""
+import io
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+# nome: (largura, altura, recortar) -- recortar preenche a caixa exata (centro)
+VARIANTES = {
+    'thumb': (160, 160, True),
+    'card': (640, 360, True),
+    'full': (1600, 1600, False),
+}
+FORMATOS_SAIDA = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+FORMATOS_ACEITOS = {'PNG', 'JPEG', 'MPO', 'GIF', 'WEBP', 'BMP', 'TIFF'}
+
+_executor = {'pool': None, 'pid': None}
+_lock = threading.Lock()
+
+
+def _config(nome, padrao):
+    return getattr(settings, nome, padrao)
+
+
+def validar_imagem(arquivo):
+    """Confere com Pillow que `arquivo` é uma imagem aceita e dentro dos limites."""
+    from PIL import Image, UnidentifiedImageError
+
+    max_bytes = int(_config('IMAGEM_MAX_BYTES', 15 * 1024 * 1024))
+    tamanho = getattr(arquivo, 'size', None)
+    if tamanho is not None and tamanho > max_bytes:
+        raise ValidationError(f'A imagem deve ter no máximo {max_bytes // (1024 * 1024)} MB.')
+    max_pixels = int(_config('IMAGEM_MAX_PIXELS', 40_000_000))
+    posicao = arquivo.tell() if hasattr(arquivo, 'tell') else 0
+    try:
+        arquivo.seek(0)
+        with Image.open(arquivo) as img:
+            formato = img.format
+            largura, altura = img.size
+            if largura * altura > max_pixels:
+                raise ValidationError('A imagem tem resolução grande demais.')
+            img.verify()
+    except ValidationError:
+        raise
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError, ValueError):
+        raise ValidationError('O arquivo enviado não é uma imagem válida.')
+    finally:
+        arquivo.seek(posicao)
+    if formato not in FORMATOS_ACEITOS:
+        raise ValidationError('Formato de imagem não suportado (use PNG, JPG, GIF, WEBP, BMP ou TIFF).')
+
+
+def erro_imagem(arquivo):
+    """Mensagem de erro da validação (ou None), para as views que não usam forms."""
+    try:
+        validar_imagem(arquivo)
+    except ValidationError as e:
+        return e.messages[0]
+    return None
+
+
+def nome_variante(nome, variante, ext):
+    base, _ = os.path.splitext(nome)
+    return f'{base}__{variante}.{ext}'
+
+
+def arquivos(nome, variantes):
+    """Nomes no storage do original `nome` e das suas variantes (para remoção)."""
+    if not nome:
+        return []
+    return [nome] + [gerado for por_ext in (variantes or {}).values() for gerado in (por_ext or {}).values() if gerado]
+
+
+def _abrir(field_file):
+    from PIL import Image, ImageOps
+
+    field_file.open('rb')
+    try:
+        img = Image.open(io.BytesIO(field_file.read()))
+        img.load()
+    finally:
+        field_file.close()
+    formato = img.format
+    # aplica a orientação do EXIF antes de descartá-lo
+    img = ImageOps.exif_transpose(img)
+    return img, formato
+
+
+def _rgb(img):
+    from PIL import Image
+
+    if img.mode in ('RGBA', 'LA', 'P'):
+        img = img.convert('RGBA')
+        fundo = Image.new('RGB', img.size, 'white')
+        fundo.paste(img, mask=img.getchannel('A'))
+        return fundo
+    return img.convert('RGB') if img.mode != 'RGB' else img
+
+
+def _redimensionar(img, largura, altura, recortar):
+    from PIL import Image, ImageOps
+
+    if recortar:
+        return ImageOps.fit(img, (largura, altura), Image.LANCZOS)
+    copia = img.copy()
+    copia.thumbnail((largura, altura), Image.LANCZOS)
+    return copia
+
+
+def _bytes(img, formato, opcoes):
+    buf = io.BytesIO()
+    img.save(buf, formato, **opcoes)
+    return buf.getvalue()
+
+
+def _sem_metadados(img, formato):
+    """Original regravado sem EXIF/ICC/comentários (mesmo formato quando possível)."""
+    if formato in ('JPEG', 'MPO'):
+        return _bytes(_rgb(img), 'JPEG', {'quality': 95, 'optimize': True})
+    if formato == 'WEBP':
+        return _bytes(img, 'WEBP', {'quality': 95})
+    if formato == 'PNG':
+        return _bytes(img, 'PNG', {'optimize': True})
+    # GIF/BMP/TIFF: mantém como estão (sem EXIF relevante ou animados)
+    return None
+
+
+def _substituir(storage, nome, conteudo):
+    """Grava `conteudo` em `nome` substituindo o arquivo existente; devolve o nome final."""
+    try:
+        caminho = storage.path(nome)
+    except NotImplementedError:
+        # storage remoto: apaga e regrava (o nome pode mudar se houver colisão)
+        if storage.exists(nome):
+            storage.delete(nome)
+        return storage.save(nome, ContentFile(conteudo))
+    # storage local: temporário + rename, sem janela em que o arquivo não existe
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(caminho), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as fh:
+        fh.write(conteudo)
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, caminho)
+    return nome
+
+
+def gerar_variantes(field_file):
+    """Gera as variantes de `field_file` no mesmo storage.
+
+    Devolve `(nome do original, {variante: {ext: nome}})`.
+    """
+    storage, nome = field_file.storage, field_file.name
+    img, formato = _abrir(field_file)
+    limpo = _sem_metadados(img, formato)
+    if limpo is not None:
+        nome = _substituir(storage, nome, limpo)
+    base = _rgb(img)
+    gerados = {}
+    for variante, (largura, altura, recortar) in VARIANTES.items():
+        redimensionada = _redimensionar(base, largura, altura, recortar)
+        gerados[variante] = {}
+        for ext, (fmt, opcoes) in FORMATOS_SAIDA.items():
+            destino = nome_variante(nome, variante, ext)
+            gerados[variante][ext] = _substituir(storage, destino, _bytes(redimensionada, fmt, opcoes))
+    return nome, gerados
+
+
+def processar(modelo, pk, campo):
+    """Gera as variantes da imagem de `campo` e grava os nomes em `<campo>_variantes`.
+
+    Só atualiza a linha se a imagem não mudou no meio do caminho.
+    """
+    obj = modelo._default_manager.filter(pk=pk).first()
+    field_file = getattr(obj, campo, None) if obj else None
+    if not field_file:
+        return None
+    nome = field_file.name
+    novo_nome, gerados = gerar_variantes(field_file)
+    atualizado = modelo._default_manager.filter(pk=pk, **{campo: nome}).update(**{campo: novo_nome, f'{campo}_variantes': gerados})
+    if atualizado and modelo.__name__ == 'Evento':
+        # páginas do feed em cache e a API guardam as URLs do banner
+        from .feed import invalidar_feed
+        from .sincronizacao import marcar_alterados
+        from .versoes import incrementar
+        invalidar_feed(eventos=True)
+        incrementar([pk])
+        marcar_alterados([pk])
+    return gerados
+
+
+def _pool():
+    with _lock:
+        if _executor['pool'] is None or _executor['pid'] != os.getpid():
+            _executor['pool'] = ThreadPoolExecutor(max_workers=max(1, int(_config('IMAGEM_WORKERS', 1))), thread_name_prefix='sgea-imagens')
+            _executor['pid'] = os.getpid()
+        return _executor['pool']
+
+
+def _executar(modelo, pk, campo):
+    try:
+        close_old_connections()
+        processar(modelo, pk, campo)
+    except Exception:
+        logger.exception('Falha ao gerar variantes de %s.%s id=%s.', modelo.__name__, campo, pk)
+    finally:
+        connections.close_all()
+
+
+def agendar(instancia, campo):
+    """Gera as variantes fora da requisição, depois do commit (ou na hora com IMAGEM_ASYNC=0)."""
+    modelo, pk = type(instancia), instancia.pk
+    if not _config('IMAGEM_ASYNC', True):
+        transaction.on_commit(lambda: processar(modelo, pk, campo))
+        return
+    transaction.on_commit(lambda: _pool().submit(_executar, modelo, pk, campo))
+
+
+def urls(field_file, variantes):
+    """{variante: {'webp': url, 'jpg': url}}; sem variantes prontas, todas apontam para o original."""
+    if not field_file:
+        return {}
+    storage = field_file.storage
+    original = field_file.url
+    resultado = {}
+    for variante in VARIANTES:
+        gerados = (variantes or {}).get(variante) or {}
+        resultado[variante] = {ext: storage.url(gerados[ext]) if gerados.get(ext) else original for ext in FORMATOS_SAIDA}
+    return resultado
@@ -0,0 +1,150 @@
+"""Operações em lote sobre inscrições (confirmar, revogar, cancelar, criar).
+
+Cada função recebe inscrições já autorizadas, executa tudo em uma transação
+com `bulk_update`/`bulk_create` e devolve `(resultados, auditoria)`: o
+resultado por item e as entradas para `log_audit_many`.
+"""
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from . import certificados, sincronizacao, vagas_ao_vivo, versoes
+from .feed import invalidar_feed
+from .models import Inscricao
+from .vagas import liberar_vaga, reservar_vagas_disponiveis
+
+CAMPOS_CERTIFICADO = [
+    'presenca_confirmada', 'certificado_gerado', 'certificado_evento_nome', 'certificado_data_inicio',
+    'certificado_local', 'certificado_carga_horaria_minutos', 'certificado_emitido_em',
+]
+# tentativas de `criar` quando uma inscrição concorrente entra no meio do lote
+TENTATIVAS_CRIAR = 3
+
+
+def _detalhes(insc):
+    return f'Inscrição id={insc.id} evento_id={insc.evento_id} participante_id={insc.participante_id}'
+
+
+def _campos(insc):
+    return {'inscricao': insc.id, 'evento': insc.evento_id, 'alvo': insc.participante_id}
+
+
+def aplicar_snapshot_certificado(insc, agora=None):
+    """Marca presença e grava o snapshot do certificado (se ainda não gerado)."""
+    insc.presenca_confirmada = True
+    evt = insc.evento
+    if not insc.certificado_gerado and evt:
+        insc.certificado_evento_nome = evt.nome
+        insc.certificado_data_inicio = evt.data_inicio
+        insc.certificado_local = evt.local
+        insc.certificado_carga_horaria_minutos = evt.carga_horaria_minutos
+        insc.certificado_emitido_em = agora or timezone.now()
+        insc.certificado_gerado = True
+        return True
+    return False
+
+
+def _invalidar(inscricoes):
+    for participante_id in {i.participante_id for i in inscricoes}:
+        invalidar_feed(participante_id=participante_id)
+
+
+def confirmar(inscricoes, actor):
+    agora = timezone.now()
+    resultados, auditoria, gerados = [], [], []
+    for insc in inscricoes:
+        if aplicar_snapshot_certificado(insc, agora):
+            gerados.append(insc)
+        resultados.append({'id': insc.id, 'status': 'ok', 'presenca': True})
+        auditoria.append((actor, 'Confirmou presença (lote)', _detalhes(insc), _campos(insc)))
+    for insc in gerados:
+        auditoria.append((actor, 'Gerou certificado', _detalhes(insc), _campos(insc)))
+    with transaction.atomic():
+        Inscricao.objects.bulk_update(inscricoes, CAMPOS_CERTIFICADO, batch_size=500)
+        certificados.agendar([i.id for i in gerados])
+    _invalidar(inscricoes)
+    return resultados, auditoria
+
+
+def revogar(inscricoes, actor):
+    resultados, auditoria = [], []
+    for insc in inscricoes:
+        insc.presenca_confirmada = False
+        insc.certificado_gerado = False
+        insc.certificado_emitido_em = None
+        resultados.append({'id': insc.id, 'status': 'ok', 'presenca': False})
+        auditoria.append((actor, 'Revogou presença (lote)', _detalhes(insc), _campos(insc)))
+    with transaction.atomic():
+        Inscricao.objects.bulk_update(inscricoes, ['presenca_confirmada', 'certificado_gerado', 'certificado_emitido_em'], batch_size=500)
+    certificados.invalidar([i.id for i in inscricoes])
+    _invalidar(inscricoes)
+    return resultados, auditoria
+
+
+def cancelar(inscricoes, actor):
+    resultados, auditoria = [], []
+    por_evento = Counter(i.evento_id for i in inscricoes if i.evento_id)
+    with transaction.atomic():
+        Inscricao.objects.filter(id__in=[i.id for i in inscricoes]).delete()
+        for evento_id, total in por_evento.items():
+            liberar_vaga(evento_id, total)
+    for insc in inscricoes:
+        resultados.append({'id': insc.id, 'status': 'ok'})
+        auditoria.append((actor, 'Cancelou inscrição (lote)', _detalhes(insc), _campos(insc)))
+    return resultados, auditoria
+
+
+def criar(evento, participantes, actor):
+    """Cria inscrições de `participantes` em `evento` até acabarem as vagas.
+
+    Quem já está inscrito recebe erro no resultado. A conferência é feita na
+    transação do lote; se uma inscrição individual concorrente ainda assim
+    chegar antes do `bulk_create` (IntegrityError), o lote inteiro é desfeito,
+    inclusive a reserva de vagas, e refeito com a lista atualizada.
+    """
+    for tentativa in range(TENTATIVAS_CRIAR):
+        try:
+            return _criar(evento, participantes, actor)
+        except IntegrityError:
+            if tentativa == TENTATIVAS_CRIAR - 1:
+                raise
+
+
+def _criar(evento, participantes, actor):
+    resultados, auditoria = [], []
+    with transaction.atomic():
+        ja_inscritos = set(Inscricao.objects.filter(
+            evento=evento, participante_id__in=[u.id for u in participantes],
+        ).values_list('participante_id', flat=True))
+        pendentes = [u for u in participantes if u.id not in ja_inscritos]
+        concedidas = reservar_vagas_disponiveis(evento.id, len(pendentes))
+        novas = []
+        for user in pendentes[:concedidas]:
+            novas.append(Inscricao(
+                evento=evento,
+                participante=user,
+                participante_email=user.email,
+                participante_first_name=user.first_name,
+                participante_last_name=user.last_name,
+                certificado_evento_nome=evento.nome,
+                certificado_data_inicio=evento.data_inicio,
+                certificado_local=evento.local,
+                certificado_carga_horaria_minutos=evento.carga_horaria_minutos,
+            ))
+        Inscricao.objects.bulk_create(novas, batch_size=500)
+        # bulk_create não dispara signals: ETags e sincronização da API de eventos
+        if novas:
+            versoes.incrementar([evento.id])
+            sincronizacao.marcar_alterados([evento.id])
+            vagas_ao_vivo.publicar([evento.id])
+    for user in participantes:
+        if user.id in ja_inscritos:
+            resultados.append({'participante_id': user.id, 'status': 'error', 'error': 'Já existe inscrição para este usuário neste evento'})
+    # bulk_create no SQLite/PostgreSQL preenche o id dos objetos criados
+    for insc in novas:
+        resultados.append({'participante_id': insc.participante_id, 'status': 'ok', 'id': insc.id})
+        auditoria.append((actor, 'Criou inscrição (lote)', _detalhes(insc), _campos(insc)))
+    for user in pendentes[concedidas:]:
+        resultados.append({'participante_id': user.id, 'status': 'error', 'error': 'Vagas esgotadas para este evento.'})
+    _invalidar(novas)
+    return resultados, auditoria
@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.audit import flush_audit
+from core.audit_archive import arquivar, diretorio
+
+
+class Command(BaseCommand):
+    help = 'Move registros de auditoria antigos para arquivos mensais comprimidos (JSONL gzip).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=None, help='Mantém na tabela os últimos N dias (padrão AUDIT_RETENTION_DAYS).')
+        parser.add_argument('--dry-run', action='store_true', help='Apenas mostra quantos registros seriam arquivados por mês.')
+
+    def handle(self, *args, **options):
+        dias = options['dias'] if options['dias'] is not None else getattr(settings, 'AUDIT_RETENTION_DAYS', 90)
+        antes_de = timezone.now() - timedelta(days=dias)
+        flush_audit()
+        dry_run = options['dry_run']
+
+        def progresso(periodo, total):
+            verbo = 'seriam arquivados' if dry_run else 'arquivados'
+            self.stdout.write(f'{periodo}: {total} registro(s) {verbo}')
+
+        resultado = arquivar(antes_de, dry_run=dry_run, progresso=progresso)
+        total = sum(resultado.values())
+        if dry_run:
+            self.stdout.write(f'{total} registro(s) anteriores a {antes_de:%Y-%m-%d %H:%M} (dry-run, nada alterado).')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{total} registro(s) arquivado(s) em {diretorio()}.'))
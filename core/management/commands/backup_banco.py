@@ -0,0 +1,35 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.sqlite import backup, rotacionar, verificar
+
+PREFIXO = 'db-'
+
+
+class Command(BaseCommand):
+    help = 'Backup online do banco SQLite (API de backup, num passo só), sem parar a aplicação.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('destino', nargs='?', help=f'Arquivo de destino (padrão: SQLITE_BACKUP_DIR/{PREFIXO}<data>.sqlite3).')
+        parser.add_argument('--manter', type=int, default=None, help='Backups mantidos na pasta padrão (padrão SQLITE_BACKUP_MANTER).')
+        parser.add_argument('--verificar', action='store_true', help='Roda integrity_check na cópia.')
+
+    def handle(self, *args, **options):
+        pasta = getattr(settings, 'SQLITE_BACKUP_DIR', os.path.join(settings.BASE_DIR, 'backups'))
+        destino = options['destino'] or os.path.join(pasta, f'{PREFIXO}{timezone.localtime():%Y%m%d-%H%M%S}.sqlite3')
+        try:
+            paginas = backup(destino)
+        except (ValueError, OSError) as e:
+            raise CommandError(str(e))
+        if options['verificar']:
+            problemas = verificar(caminho=destino)
+            if problemas:
+                raise CommandError(f'Backup {destino} com problemas: ' + '; '.join(problemas[:10]))
+        if not options['destino']:
+            manter = options['manter'] if options['manter'] is not None else getattr(settings, 'SQLITE_BACKUP_MANTER', 7)
+            for antigo in rotacionar(pasta, PREFIXO, max(1, manter)):
+                self.stdout.write(f'  removido {antigo}')
+        self.stdout.write(self.style.SUCCESS(f'Backup gravado em {destino} ({paginas} páginas).'))
@@ -0,0 +1,35 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmark import CENARIOS, rodar
+
+
+class Command(BaseCommand):
+    help = 'Executa os cenários de carga (inscrições, feed, confirmação, certificados) e grava o relatório em JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cenarios', default=','.join(CENARIOS), help='Lista separada por vírgulas.')
+        parser.add_argument('--requisicoes', type=int, default=400, help='Requisições por cenário.')
+        parser.add_argument('--processos', type=int, default=4)
+        parser.add_argument('--threads', type=int, default=4, help='Threads por processo.')
+        parser.add_argument('--semente', type=int, default=42)
+        parser.add_argument('--saida', help='Arquivo JSON do relatório (padrão: só imprime).')
+        parser.add_argument('--throttle', action='store_true', help='Mantém os limites de throttle configurados.')
+
+    def handle(self, *args, **options):
+        cenarios = [c.strip() for c in options['cenarios'].split(',') if c.strip()]
+        desconhecidos = set(cenarios) - set(CENARIOS)
+        if desconhecidos:
+            raise CommandError(f'Cenário(s) desconhecido(s): {", ".join(sorted(desconhecidos))}')
+        resultado = rodar(
+            cenarios, requisicoes=options['requisicoes'], processos=options['processos'],
+            threads=options['threads'], semente=options['semente'], throttle=options['throttle'], log=self.stdout.write,
+        )
+        texto = json.dumps(resultado, ensure_ascii=False, indent=2)
+        if options['saida']:
+            with open(options['saida'], 'w', encoding='utf-8') as f:
+                f.write(texto + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Relatório gravado em {options["saida"]}.'))
+        else:
+            self.stdout.write(texto)
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.outbox import limpar_enviadas, processar
+
+
+class Command(BaseCommand):
+    help = 'Envia os e-mails pendentes da fila (EmailOutbox) reaproveitando a conexão SMTP.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Continua rodando, verificando a fila a cada --interval segundos.')
+        parser.add_argument('--interval', type=float, default=5.0, help='Intervalo entre verificações no modo --loop (padrão 5s).')
+        parser.add_argument('--batch-size', type=int, default=None, help='Mensagens por lote/conexão (padrão EMAIL_OUTBOX_BATCH_SIZE).')
+        parser.add_argument('--job', default=None, help='Envia apenas as mensagens de um job_id.')
+        parser.add_argument('--purge-days', type=int, default=None, help='Remove mensagens enviadas há mais de N dias.')
+
+    def handle(self, *args, **options):
+        if options['purge_days'] is not None:
+            removidas = limpar_enviadas(options['purge_days'])
+            self.stdout.write(f'{removidas} mensagem(ns) antiga(s) removida(s).')
+        while True:
+            enviadas, falhas = processar(batch_size=options['batch_size'], job_id=options['job'])
+            if enviadas or falhas or not options['loop']:
+                self.stdout.write(f'{enviadas} enviada(s), {falhas} falha(s).')
+            if not options['loop']:
+                break
+            try:
+                time.sleep(options['interval'])
+            except KeyboardInterrupt:
+                break
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.certificados_zip import inscricoes, intervalo, iter_zip, max_workers
+
+
+class Command(BaseCommand):
+    help = 'Gera um ZIP com os certificados emitidos de um evento ou de um período (data do evento).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('saida', help='Arquivo .zip de destino.')
+        parser.add_argument('--evento', type=int, default=None)
+        parser.add_argument('--de', dest='date_from', default=None, help='Data inicial (AAAA-MM-DD).')
+        parser.add_argument('--ate', dest='date_to', default=None, help='Data final, inclusiva (AAAA-MM-DD).')
+        parser.add_argument('--formato', choices=['pdf', 'html'], default='pdf')
+        parser.add_argument('--workers', type=int, default=None, help='Processos de renderização (padrão CERTIFICADO_ZIP_WORKERS).')
+
+    def handle(self, *args, **options):
+        inicio, fim = intervalo(options['date_from'], options['date_to'])
+        if options['evento'] is None and inicio is None and fim is None:
+            raise CommandError('Informe --evento ou --de/--ate.')
+        qs = inscricoes(options['evento'], inicio, fim)
+        workers = max(1, options['workers'] or max_workers())
+        ultimo = [0.0]
+
+        def progresso(prontos, total):
+            agora = time.monotonic()
+            if prontos == total or agora - ultimo[0] >= 1:
+                ultimo[0] = agora
+                self.stdout.write(f'{prontos}/{total} certificado(s)')
+
+        tamanho = 0
+        with open(options['saida'], 'wb') as fh:
+            for pedaco in iter_zip(qs, options['formato'], workers=workers, ao_progresso=progresso):
+                fh.write(pedaco)
+                tamanho += len(pedaco)
+        self.stdout.write(self.style.SUCCESS(f'{options["saida"]} ({tamanho} bytes) gerado com {workers} worker(s).'))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.carga import gerar
+
+
+class Command(BaseCommand):
+    help = 'Gera um dataset sintético (semente fixa) para testes de carga. Use um banco separado com DB_NAME.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=20000)
+        parser.add_argument('--eventos', type=int, default=2000)
+        parser.add_argument('--inscricoes', type=int, default=1_000_000)
+        parser.add_argument('--auditoria', type=int, default=1_000_000, help='Registros de auditoria.')
+        parser.add_argument('--semente', type=int, default=42)
+        parser.add_argument('--lote', type=int, default=5000, help='Linhas por bulk_create.')
+
+    def handle(self, *args, **options):
+        try:
+            criados = gerar(
+                usuarios=options['usuarios'], eventos=options['eventos'], inscricoes=options['inscricoes'],
+                auditoria=options['auditoria'], semente=options['semente'], lote=options['lote'], log=self.stdout.write,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS('Dataset gerado: ' + ', '.join(f'{k}={v}' for k, v in criados.items())))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from core.imagens import processar
+from core.models import Evento, UserProfile
+
+
+class Command(BaseCommand):
+    help = 'Gera as variantes redimensionadas (WebP/JPEG) de banners e fotos de perfil já enviados.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--todos', action='store_true', help='Regera também as imagens que já têm variantes.')
+
+    def handle(self, *args, **options):
+        for modelo, campo in ((Evento, 'banner'), (UserProfile, 'photo')):
+            qs = modelo.objects.exclude(**{campo: ''}).exclude(**{f'{campo}__isnull': True})
+            if not options['todos']:
+                qs = qs.filter(**{f'{campo}_variantes': {}})
+            ok = falhas = 0
+            for pk in qs.values_list('pk', flat=True).iterator():
+                try:
+                    processar(modelo, pk, campo)
+                    ok += 1
+                except Exception as e:
+                    falhas += 1
+                    self.stderr.write(f'{modelo.__name__} id={pk}: {e}')
+            self.stdout.write(f'{modelo.__name__}.{campo}: {ok} processada(s), {falhas} falha(s)')
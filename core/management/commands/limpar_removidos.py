@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.sincronizacao import horizonte, limpar_removidos
+
+
+class Command(BaseCommand):
+    help = 'Apaga os registros de eventos removidos (sincronização da API) mais antigos que a retenção.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=None, help='Retenção em dias (padrão: SYNC_RETENCAO_DIAS).')
+
+    def handle(self, *args, **options):
+        apagados = limpar_removidos(options['dias'])
+        self.stdout.write(self.style.SUCCESS(f'{apagados} registro(s) apagado(s); cursores anteriores a {horizonte()} expiram.'))
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from core.throttling import limpar
+
+
+class Command(BaseCommand):
+    help = 'Apaga os baldes de throttle da API que já se reabasteceram por completo.'
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS(f'{limpar()} balde(s) apagado(s).'))
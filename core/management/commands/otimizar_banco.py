@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from core.sqlite import otimizar
+
+
+class Command(BaseCommand):
+    help = 'Atualiza as estatísticas do planejador do SQLite (PRAGMA optimize/ANALYZE) e faz o checkpoint do WAL.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--analyze', action='store_true', help='ANALYZE completo antes do optimize (mais lento).')
+        parser.add_argument('--sem-checkpoint', action='store_true', help='Não trunca o arquivo -wal.')
+
+    def handle(self, *args, **options):
+        for sql, segundos in otimizar(analyze=options['analyze'], checkpoint=not options['sem_checkpoint']):
+            self.stdout.write(f'{sql}: {segundos:.2f}s')
+        self.stdout.write(self.style.SUCCESS('Banco otimizado.'))
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.audit_schema import extrair_campos
+from core.models import Auditoria
+
+CAMPOS = ['codigo', 'evento_id', 'inscricao_id', 'alvo_usuario_id', 'dados']
+
+
+class Command(BaseCommand):
+    help = 'Preenche as colunas estruturadas da auditoria (código, evento, inscrição, alvo, dados) a partir do texto de registros antigos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Registros por lote (padrão 1000).')
+        parser.add_argument('--todos', action='store_true', help='Reprocessa também registros que já têm código.')
+        parser.add_argument('--dry-run', action='store_true', help='Apenas conta quantos registros seriam preenchidos.')
+
+    def handle(self, *args, **options):
+        qs = Auditoria.objects.all()
+        if not options['todos']:
+            qs = qs.filter(codigo='', evento_id__isnull=True, inscricao_id__isnull=True)
+        if options['dry_run']:
+            self.stdout.write(f'{qs.count()} registro(s) a preencher (dry-run, nada alterado).')
+            return
+        batch_size = max(1, options['batch_size'])
+        ultimo_id = 0
+        total = alterados = 0
+        while True:
+            # paginação por id: cada lote é uma consulta pelo índice da PK
+            lote = list(qs.filter(id__gt=ultimo_id).order_by('id').only('id', 'acao', 'detalhes', *CAMPOS)[:batch_size])
+            if not lote:
+                break
+            ultimo_id = lote[-1].id
+            mudaram = []
+            for a in lote:
+                campos = extrair_campos(a.acao, a.detalhes)
+                if any(getattr(a, c) != campos[c] and campos[c] not in (None, '') for c in CAMPOS):
+                    for c in CAMPOS:
+                        if campos[c] not in (None, ''):
+                            setattr(a, c, campos[c])
+                    mudaram.append(a)
+            if mudaram:
+                with transaction.atomic():
+                    Auditoria.objects.bulk_update(mudaram, CAMPOS)
+            total += len(lote)
+            alterados += len(mudaram)
+            self.stdout.write(f'... {total} lido(s), {alterados} preenchido(s) (até id={ultimo_id})')
+        self.stdout.write(self.style.SUCCESS(f'{alterados} de {total} registro(s) preenchido(s).'))
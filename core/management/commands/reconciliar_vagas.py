@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.feed import invalidar_feed
+from core.models import Evento
+from core.vagas import divergencias, recalcular_vagas
+
+
+class Command(BaseCommand):
+    help = 'Recalcula Evento.vagas_ocupadas a partir das inscrições existentes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--evento', type=int, action='append', dest='eventos', help='Restringe a um evento (pode repetir).')
+        parser.add_argument('--dry-run', action='store_true', help='Apenas lista as divergências, sem corrigir.')
+
+    def handle(self, *args, **options):
+        qs = Evento.objects.all()
+        if options['eventos']:
+            qs = qs.filter(id__in=options['eventos'])
+        diffs = divergencias(qs)
+        for evento_id, contador, real in diffs:
+            self.stdout.write(f'Evento id={evento_id}: contador={contador} inscrições={real}')
+        if options['dry_run']:
+            self.stdout.write(f'{len(diffs)} evento(s) divergente(s) (dry-run, nada alterado).')
+            return
+        if diffs:
+            with transaction.atomic():
+                recalcular_vagas(qs.filter(id__in=[d[0] for d in diffs]))
+            invalidar_feed()
+        self.stdout.write(self.style.SUCCESS(f'{len(diffs)} evento(s) corrigido(s).'))
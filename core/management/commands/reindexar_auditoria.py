@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.audit_search import criar_indice, otimizar
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói o índice FTS5 da auditoria (cria tabela e triggers se faltarem).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Alias do banco (padrão default).')
+        parser.add_argument('--optimize', action='store_true', help='Também compacta o índice (FTS5 optimize).')
+
+    def handle(self, *args, **options):
+        using = options['database']
+        if not criar_indice(using):
+            raise CommandError('FTS5 indisponível neste banco; a busca da auditoria usa LIKE.')
+        if options['optimize']:
+            otimizar(using)
+        self.stdout.write(self.style.SUCCESS('Índice de busca da auditoria reconstruído.'))
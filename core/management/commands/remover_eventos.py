@@ -0,0 +1,43 @@
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.audit import flush_audit, log_audit_many
+from core.models import Evento, Inscricao
+from core.remocao import remover
+
+
+class Command(BaseCommand):
+    help = 'Remove eventos em lote, preservando o snapshot nas inscrições (como a remoção pela área administrativa).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--evento', type=int, action='append', dest='eventos', help='Evento a remover (pode repetir).')
+        parser.add_argument('--antes', help='Remove os eventos encerrados antes desta data (AAAA-MM-DD).')
+        parser.add_argument('--lote', type=int, default=500, help='Eventos por transação.')
+        parser.add_argument('--dry-run', action='store_true', help='Apenas mostra quantos eventos e inscrições seriam afetados.')
+
+    def handle(self, *args, **options):
+        if not options['eventos'] and not options['antes']:
+            raise CommandError('Informe --evento e/ou --antes.')
+        qs = Evento.objects.all()
+        if options['eventos']:
+            qs = qs.filter(id__in=options['eventos'])
+        if options['antes']:
+            try:
+                data = datetime.strptime(options['antes'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('Data inválida em --antes (use AAAA-MM-DD).')
+            qs = qs.filter(data_fim__lt=timezone.make_aware(datetime.combine(data, time.min)))
+        if options['dry_run']:
+            inscricoes = Inscricao.objects.filter(evento__in=qs).count()
+            self.stdout.write(f'{qs.count()} evento(s) e {inscricoes} inscrição(ões) afetados (dry-run, nada alterado).')
+            return
+        nomes = dict(qs.values_list('id', 'nome'))
+        eventos, inscricoes = remover(qs, lote=max(1, options['lote']), log=self.stdout.write)
+        log_audit_many([
+            (None, 'Removeu evento', f'Evento id={evento_id} nome="{nome}" (remover_eventos)', {'evento': evento_id})
+            for evento_id, nome in nomes.items()
+        ])
+        flush_audit()
+        self.stdout.write(self.style.SUCCESS(f'{eventos} evento(s) removido(s); {inscricoes} inscrição(ões) preservada(s) com snapshot.'))
@@ -0,0 +1,75 @@
+from datetime import datetime, time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.utils import timezone
+
+from core.audit import flush_audit, log_audit_many
+from core.remocao import contar_usuarios, remover_usuarios
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Remove usuários em lote (tokens, verificações, inscrições, eventos criados, fotos e certificados). '
+            'Superusuários nunca são removidos.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--arquivo', help='Arquivo com um e-mail, username ou id por linha (# comenta).')
+        parser.add_argument('--email', action='append', dest='emails', help='E-mail do usuário (pode repetir).')
+        parser.add_argument('--grupo', help='Restringe aos membros do grupo (ex.: Aluno).')
+        parser.add_argument('--sem-acesso-desde', help='Restringe a quem não entra desde a data (AAAA-MM-DD).')
+        parser.add_argument('--lote', type=int, default=200, help='Usuários por transação.')
+        parser.add_argument('--workers', type=int, default=4, help='Threads para apagar os arquivos.')
+        parser.add_argument('--dry-run', action='store_true', help='Apenas mostra o que seria removido.')
+
+    def _identificadores(self, caminho):
+        try:
+            with open(caminho, encoding='utf-8') as f:
+                linhas = [linha.split('#', 1)[0].strip() for linha in f]
+        except OSError as e:
+            raise CommandError(f'Não foi possível ler {caminho}: {e}')
+        return [linha for linha in linhas if linha]
+
+    def _usuarios(self, options):
+        filtros = []
+        if options['arquivo'] or options['emails']:
+            valores = self._identificadores(options['arquivo']) if options['arquivo'] else []
+            valores += options['emails'] or []
+            emails = [v for v in valores if '@' in v]
+            ids = [int(v) for v in valores if v.isdigit()]
+            usernames = [v for v in valores if '@' not in v and not v.isdigit()]
+            por_email = Q()
+            for email in emails:
+                por_email |= Q(email__iexact=email)
+            filtros.append(por_email | Q(id__in=ids) | Q(username__in=usernames) if valores else Q(pk__in=[]))
+        if options['grupo']:
+            filtros.append(Q(groups__name=options['grupo']))
+        if options['sem_acesso_desde']:
+            try:
+                data = datetime.strptime(options['sem_acesso_desde'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('Data inválida em --sem-acesso-desde (use AAAA-MM-DD).')
+            limite = timezone.make_aware(datetime.combine(data, time.min))
+            filtros.append(Q(last_login__lt=limite) | Q(last_login__isnull=True, date_joined__lt=limite))
+        if not filtros:
+            raise CommandError('Informe --arquivo, --email, --grupo e/ou --sem-acesso-desde.')
+        qs = User.objects.filter(is_superuser=False)
+        for filtro in filtros:
+            qs = qs.filter(filtro)
+        return User.objects.filter(pk__in=qs.values('pk'))
+
+    def handle(self, *args, **options):
+        usuarios = self._usuarios(options)
+        if options['dry_run']:
+            for nome, total in contar_usuarios(usuarios).items():
+                self.stdout.write(f'{nome}: {total}')
+            self.stdout.write('Dry-run, nada alterado.')
+            return
+        ids = list(usuarios.values_list('pk', flat=True))
+        contagens = remover_usuarios(usuarios, lote=max(1, options['lote']), workers=options['workers'], log=self.stdout.write)
+        # sem dados pessoais no registro: só o id
+        log_audit_many([(None, 'Removeu usuário', f'Usuário id={pk} (remover_usuarios)', {'alvo': pk}) for pk in ids])
+        flush_audit()
+        self.stdout.write(self.style.SUCCESS('Removido(s): ' + ', '.join(f'{k}={v}' for k, v in sorted(contagens.items()))))
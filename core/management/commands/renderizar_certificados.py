@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from core.certificados import diretorio, preparar
+from core.models import Inscricao
+
+
+class Command(BaseCommand):
+    help = 'Pré-renderiza (HTML e PDF) os certificados já emitidos que ainda não estão em disco.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--evento', type=int, default=None, help='Apenas inscrições deste evento.')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        qs = Inscricao.objects.filter(certificado_gerado=True).order_by('id')
+        if options['evento'] is not None:
+            qs = qs.filter(evento_id=options['evento'])
+        ids = list(qs.values_list('id', flat=True))
+        lote = max(1, options['batch_size'])
+        total = 0
+        for i in range(0, len(ids), lote):
+            total += preparar(ids[i:i + lote])
+            self.stdout.write(f'{total}/{len(ids)} certificado(s)')
+        self.stdout.write(self.style.SUCCESS(f'{total} certificado(s) prontos em {diretorio()}.'))
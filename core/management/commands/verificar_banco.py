@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.sqlite import verificar
+
+
+class Command(BaseCommand):
+    help = 'Verifica a integridade do banco SQLite (integrity_check e foreign_key_check); sai com erro se houver problemas.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rapido', action='store_true', help='quick_check em vez de integrity_check (não confere os índices).')
+        parser.add_argument('--arquivo', help='Verifica outro arquivo (ex.: um backup) em vez do banco configurado.')
+
+    def handle(self, *args, **options):
+        try:
+            problemas = verificar(rapido=options['rapido'], caminho=options['arquivo'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        for problema in problemas[:100]:
+            self.stdout.write(problema)
+        if problemas:
+            raise CommandError(f'{len(problemas)} problema(s) encontrado(s).')
+        self.stdout.write(self.style.SUCCESS('Banco íntegro.'))
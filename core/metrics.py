@@ -0,0 +1,143 @@
+"""Métricas por requisição: nº de queries, tempo de SQL, chamadas de auditoria.
+
+`RequestStats` acumula os números da requisição corrente (via contextvar) e
+`registry` agrega amostras por nome de rota para cálculo de percentis. Usado
+por `core.middleware.RequestMetricsMiddleware`; também conta as decisões do
+throttle da API por escopo (`core.throttling`).
+"""
+import contextvars
+import threading
+import time
+from collections import defaultdict, deque
+
+from django.conf import settings
+
+_current = contextvars.ContextVar('sgea_request_stats', default=None)
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.audit_calls = 0
+        self.started = time.perf_counter()
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - start
+            self.queries += 1
+
+    @property
+    def wall_time(self):
+        return time.perf_counter() - self.started
+
+
+def start_request():
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def current_stats():
+    return _current.get()
+
+
+def record_audit_call():
+    stats = _current.get()
+    if stats is not None:
+        stats.audit_calls += 1
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+class MetricsRegistry:
+    """Amostras recentes por rota (janela limitada, thread-safe)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = defaultdict(self._new_window)
+        self._totals = defaultdict(int)
+        self._over_budget = defaultdict(int)
+        self._throttle = defaultdict(lambda: defaultdict(int))
+
+    @staticmethod
+    def _new_window():
+        return deque(maxlen=int(getattr(settings, 'REQUEST_METRICS_SAMPLES', 1000)))
+
+    def record(self, name, stats, over_budget=False):
+        sample = (stats.wall_time * 1000.0, stats.queries, stats.sql_time * 1000.0, stats.audit_calls)
+        with self._lock:
+            self._samples[name].append(sample)
+            self._totals[name] += 1
+            if over_budget:
+                self._over_budget[name] += 1
+
+    def record_throttle(self, scope, resultado):
+        # resultado: 'permitida', 'bloqueada' ou 'erro'
+        with self._lock:
+            self._throttle[scope][resultado] += 1
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
+            self._over_budget.clear()
+            self._throttle.clear()
+
+    def throttle_snapshot(self):
+        with self._lock:
+            return {scope: dict(contagem) for scope, contagem in sorted(self._throttle.items())}
+
+    def snapshot(self):
+        with self._lock:
+            data = {name: list(samples) for name, samples in self._samples.items()}
+            totals = dict(self._totals)
+            over = dict(self._over_budget)
+        out = {}
+        for name, samples in sorted(data.items()):
+            wall = sorted(s[0] for s in samples)
+            queries = sorted(s[1] for s in samples)
+            sql = sorted(s[2] for s in samples)
+            out[name] = {
+                'requests': totals.get(name, 0),
+                'samples': len(samples),
+                'over_budget': over.get(name, 0),
+                'query_budget': query_budget(name),
+                'wall_ms': {p: _round(_percentile(wall, v)) for p, v in (('p50', 50), ('p95', 95), ('p99', 99))},
+                'sql_ms': {p: _round(_percentile(sql, v)) for p, v in (('p50', 50), ('p95', 95), ('p99', 99))},
+                'queries': {
+                    'p50': _percentile(queries, 50),
+                    'p95': _percentile(queries, 95),
+                    'max': queries[-1] if queries else None,
+                },
+                'audit_calls_avg': _round(sum(s[3] for s in samples) / len(samples)) if samples else None,
+            }
+        return out
+
+
+def _round(value):
+    return round(value, 2) if value is not None else None
+
+
+def query_budget(name):
+    """Orçamento de queries para a rota (QUERY_BUDGETS[name] ou QUERY_BUDGET_DEFAULT)."""
+    budgets = getattr(settings, 'QUERY_BUDGETS', {}) or {}
+    if name in budgets:
+        return budgets[name]
+    return getattr(settings, 'QUERY_BUDGET_DEFAULT', None)
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,53 @@
+import logging
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import metrics
+
+logger = logging.getLogger('core.metrics')
+
+
+class RequestMetricsMiddleware:
+    """Mede queries, tempo de SQL, chamadas de log_audit e tempo total por requisição.
+
+    Publica os valores no cabeçalho `Server-Timing`, agrega percentis por rota
+    em `core.metrics.registry` e registra aviso quando a rota passa do
+    orçamento de queries configurado (QUERY_BUDGETS / QUERY_BUDGET_DEFAULT).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', True):
+            return self.get_response(request)
+        stats, token = metrics.start_request()
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(stats.execute_wrapper))
+                response = self.get_response(request)
+        finally:
+            metrics.end_request(token)
+
+        name = self._route_name(request)
+        budget = metrics.query_budget(name)
+        over_budget = budget is not None and stats.queries > budget
+        if over_budget:
+            logger.warning('Rota %s excedeu o orçamento de queries: %d > %d (%s %s)', name, stats.queries, budget, request.method, request.path)
+        metrics.registry.record(name, stats, over_budget=over_budget)
+        response['Server-Timing'] = ', '.join([
+            f'db;desc="{stats.queries} queries";dur={stats.sql_time * 1000.0:.2f}',
+            f'audit;desc="{stats.audit_calls} log_audit"',
+            f'total;dur={stats.wall_time * 1000.0:.2f}',
+        ])
+        return response
+
+    @staticmethod
+    def _route_name(request):
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return 'unresolved'
+        return match.view_name or match.route or 'unresolved'
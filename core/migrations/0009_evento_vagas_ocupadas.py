@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+
+def preencher_vagas_ocupadas(apps, schema_editor):
+    Evento = apps.get_model('core', 'Evento')
+    Inscricao = apps.get_model('core', 'Inscricao')
+    contagens = Inscricao.objects.filter(evento__isnull=False).values('evento_id').annotate(total=models.Count('id'))
+    for row in contagens:
+        Evento.objects.filter(pk=row['evento_id']).update(vagas_ocupadas=row['total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_auditoria_data_hora_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evento',
+            name='vagas_ocupadas',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(preencher_vagas_ocupadas, migrations.RunPython.noop),
+    ]
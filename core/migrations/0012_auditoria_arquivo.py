@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_emailoutbox'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditoriaArquivo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('periodo', models.CharField(db_index=True, max_length=7)),
+                ('arquivo', models.CharField(max_length=255, unique=True)),
+                ('data_inicio', models.DateTimeField()),
+                ('data_fim', models.DateTimeField()),
+                ('primeiro_id', models.BigIntegerField()),
+                ('ultimo_id', models.BigIntegerField()),
+                ('registros', models.PositiveIntegerField(default=0)),
+                ('tamanho', models.PositiveBigIntegerField(default=0)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-data_fim'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='auditoria',
+            index=models.Index(fields=['data_hora'], name='core_audito_data_ho_f91602_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditoriaarquivo',
+            index=models.Index(fields=['data_inicio', 'data_fim'], name='core_audito_data_in_b4931a_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+from django.db import DatabaseError, migrations
+
+# índice FTS5 da auditoria (ver core.audit_search); só no SQLite com FTS5
+CRIAR = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS core_auditoria_fts USING fts5("
+    "acao, detalhes, content='core_auditoria', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS core_auditoria_fts_ai AFTER INSERT ON core_auditoria BEGIN "
+    "INSERT INTO core_auditoria_fts(rowid, acao, detalhes) VALUES (new.id, new.acao, new.detalhes); END",
+    "CREATE TRIGGER IF NOT EXISTS core_auditoria_fts_ad AFTER DELETE ON core_auditoria BEGIN "
+    "INSERT INTO core_auditoria_fts(core_auditoria_fts, rowid, acao, detalhes) VALUES ('delete', old.id, old.acao, old.detalhes); END",
+    "CREATE TRIGGER IF NOT EXISTS core_auditoria_fts_au AFTER UPDATE OF acao, detalhes ON core_auditoria BEGIN "
+    "INSERT INTO core_auditoria_fts(core_auditoria_fts, rowid, acao, detalhes) VALUES ('delete', old.id, old.acao, old.detalhes); "
+    "INSERT INTO core_auditoria_fts(rowid, acao, detalhes) VALUES (new.id, new.acao, new.detalhes); END",
+    "INSERT INTO core_auditoria_fts(core_auditoria_fts) VALUES ('rebuild')",
+]
+REMOVER = [
+    "DROP TRIGGER IF EXISTS core_auditoria_fts_ai",
+    "DROP TRIGGER IF EXISTS core_auditoria_fts_ad",
+    "DROP TRIGGER IF EXISTS core_auditoria_fts_au",
+    "DROP TABLE IF EXISTS core_auditoria_fts",
+]
+
+
+def criar_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        try:
+            cursor.execute("CREATE VIRTUAL TABLE temp.sgea_fts5_teste USING fts5(x)")
+            cursor.execute("DROP TABLE temp.sgea_fts5_teste")
+        except DatabaseError:
+            # SQLite sem FTS5: a busca usa LIKE (core.audit_search)
+            return
+        for sql in CRIAR:
+            cursor.execute(sql)
+
+
+def remover_fts(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for sql in REMOVER:
+            cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_auditoria_campos_estruturados'),
+    ]
+
+    operations = [
+        migrations.RunPython(criar_fts, remover_fts),
+    ]
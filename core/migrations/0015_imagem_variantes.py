@@ -0,0 +1,27 @@
+import core.imagens
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_auditoria_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evento',
+            name='banner_variantes',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='photo_variantes',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='userprofile',
+            name='photo',
+            field=models.ImageField(blank=True, null=True, upload_to='profiles/', validators=[core.imagens.validar_imagem]),
+        ),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_imagem_variantes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersaoRecurso',
+            fields=[
+                ('chave', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('versao', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,43 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def numerar_eventos(apps, schema_editor):
+    # eventos existentes entram na sequência na ordem de criação
+    Evento = apps.get_model('core', 'Evento')
+    VersaoRecurso = apps.get_model('core', 'VersaoRecurso')
+    total = 0
+    for total, evento_id in enumerate(Evento.objects.order_by('id').values_list('id', flat=True).iterator(), start=1):
+        Evento.objects.filter(pk=evento_id).update(alteracao=total)
+    VersaoRecurso.objects.update_or_create(chave='eventos:sequencia', defaults={'versao': total})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_versao_recurso'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evento',
+            name='atualizado_em',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='evento',
+            name='alteracao',
+            field=models.PositiveBigIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='EventoRemovido',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('evento_id', models.PositiveIntegerField(unique=True)),
+                ('alteracao', models.PositiveBigIntegerField(db_index=True)),
+                ('removido_em', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(numerar_eventos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_evento_sincronizacao'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ThrottleBalde',
+            fields=[
+                ('chave', models.CharField(max_length=200, primary_key=True, serialize=False)),
+                ('tokens', models.FloatField()),
+                ('atualizado_em', models.FloatField()),
+                ('cheio_em', models.FloatField(db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_throttle_balde'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auditoriaarquivo',
+            name='decrescente',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_auditoriaarquivo_decrescente'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportacaoCertificados',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_id', models.CharField(max_length=64, unique=True)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('prontos', models.PositiveIntegerField(default=0)),
+                ('status', models.CharField(default='gerando', max_length=12)),
+                ('atualizado_em', models.DateTimeField(auto_now=True, db_index=True)),
+            ],
+        ),
+    ]
@@ -1,8 +1,9 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 import os
+from .imagens import urls as urls_imagem, validar_imagem
 
 User = get_user_model()
 
@@ -12,6 +13,8 @@ def validar_banner(imagem):
 	allowed = ('.png', '.jpg', '.jpeg', '.gif', '.webp', '.bmp', '.tiff', '.tif')
 	if not any(name.lower().endswith(ext) for ext in allowed):
 		raise ValidationError('O arquivo deve ser uma imagem (formatos permitidos: PNG, JPG, JPEG, GIF, WEBP, BMP, TIFF).')
+	# conteúdo conferido com Pillow (a extensão sozinha não garante nada)
+	validar_imagem(imagem)
 
 
 class Evento(models.Model):
@@ -21,11 +24,19 @@ class Evento(models.Model):
 	data_fim = models.DateTimeField()
 	local = models.CharField(max_length=200)
 	vagas = models.PositiveIntegerField()
+	# contador de inscrições mantido por core.vagas (UPDATE condicional atômico)
+	vagas_ocupadas = models.PositiveIntegerField(default=0)
 	# duração em minutos (permite durações menores que 1h)
 	carga_horaria_minutos = models.PositiveIntegerField(default=240)
 	banner = models.ImageField(upload_to='banners/', validators=[validar_banner], blank=True, null=True)
+	# nomes das variantes redimensionadas do banner (core.imagens)
+	banner_variantes = models.JSONField(default=dict, blank=True, editable=False)
 	responsavel = models.ForeignKey(User, on_delete=models.CASCADE, related_name='eventos_criados')
 	confirmation_code = models.CharField(max_length=32, blank=True, null=True, unique=True)
+	# última alteração: instante e número de sequência (cursor da sincronização
+	# incremental da API, ver core.sincronizacao)
+	atualizado_em = models.DateTimeField(auto_now=True, db_index=True)
+	alteracao = models.PositiveBigIntegerField(default=0, db_index=True, editable=False)
 
 	def clean(self):
 		from django.utils import timezone as _tz
@@ -43,9 +54,42 @@ class Evento(models.Model):
 		if not self.responsavel:
 			raise ValidationError('Todo evento deve ter um professor responsável.')
 
+	class Meta:
+		indexes = [
+			# feed e paginação por cursor da API (data_inicio, id)
+			models.Index(fields=['data_inicio', 'id']),
+		]
+
 	def __str__(self):
 		return self.nome
 
+	def save(self, *args, **kwargs):
+		from .versoes import reservar
+		# a sequência é reservada na mesma transação da gravação: a ordem das
+		# alterações acompanha a ordem dos commits
+		with transaction.atomic():
+			self.alteracao = reservar()[0]
+			if kwargs.get('update_fields') is None and not self._state.adding and not kwargs.get('force_insert'):
+				# vagas_ocupadas só muda por UPDATE atômico (core.vagas): gravar o
+				# valor lido antes desfaria reservas feitas nesse meio tempo
+				deferidos = self.get_deferred_fields()
+				kwargs['update_fields'] = [
+					f.name for f in self._meta.concrete_fields
+					if not f.primary_key and f.name != 'vagas_ocupadas' and f.attname not in deferidos
+				]
+			if kwargs.get('update_fields') is not None:
+				kwargs['update_fields'] = {*kwargs['update_fields'], 'alteracao', 'atualizado_em'}
+			super().save(*args, **kwargs)
+
+	@property
+	def banner_urls(self):
+		# {'thumb'|'card'|'full': {'webp': url, 'jpg': url}}
+		return urls_imagem(self.banner, self.banner_variantes)
+
+	@property
+	def vagas_restantes(self):
+		return max(0, (self.vagas or 0) - (self.vagas_ocupadas or 0))
+
 	@property
 	def carga_horaria_readable(self):
 		m = int(self.carga_horaria_minutos or 0)
@@ -100,13 +144,17 @@ class Inscricao(models.Model):
 
 	class Meta:
 		unique_together = ('evento', 'participante')
+		indexes = [
+			# /api/inscricoes/ lista as inscrições do usuário por (data_inscricao, id)
+			models.Index(fields=['participante', 'data_inscricao', 'id']),
+		]
 
 	def clean(self):
 		# evita duplicatas (único governador pelo DB também)
 		if self.evento and self.evento.inscricoes.filter(participante=self.participante).exclude(pk=self.pk).exists():
 			raise ValidationError('Usuário já inscrito neste evento.')
-		# verificar vagas
-		if self.evento and self.evento.inscricoes.count() >= self.evento.vagas and not self.pk:
+		# verificar vagas (checagem rápida; a reserva definitiva é feita em core.vagas)
+		if self.evento and self.evento.vagas_ocupadas >= self.evento.vagas and not self.pk:
 			raise ValidationError('Vagas esgotadas para este evento.')
 
 	def __str__(self):
@@ -118,11 +166,16 @@ class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     telefone = models.CharField(max_length=30, blank=True, null=True)
     data_nascimento = models.DateField(blank=True, null=True)
-    photo = models.ImageField(upload_to='profiles/', blank=True, null=True)
+    photo = models.ImageField(upload_to='profiles/', validators=[validar_imagem], blank=True, null=True)
+    photo_variantes = models.JSONField(default=dict, blank=True, editable=False)
 
     def __str__(self):
         return f"Perfil de {self.user.username}"
 
+    @property
+    def photo_urls(self):
+        return urls_imagem(self.photo, self.photo_variantes)
+
 
 class EmailVerification(models.Model):
     PURPOSE_CHOICES = [
@@ -140,11 +193,124 @@ class EmailVerification(models.Model):
     def __str__(self):
         return f"{self.user.username} - {self.purpose}"
 
+
+class EmailOutbox(models.Model):
+	"""Mensagem de e-mail pendente; enviada pelo comando `enviar_emails`."""
+	STATUS_CHOICES = [
+		('pending', 'Pendente'),
+		('sending', 'Enviando'),
+		('sent', 'Enviado'),
+		('failed', 'Falhou'),
+	]
+	job_id = models.CharField(max_length=32, db_index=True)
+	to_email = models.EmailField()
+	subject = models.CharField(max_length=255)
+	body_text = models.TextField()
+	body_html = models.TextField(blank=True, default='')
+	from_email = models.CharField(max_length=255, blank=True, default='')
+	status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+	attempts = models.PositiveSmallIntegerField(default=0)
+	last_error = models.TextField(blank=True, default='')
+	next_attempt_at = models.DateTimeField(default=timezone.now)
+	created_at = models.DateTimeField(auto_now_add=True)
+	sent_at = models.DateTimeField(null=True, blank=True)
+
+	class Meta:
+		indexes = [models.Index(fields=['status', 'next_attempt_at'])]
+
+	def __str__(self):
+		return f"{self.job_id} - {self.to_email} - {self.status}"
+
+
 class Auditoria(models.Model):
 	usuario = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
 	acao = models.CharField(max_length=255)
-	data_hora = models.DateTimeField(auto_now_add=True)
+	# preenchido no momento do log_audit (a gravação pode ocorrer depois, em lote)
+	data_hora = models.DateTimeField(default=timezone.now)
 	detalhes = models.TextField(blank=True, null=True)
+	# campos estruturados (ver core.audit_schema); ids simples, sem FK, para
+	# o registro continuar válido depois que o evento/inscrição é removido
+	codigo = models.CharField(max_length=50, blank=True, default='')
+	evento_id = models.PositiveIntegerField(null=True, blank=True)
+	inscricao_id = models.PositiveIntegerField(null=True, blank=True)
+	alvo_usuario_id = models.PositiveIntegerField(null=True, blank=True)
+	dados = models.JSONField(null=True, blank=True)
 
 	def __str__(self):
 		return f"{self.data_hora} - {self.usuario} - {self.acao}"
+
+	class Meta:
+		indexes = [
+			models.Index(fields=['data_hora']),
+			models.Index(fields=['usuario', 'data_hora']),
+			models.Index(fields=['codigo', 'data_hora']),
+			models.Index(fields=['evento_id', 'data_hora']),
+			models.Index(fields=['inscricao_id']),
+			models.Index(fields=['alvo_usuario_id', 'data_hora']),
+		]
+
+
+class AuditoriaArquivo(models.Model):
+	"""Índice dos arquivos de auditoria arquivada (JSONL gzip, um por mês e execução)."""
+	periodo = models.CharField(max_length=7, db_index=True)  # AAAA-MM
+	arquivo = models.CharField(max_length=255, unique=True)  # relativo a AUDIT_ARCHIVE_DIR
+	data_inicio = models.DateTimeField()
+	data_fim = models.DateTimeField()
+	primeiro_id = models.BigIntegerField()
+	ultimo_id = models.BigIntegerField()
+	registros = models.PositiveIntegerField(default=0)
+	tamanho = models.PositiveBigIntegerField(default=0)
+	criado_em = models.DateTimeField(auto_now_add=True)
+	# linhas do mais recente ao mais antigo (arquivos antigos: ordem cronológica)
+	decrescente = models.BooleanField(default=False)
+
+	class Meta:
+		ordering = ['-data_fim']
+		indexes = [models.Index(fields=['data_inicio', 'data_fim'])]
+
+	def __str__(self):
+		return f"{self.periodo} - {self.arquivo} ({self.registros})"
+
+
+class EventoRemovido(models.Model):
+	"""Evento removido (tombstone) para a sincronização incremental da API."""
+	evento_id = models.PositiveIntegerField(unique=True)
+	alteracao = models.PositiveBigIntegerField(db_index=True)
+	removido_em = models.DateTimeField(default=timezone.now, db_index=True)
+
+	def __str__(self):
+		return f"evento {self.evento_id} removido em {self.removido_em}"
+
+
+class VersaoRecurso(models.Model):
+	"""Contador de versão de um recurso da API (ver core.versoes), base dos ETags."""
+	chave = models.CharField(max_length=64, primary_key=True)
+	versao = models.PositiveBigIntegerField(default=0)
+
+	def __str__(self):
+		return f"{self.chave} v{self.versao}"
+
+
+class ThrottleBalde(models.Model):
+	"""Balde de tokens de uma chave de throttle da API (ver core.throttling)."""
+	chave = models.CharField(max_length=200, primary_key=True)
+	tokens = models.FloatField()
+	# instantes em segundos (time.time()): última atualização e quando o balde
+	# estará cheio de novo (a partir daí a linha pode ser apagada)
+	atualizado_em = models.FloatField()
+	cheio_em = models.FloatField(db_index=True)
+
+	def __str__(self):
+		return f"{self.chave}: {self.tokens:.2f}"
+
+
+class ExportacaoCertificados(models.Model):
+	"""Progresso de uma exportação de certificados em ZIP (ver core.certificados_zip)."""
+	job_id = models.CharField(max_length=64, unique=True)
+	total = models.PositiveIntegerField(default=0)
+	prontos = models.PositiveIntegerField(default=0)
+	status = models.CharField(max_length=12, default='gerando')
+	atualizado_em = models.DateTimeField(auto_now=True, db_index=True)
+
+	def __str__(self):
+		return f"{self.job_id}: {self.prontos}/{self.total} ({self.status})"
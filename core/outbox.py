@@ -0,0 +1,159 @@
+"""Fila persistente de e-mails (tabela `EmailOutbox`).
+
+As views apenas gravam as mensagens (`enfileirar`) e respondem na hora com o
+`job_id`; o envio é feito pelo comando `enviar_emails`, que reaproveita uma
+única conexão SMTP por lote e reagenda as falhas com backoff exponencial.
+Com `EMAIL_OUTBOX_IMMEDIATE` ligado (desenvolvimento), o lote recém-criado é
+enviado por uma thread logo após o commit, sem bloquear a requisição.
+"""
+import logging
+import threading
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connections, transaction
+from django.db.models import Count
+from django.utils import timezone
+from .models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+# tempo que uma mensagem fica reservada por um worker antes de poder ser
+# retomada por outro (caso o primeiro morra no meio do envio)
+LEASE = timedelta(minutes=10)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def novo_job_id():
+    return uuid.uuid4().hex
+
+
+def mensagem(to_email, subject, body_text, body_html=''):
+    """Monta (sem salvar) uma mensagem para `enfileirar`."""
+    return EmailOutbox(to_email=to_email, subject=subject, body_text=body_text, body_html=body_html or '')
+
+
+def enfileirar(mensagens, job_id=None):
+    """Grava as mensagens na fila com o mesmo `job_id` e o retorna."""
+    job_id = job_id or novo_job_id()
+    from_email = _setting('DEFAULT_FROM_EMAIL', None) or ''
+    mensagens = [m for m in mensagens if m.to_email]
+    for m in mensagens:
+        m.job_id = job_id
+        m.from_email = m.from_email or from_email
+    if mensagens:
+        EmailOutbox.objects.bulk_create(mensagens, batch_size=500)
+        if _setting('EMAIL_OUTBOX_IMMEDIATE', False):
+            transaction.on_commit(lambda: _enviar_em_thread(job_id))
+    return job_id
+
+
+def enfileirar_email(to_email, subject, body_text, body_html='', job_id=None):
+    return enfileirar([mensagem(to_email, subject, body_text, body_html)], job_id=job_id)
+
+
+def _enviar_em_thread(job_id):
+    def run():
+        try:
+            processar(job_id=job_id)
+        except Exception:
+            logger.exception('Falha ao enviar e-mails do job %s', job_id)
+        finally:
+            connections.close_all()
+    threading.Thread(target=run, name=f'sgea-email-{job_id[:8]}', daemon=True).start()
+
+
+def _reservar(batch_size, job_id=None):
+    """Reserva até `batch_size` mensagens prontas; devolve as reservadas."""
+    agora = timezone.now()
+    qs = EmailOutbox.objects.filter(status__in=('pending', 'sending'), next_attempt_at__lte=agora)
+    if job_id:
+        qs = qs.filter(job_id=job_id)
+    ids = list(qs.order_by('next_attempt_at', 'id').values_list('id', flat=True)[:batch_size])
+    if not ids:
+        return []
+    # UPDATE condicional: dois workers não reservam a mesma mensagem
+    EmailOutbox.objects.filter(
+        id__in=ids, status__in=('pending', 'sending'), next_attempt_at__lte=agora
+    ).update(status='sending', next_attempt_at=agora + LEASE)
+    return list(EmailOutbox.objects.filter(id__in=ids, status='sending', next_attempt_at=agora + LEASE).order_by('id'))
+
+
+def _backoff(attempts):
+    base = _setting('EMAIL_OUTBOX_RETRY_BASE', 60)
+    return timedelta(seconds=min(base * (2 ** max(0, attempts - 1)), 6 * 3600))
+
+
+def processar(batch_size=None, job_id=None, max_batches=None):
+    """Envia mensagens pendentes em lotes; retorna (enviadas, falhas)."""
+    batch_size = batch_size or _setting('EMAIL_OUTBOX_BATCH_SIZE', 50)
+    max_attempts = _setting('EMAIL_OUTBOX_MAX_ATTEMPTS', 5)
+    enviadas = falhas = lotes = 0
+    while max_batches is None or lotes < max_batches:
+        lote = _reservar(batch_size, job_id=job_id)
+        if not lote:
+            break
+        lotes += 1
+        ok, erros = _enviar_lote(lote)
+        agora = timezone.now()
+        if ok:
+            EmailOutbox.objects.filter(id__in=ok).update(status='sent', sent_at=agora, last_error='')
+        for m in erros:
+            m.attempts += 1
+            m.last_error = erros[m][:2000]
+            if m.attempts >= max_attempts:
+                m.status = 'failed'
+            else:
+                m.status = 'pending'
+                m.next_attempt_at = agora + _backoff(m.attempts)
+        if erros:
+            EmailOutbox.objects.bulk_update(list(erros), ['attempts', 'last_error', 'status', 'next_attempt_at'])
+        enviadas += len(ok)
+        falhas += len(erros)
+    return enviadas, falhas
+
+
+def _enviar_lote(lote):
+    """Envia o lote por uma única conexão; devolve (ids enviados, {msg: erro})."""
+    ok, erros = [], {}
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        logger.warning('Falha ao abrir conexão de e-mail: %s', e)
+        return ok, {m: str(e) for m in lote}
+    try:
+        for m in lote:
+            msg = EmailMultiAlternatives(m.subject, m.body_text, m.from_email or None, [m.to_email], connection=connection)
+            if m.body_html:
+                msg.attach_alternative(m.body_html, 'text/html')
+            try:
+                # uma mensagem por chamada para saber exatamente qual falhou
+                connection.send_messages([msg])
+                ok.append(m.id)
+            except Exception as e:
+                erros[m] = str(e) or e.__class__.__name__
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            pass
+    return ok, erros
+
+
+def status_job(job_id):
+    """Contagem por status das mensagens de um job (ex.: {'sent': 10, 'pending': 2})."""
+    rows = EmailOutbox.objects.filter(job_id=job_id).values('status').annotate(total=Count('id'))
+    return {r['status']: r['total'] for r in rows}
+
+
+def limpar_enviadas(dias):
+    """Remove mensagens enviadas há mais de `dias` dias; retorna quantas removeu."""
+    limite = timezone.now() - timedelta(days=dias)
+    deleted, _ = EmailOutbox.objects.filter(status='sent', sent_at__lt=limite).delete()
+    return deleted
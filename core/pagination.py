@@ -0,0 +1,83 @@
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(CursorPagination):
+    page_size_query_param = 'page_size'
+
+    def __init__(self, ordering, page_size, max_page_size):
+        self.ordering = ordering
+        self.page_size = page_size
+        self.max_page_size = max_page_size
+
+
+class SGEAPagination(PageNumberPagination):
+    """Paginação padrão da API com dois modos opcionais.
+
+    - `?pagination=cursor` (ou `?cursor=...`): paginação por chave (keyset),
+      ordenada por `view.cursor_ordering`, sem OFFSET nem COUNT(*).
+    - `?count=false` no modo por página: não executa COUNT(*); `next` é
+      calculado buscando um registro a mais.
+
+    `page_size` pode ser escolhido pelo cliente até `API_MAX_PAGE_SIZE`.
+    """
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+
+    def __init__(self):
+        self.page_size = settings.REST_FRAMEWORK.get('PAGE_SIZE', 6)
+        self.max_page_size = getattr(settings, 'API_MAX_PAGE_SIZE', 100)
+        self._delegate = None
+        self._sem_count = False
+
+    @staticmethod
+    def _flag(request, name):
+        return (request.query_params.get(name) or '').lower() in ('0', 'false', 'no', 'nao', 'não')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        ordering = getattr(view, 'cursor_ordering', None)
+        if ordering and (request.query_params.get('pagination') == 'cursor' or self.cursor_query_param in request.query_params):
+            self._delegate = KeysetPagination(ordering, self.page_size, self.max_page_size)
+            return self._delegate.paginate_queryset(queryset, request, view)
+        if self._flag(request, 'count'):
+            return self._paginate_sem_count(queryset, request)
+        return super().paginate_queryset(queryset, request, view)
+
+    def _paginate_sem_count(self, queryset, request):
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        try:
+            number = max(1, int(request.query_params.get(self.page_query_param, 1)))
+        except (TypeError, ValueError):
+            number = 1
+        offset = (number - 1) * page_size
+        rows = list(queryset[offset:offset + page_size + 1])
+        self._sem_count = True
+        self.request = request
+        self._number = number
+        self._has_next = len(rows) > page_size
+        return rows[:page_size]
+
+    def get_paginated_response(self, data):
+        if self._delegate is not None:
+            return self._delegate.get_paginated_response(data)
+        if self._sem_count:
+            url = self.request.build_absolute_uri()
+            next_url = replace_query_param(url, self.page_query_param, self._number + 1) if self._has_next else None
+            if self._number <= 1:
+                previous_url = None
+            elif self._number == 2:
+                previous_url = remove_query_param(url, self.page_query_param)
+            else:
+                previous_url = replace_query_param(url, self.page_query_param, self._number - 1)
+            return Response(OrderedDict([
+                ('next', next_url),
+                ('previous', previous_url),
+                ('results', data),
+            ]))
+        return super().get_paginated_response(data)
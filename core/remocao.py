@@ -0,0 +1,204 @@
+"""Remoção de eventos (preservando as inscrições) e de usuários em lote.
+
+`Inscricao.evento` é SET_NULL: antes de o evento sumir, as inscrições recebem
+o snapshot (nome, data, local e carga horária) nas colunas `certificado_*`
+ainda vazias e perdem o certificado emitido. `snapshot_inscricoes` faz isso
+com um único UPDATE para todos os eventos, com os valores lidos do próprio
+evento por subquery, e grava os tombstones da sincronização
+(`core.sincronizacao`).
+
+O `pre_delete` de `Evento` chama `snapshot_inscricoes` para cada evento
+removido. `remover` remove muitos eventos de uma vez, em lotes: o snapshot de
+cada lote é feito antes, numa só chamada, e o signal pula os eventos já
+tratados.
+
+`remover_usuarios` apaga usuários (desligamento de alunos formados, pedidos de
+exclusão de dados) em lotes, cada um numa transação com DELETEs por conjunto:
+tokens, verificações de e-mail, inscrições e eventos criados por eles. As
+inscrições apagadas não disparam os signals por linha: vagas, versões e
+sincronização da API e stream de vagas são atualizados uma vez por lote.
+Fotos, banners (com as variantes) e certificados são apagados depois do
+commit de cada lote, em paralelo, por um pool de threads.
+"""
+import contextvars
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, NullIf
+from rest_framework.authtoken.models import Token
+from . import certificados, imagens, sincronizacao, vagas_ao_vivo, versoes
+from .feed import invalidar_feed
+from .models import EmailVerification, Evento, Inscricao, UserProfile
+from .roles import invalidate_roles
+from .vagas import recalcular_vagas
+
+User = get_user_model()
+
+# eventos cujo snapshot já foi feito por `remover` na transação corrente
+_preparados = contextvars.ContextVar('remocao_preparados', default=frozenset())
+# inscrições apagadas por `remover_usuarios`: efeitos dos signals aplicados por lote
+_em_lote = contextvars.ContextVar('remocao_em_lote', default=False)
+
+
+def em_lote():
+    """Verdadeiro enquanto `remover_usuarios` apaga inscrições (os signals por linha são pulados)."""
+    return _em_lote.get()
+
+
+def _do_evento(campo):
+    return Subquery(Evento.objects.filter(pk=OuterRef('evento_id')).values(campo)[:1])
+
+
+def snapshot_inscricoes(evento_ids):
+    """Grava o snapshot nas inscrições dos eventos e revoga os certificados.
+
+    Deve rodar dentro da transação da remoção (o `pre_delete` já roda). Os
+    arquivos de certificado e o cache do feed são limpos após o commit.
+    """
+    ids = [i for i in evento_ids if i not in _preparados.get()]
+    if not ids:
+        return 0
+    afetadas = list(Inscricao.objects.filter(evento_id__in=ids).values_list('id', 'participante_id', 'certificado_gerado'))
+    sincronizacao.registrar_remocoes(ids)
+    if not afetadas:
+        return 0
+    # campos vazios ('' ou 0) também recebem o valor do evento, como antes
+    Inscricao.objects.filter(evento_id__in=ids).update(
+        certificado_evento_nome=Coalesce(NullIf(F('certificado_evento_nome'), Value('')), _do_evento('nome')),
+        certificado_data_inicio=Coalesce(F('certificado_data_inicio'), _do_evento('data_inicio')),
+        certificado_local=Coalesce(NullIf(F('certificado_local'), Value('')), _do_evento('local')),
+        certificado_carga_horaria_minutos=Coalesce(
+            NullIf(F('certificado_carga_horaria_minutos'), Value(0)),
+            NullIf(_do_evento('carga_horaria_minutos'), Value(0)),
+            F('certificado_carga_horaria_minutos'),
+        ),
+        certificado_gerado=False,
+        certificado_emitido_em=None,
+    )
+    revogados = [i for i, _, gerado in afetadas if gerado]
+    participantes = {p for _, p, _ in afetadas}
+
+    def limpar():
+        certificados.invalidar(revogados)
+        for participante_id in participantes:
+            invalidar_feed(participante_id=participante_id)
+    transaction.on_commit(limpar)
+    return len(afetadas)
+
+
+def remover(eventos, lote=500, log=None):
+    """Remove os eventos do queryset em lotes; devolve `(eventos, inscrições afetadas)`."""
+    ids = list(eventos.order_by('id').values_list('id', flat=True))
+    total_inscricoes = 0
+    for i in range(0, len(ids), lote):
+        parte = ids[i:i + lote]
+        with transaction.atomic():
+            total_inscricoes += snapshot_inscricoes(parte)
+            token = _preparados.set(frozenset(parte))
+            try:
+                Evento.objects.filter(id__in=parte).delete()
+            finally:
+                _preparados.reset(token)
+        if log:
+            log(f'  {min(i + lote, len(ids))}/{len(ids)} eventos removidos...')
+    return len(ids), total_inscricoes
+
+
+def _com_imagem(qs, campo):
+    return qs.exclude(Q(**{f'{campo}__isnull': True}) | Q(**{campo: ''}))
+
+
+def contar_usuarios(usuarios):
+    """O que `remover_usuarios` apagaria (dry-run)."""
+    eventos = Evento.objects.filter(responsavel__in=usuarios)
+    return {
+        'usuarios': usuarios.count(),
+        'tokens': Token.objects.filter(user__in=usuarios).count(),
+        'verificacoes': EmailVerification.objects.filter(user__in=usuarios).count(),
+        'inscricoes': Inscricao.objects.filter(participante__in=usuarios).count(),
+        'certificados': Inscricao.objects.filter(participante__in=usuarios, certificado_gerado=True).count(),
+        'eventos': eventos.count(),
+        'inscricoes_preservadas': Inscricao.objects.filter(evento__in=eventos).exclude(participante__in=usuarios).count(),
+        'fotos': _com_imagem(UserProfile.objects.filter(user__in=usuarios), 'photo').count(),
+        'banners': _com_imagem(eventos, 'banner').count(),
+    }
+
+
+def _remover_lote(ids):
+    """Apaga um lote de usuários (dentro de uma transação); devolve `(contagens, arquivos)`."""
+    contagens = Counter()
+    inscricoes = list(Inscricao.objects.filter(participante_id__in=ids).values_list('id', 'evento_id'))
+    eventos = list(Evento.objects.filter(responsavel_id__in=ids).values_list('id', 'banner', 'banner_variantes'))
+    fotos = list(_com_imagem(UserProfile.objects.filter(user_id__in=ids), 'photo').values_list('photo', 'photo_variantes'))
+    arquivos = [n for nome, variantes in fotos + [(b, v) for _, b, v in eventos] for n in imagens.arquivos(nome, variantes)]
+
+    contagens['tokens'] = Token.objects.filter(user_id__in=ids).delete()[0]
+    contagens['verificacoes'] = EmailVerification.objects.filter(user_id__in=ids).delete()[0]
+    token = _em_lote.set(True)
+    try:
+        contagens['inscricoes'] = Inscricao.objects.filter(participante_id__in=ids).delete()[0]
+    finally:
+        _em_lote.reset(token)
+    proprios = [e[0] for e in eventos]
+    afetados = {evento_id for _, evento_id in inscricoes if evento_id} - set(proprios)
+    if afetados:
+        recalcular_vagas(Evento.objects.filter(id__in=afetados))
+        versoes.incrementar(afetados)
+        # inscricoes_count mudou: os eventos entram no /api/eventos/changes/
+        sincronizacao.marcar_alterados(afetados)
+        vagas_ao_vivo.publicar(afetados)
+    if proprios:
+        snapshot_inscricoes(proprios)
+        token = _preparados.set(frozenset(proprios))
+        try:
+            contagens['eventos'] = Evento.objects.filter(id__in=proprios).delete()[1].get(Evento._meta.label, 0)
+        finally:
+            _preparados.reset(token)
+    # perfil, grupos e a auditoria (SET_NULL) vão em cascata
+    User.objects.filter(id__in=ids).delete()
+    contagens['usuarios'] = len(ids)
+    contagens['fotos'] = len(fotos)
+    contagens['banners'] = sum(1 for _, banner, _ in eventos if banner)
+
+    def depois():
+        invalidate_roles(ids)
+        invalidar_feed(eventos=True)
+    transaction.on_commit(depois)
+    return contagens, ([i for i, _ in inscricoes], arquivos)
+
+
+def _apagar_arquivo(nome):
+    try:
+        default_storage.delete(nome)
+        return 1
+    except OSError:
+        return 0
+
+
+def remover_usuarios(usuarios, lote=200, workers=4, log=None):
+    """Remove os usuários do queryset em lotes; devolve as contagens por tipo de registro.
+
+    `contagens['arquivos']` é o número de fotos/banners/variantes apagados do
+    storage (a limpeza de cada lote roda em paralelo com o lote seguinte).
+    """
+    ids = list(usuarios.order_by('id').values_list('id', flat=True))
+    contagens = Counter()
+    pendentes = []
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='sgea-remocao') as pool:
+        for i in range(0, len(ids), lote):
+            parte = ids[i:i + lote]
+            with transaction.atomic():
+                do_lote, (inscricoes, arquivos) = _remover_lote(parte)
+            contagens.update(do_lote)
+            # só depois do commit: um rollback não pode deixar linhas sem arquivo
+            for j in range(0, len(inscricoes), 100):
+                pool.submit(certificados.invalidar, inscricoes[j:j + 100])
+            pendentes += [pool.submit(_apagar_arquivo, nome) for nome in arquivos]
+            if log:
+                log(f'  {min(i + lote, len(ids))}/{len(ids)} usuários removidos...')
+        contagens['arquivos'] = sum(f.result() for f in pendentes)
+    return dict(contagens)
@@ -0,0 +1,146 @@
+"""Leituras na réplica (`DATABASES['replica']`) e escritas no banco principal.
+
+Só as views marcadas leem da réplica: `ler_da_replica` (views de função) e
+`LeituraReplicaMixin` (viewsets do DRF), e só em GET/HEAD/OPTIONS. O
+roteador (`RoteadorReplica`, em `DATABASE_ROUTERS`) manda as leituras dessas
+requisições para a réplica e todo o resto para o principal: escritas,
+leituras dentro de transação (`atomic`) e threads de fundo (o contextvar não
+passa para elas). Sem o alias `replica` configurado tudo vai para o principal.
+
+A réplica fica atrás do principal. Para quem acabou de gravar não ver dados
+antigos (read-your-writes), toda requisição POST/PUT/PATCH/DELETE prende o
+cliente ao principal por `REPLICA_ADERENCIA_SEGUNDOS`: no navegador por um
+cookie e, para clientes da API sem cookies, por uma marca por usuário em
+memória (vale no processo que recebeu a escrita).
+
+A autenticação (sessão e token) roda antes de ligar a réplica, no principal:
+um usuário ou token recém-criado ainda pode não ter chegado à réplica.
+"""
+import contextvars
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .autenticacao import CacheLRU
+
+ALIAS = 'replica'
+COOKIE = 'sgea_primario'
+_METODOS_LEITURA = ('GET', 'HEAD', 'OPTIONS')
+
+_ler_da_replica = contextvars.ContextVar('replica_leitura', default=False)
+
+
+def _aderencia():
+    return float(getattr(settings, 'REPLICA_ADERENCIA_SEGUNDOS', 5))
+
+
+# id do usuário -> instante da última escrita (clientes da API sem cookie)
+escritas = CacheLRU(int(getattr(settings, 'AUTH_CACHE_TAMANHO', 10000)), _aderencia())
+
+
+def configurada():
+    return ALIAS in settings.DATABASES
+
+
+def aderente(request):
+    """Verdadeiro se o cliente gravou há menos de `REPLICA_ADERENCIA_SEGUNDOS` (lê do principal)."""
+    try:
+        if float(request.COOKIES.get(COOKIE, 0)) > time.time():
+            return True
+    except ValueError:
+        pass
+    user = getattr(request, 'user', None)
+    return bool(user is not None and user.is_authenticated and escritas.get(user.pk))
+
+
+def ativar(request):
+    """Liga a réplica para as leituras seguintes; devolve o token para `desativar` (ou None)."""
+    # `aderente` carrega o usuário da sessão, ainda no principal
+    if request.method not in _METODOS_LEITURA or not configurada() or aderente(request):
+        return None
+    return _ler_da_replica.set(True)
+
+
+def desativar(token):
+    if token is not None:
+        _ler_da_replica.reset(token)
+
+
+@contextmanager
+def primario():
+    """Leituras do bloco no principal (ex.: ao preencher um cache compartilhado)."""
+    token = _ler_da_replica.set(False)
+    try:
+        yield
+    finally:
+        _ler_da_replica.reset(token)
+
+
+def ler_da_replica(view):
+    """Decorator de view: as leituras de GET/HEAD/OPTIONS vão para a réplica."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        token = ativar(request)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            desativar(token)
+    return wrapper
+
+
+class LeituraReplicaMixin:
+    """Para viewsets do DRF: liga a réplica depois de autenticação, permissões e throttle."""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._replica = ativar(request)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        desativar(getattr(self, '_replica', None))
+        self._replica = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class ReplicaMiddleware:
+    """Depois de uma escrita (método que não é de leitura), prende o cliente ao principal."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method in _METODOS_LEITURA or not configurada():
+            return response
+        segundos = _aderencia()
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            escritas.set(user.pk, time.time())
+        response.set_cookie(
+            COOKIE, f'{time.time() + segundos:.0f}', max_age=int(segundos) or 1,
+            httponly=True, samesite='Lax', secure=request.is_secure(),
+        )
+        return response
+
+
+class RoteadorReplica:
+    """Router: leituras das views marcadas na réplica; o resto no principal."""
+
+    def db_for_read(self, model, **hints):
+        # dentro de uma transação no principal a leitura tem de ver o que ela gravou
+        if _ler_da_replica.get() and configurada() and not connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # os dois aliases têm os mesmos dados
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # a réplica é cópia do principal; o esquema chega com os dados
+        return db != ALIAS
@@ -0,0 +1,112 @@
+"""Resolução de papéis (grupos) do usuário com cache.
+
+Os nomes dos grupos são carregados uma única vez por requisição (guardados no
+próprio objeto `user`) e, opcionalmente, entre requisições no cache do Django
+por `ROLES_CACHE_TIMEOUT` segundos. Alterações de grupo invalidam o cache via
+sinais (ver `core.signals`).
+
+O cache entre requisições só vale com um cache compartilhado (Redis,
+Memcached, banco). Com o LocMem (padrão, um por processo) a invalidação só
+alcançaria o worker que fez a mudança, e quem saiu de Organizador/Professor
+continuaria com acesso nos outros até o timeout; nesse caso ele é ignorado.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+_ATTR = '_sgea_roles'
+
+
+def _cache_key(user_id):
+    return f'sgea:roles:{user_id}'
+
+
+def _timeout():
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if backend.endswith('LocMemCache') or backend.endswith('DummyCache'):
+        return 0
+    return int(getattr(settings, 'ROLES_CACHE_TIMEOUT', 0) or 0)
+
+
+class UserRoles:
+    def __init__(self, user, groups):
+        self.user = user
+        self.groups = frozenset(groups)
+
+    def has(self, *names):
+        return any(n in self.groups for n in names)
+
+    @property
+    def is_organizador(self):
+        return 'Organizador' in self.groups
+
+    @property
+    def is_professor(self):
+        return 'Professor' in self.groups
+
+    @property
+    def is_aluno(self):
+        return 'Aluno' in self.groups
+
+    @property
+    def is_prof_or_org(self):
+        return self.is_professor or self.is_organizador
+
+    @property
+    def is_admin(self):
+        # staff/superuser ou Organizador: pode agir em nome de outros usuários
+        return bool(self.user.is_staff or self.user.is_superuser or self.is_organizador)
+
+    @property
+    def is_staff_like(self):
+        # acesso à área administrativa: staff/superuser, Professor ou Organizador
+        return bool(self.user.is_staff or self.user.is_superuser or self.is_prof_or_org)
+
+    @property
+    def label(self):
+        # papel usado nas mensagens de auditoria
+        if self.user.is_staff or self.user.is_superuser:
+            return 'Staff'
+        if self.is_organizador:
+            return 'Organizador'
+        if self.is_professor:
+            return 'Professor'
+        return 'Unknown'
+
+
+def get_roles(user):
+    """Retorna `UserRoles` do usuário, consultando o BD no máximo uma vez por requisição."""
+    roles = getattr(user, _ATTR, None)
+    if roles is not None:
+        return roles
+    if user is None or not getattr(user, 'is_authenticated', False) or not user.pk:
+        return UserRoles(user, ())
+    groups = None
+    timeout = _timeout()
+    if timeout:
+        groups = cache.get(_cache_key(user.pk))
+    if groups is None:
+        groups = list(user.groups.values_list('name', flat=True))
+        if timeout:
+            cache.set(_cache_key(user.pk), groups, timeout)
+    roles = UserRoles(user, groups)
+    try:
+        setattr(user, _ATTR, roles)
+    except AttributeError:
+        pass
+    return roles
+
+
+def invalidate_roles(user_ids):
+    """Descarta o cache de papéis dos usuários informados."""
+    keys = [_cache_key(uid) for uid in user_ids if uid]
+    if keys:
+        cache.delete_many(keys)
+
+
+# predicados para user_passes_test
+def is_staff_like(user):
+    return get_roles(user).is_staff_like
+
+
+def is_organizador_or_superuser(user):
+    return bool(getattr(user, 'is_superuser', False) or get_roles(user).is_organizador)
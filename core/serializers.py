@@ -2,6 +2,8 @@ from rest_framework import serializers
 from rest_framework.exceptions import PermissionDenied
 from django.utils import timezone
 from .models import Evento, Inscricao
+from .vagas import criar_inscricao
+from .roles import get_roles
 
 
 class EventoSerializer(serializers.ModelSerializer):
@@ -9,14 +11,23 @@ class EventoSerializer(serializers.ModelSerializer):
 	inscricoes_count = serializers.IntegerField(read_only=True)
 	carga_horaria_minutos = serializers.IntegerField(read_only=True)
 	carga_horaria = serializers.SerializerMethodField(read_only=True)
+	banner_variantes = serializers.SerializerMethodField(read_only=True)
 
 	class Meta:
 		model = Evento
-		fields = ['id', 'nome', 'descricao', 'data_inicio', 'data_fim', 'local', 'vagas', 'banner', 'organizador', 'inscricoes_count', 'carga_horaria_minutos', 'carga_horaria']
+		fields = ['id', 'nome', 'descricao', 'data_inicio', 'data_fim', 'local', 'vagas', 'banner', 'banner_variantes', 'organizador', 'inscricoes_count', 'carga_horaria_minutos', 'carga_horaria', 'atualizado_em']
 
 	def get_carga_horaria(self, obj):
 		return getattr(obj, 'carga_horaria_readable', None)
 
+	def get_banner_variantes(self, obj):
+		# {'thumb'|'card'|'full': {'webp': url, 'jpg': url}}, absolutas como `banner`
+		request = self.context.get('request')
+		urls = obj.banner_urls
+		if request is not None:
+			urls = {nome: {ext: request.build_absolute_uri(url) for ext, url in formatos.items()} for nome, formatos in urls.items()}
+		return urls
+
 
 class InscricaoSerializer(serializers.ModelSerializer):
 	class Meta:
@@ -28,7 +39,7 @@ class InscricaoSerializer(serializers.ModelSerializer):
 		user = request.user
 
 		# Organizadores não podem se inscrever nos eventos
-		if user.groups.filter(name='Organizador').exists():
+		if get_roles(user).is_organizador:
 			raise PermissionDenied('Organizadores não podem se inscrever em eventos.')
 		evento = validated_data.get('evento')
 		inscricao = Inscricao(participante=user, evento=evento)
@@ -48,7 +59,8 @@ class InscricaoSerializer(serializers.ModelSerializer):
 		inscricao.telefone = (profile and profile.telefone) or None
 		inscricao.clean()
 		# NÃO gera certificado na inscrição; só ao confirmar presença ou código
-		inscricao.save()
+		# salva ocupando a vaga atomicamente (evita overbooking concorrente)
+		criar_inscricao(inscricao)
 		return inscricao
 
 	def get_carga_horaria(self, obj):
@@ -0,0 +1,39 @@
+"""Sessões no banco com cache (`SESSION_ENGINE = 'core.sessoes'`).
+
+É o `cached_db` do Django: a sessão é lida do cache e só vai ao banco na
+falta, e toda gravação vai para os dois. O `cached_db` guarda cada sessão no
+cache pelo tempo de vida dela (semanas); com o cache local de cada processo,
+um logout num worker deixaria a sessão válida no cache dos outros. Aqui a
+entrada vale no máximo `SESSION_CACHE_TTL` segundos.
+"""
+from django.conf import settings
+from django.contrib.sessions.backends import cached_db
+
+
+class _CacheLimitado:
+    """Repassa ao cache de sessões limitando o timeout das gravações."""
+
+    def __init__(self, cache):
+        self._cache = cache
+
+    def _timeout(self, timeout):
+        limite = int(getattr(settings, 'SESSION_CACHE_TTL', 60))
+        return limite if timeout is None else min(timeout, limite)
+
+    def set(self, chave, valor, timeout=None, **kwargs):
+        return self._cache.set(chave, valor, self._timeout(timeout), **kwargs)
+
+    async def aset(self, chave, valor, timeout=None, **kwargs):
+        return await self._cache.aset(chave, valor, self._timeout(timeout), **kwargs)
+
+    def __contains__(self, chave):
+        return chave in self._cache
+
+    def __getattr__(self, nome):
+        return getattr(self._cache, nome)
+
+
+class SessionStore(cached_db.SessionStore):
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        self._cache = _CacheLimitado(self._cache)
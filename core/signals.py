@@ -1,10 +1,18 @@
-from django.db.models.signals import post_save, pre_delete
+from collections import Counter
+
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save, m2m_changed
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
 from django.core.mail import send_mail
 from django.conf import settings
-from .models import Auditoria
+from .models import Auditoria, Evento, Inscricao, UserProfile
 from .audit import log_audit
+from .roles import invalidate_roles
+from .feed import invalidar_feed
+from rest_framework.authtoken.models import Token
+from . import autenticacao, certificados, imagens, remocao, sincronizacao, vagas_ao_vivo, versoes
+from .vagas import liberar_vaga
 
 User = get_user_model()
 
@@ -13,48 +21,171 @@ User = get_user_model()
 def enviar_email_boas_vindas(sender, instance, created, **kwargs):
 	if created:
 		# registra criação no log (não enviar e-mail aqui — espera verificação)
-		log_audit(usuario=instance, acao='Criação de Usuário', detalhes=f'Novo usuário: {instance.username}')
+		log_audit(usuario=instance, acao='Criação de Usuário', detalhes=f'Novo usuário: {instance.username}', alvo=instance)
 
 
 
-@receiver(pre_delete, sender=None)
-def snapshot_inscricoes_before_event_delete(sender, instance, **kwargs):
-	# Ao deletar um Evento, preserva snapshot dos dados nas inscrições
-	try:
-		from .models import Evento, Inscricao
-	except Exception:
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidar_papeis_ao_mudar_grupos(sender, instance, action, reverse, pk_set, **kwargs):
+	# mantém o cache de papéis (core.roles) coerente com a associação usuário-grupo
+	if action not in ('post_add', 'post_remove', 'post_clear', 'pre_clear'):
+		return
+	if not reverse:
+		# user.groups.add/remove/clear
+		instance.__dict__.pop('_sgea_roles', None)
+		invalidate_roles([instance.pk])
+	elif action == 'pre_clear':
+		# group.user_set.clear(): pk_set não é informado, captura os membros antes
+		invalidate_roles(list(instance.user_set.values_list('pk', flat=True)))
+	else:
+		invalidate_roles(pk_set or [])
+
+
+@receiver(post_save, sender=Group)
+def invalidar_papeis_ao_renomear_grupo(sender, instance, created, **kwargs):
+	if not created:
+		invalidate_roles(list(instance.user_set.values_list('pk', flat=True)))
+
+
+@receiver(pre_delete, sender=Group)
+def invalidar_papeis_ao_remover_grupo(sender, instance, **kwargs):
+	invalidate_roles(list(instance.user_set.values_list('pk', flat=True)))
+
+
+_CAMPOS_IMAGEM = {Evento: 'banner', UserProfile: 'photo'}
+
+
+@receiver(pre_save, sender=Evento)
+@receiver(pre_save, sender=UserProfile)
+def detectar_imagem_nova(sender, instance, **kwargs):
+	# arquivo recém-atribuído ainda não foi gravado no storage (_committed=False)
+	campo = _CAMPOS_IMAGEM[sender]
+	arquivo = getattr(instance, campo)
+	if arquivo and not getattr(arquivo, '_committed', True):
+		setattr(instance, f'{campo}_variantes', {})
+		instance._imagem_nova = True
+	elif not arquivo:
+		setattr(instance, f'{campo}_variantes', {})
+
+
+@receiver(post_save, sender=Evento)
+@receiver(post_save, sender=UserProfile)
+def gerar_variantes_imagem(sender, instance, **kwargs):
+	if instance.__dict__.pop('_imagem_nova', False):
+		imagens.agendar(instance, _CAMPOS_IMAGEM[sender])
+
+
+@receiver(post_save, sender=Evento)
+@receiver(post_delete, sender=Evento)
+def invalidar_feed_evento(sender, instance, **kwargs):
+	invalidar_feed(eventos=True)
+
+
+@receiver(post_save, sender=Inscricao)
+@receiver(post_delete, sender=Inscricao)
+def invalidar_feed_inscricao(sender, instance, **kwargs):
+	# muda vagas restantes do evento e a lista de inscrições do participante
+	if remocao.em_lote():
 		return
-	# only act for Evento deletions
-	if not isinstance(instance, Evento):
+	invalidar_feed(participante_id=instance.participante_id)
+
+
+@receiver(post_save, sender=Evento)
+@receiver(post_delete, sender=Evento)
+def versao_api_evento(sender, instance, **kwargs):
+	# ETags de /api/eventos/ (lista e detalhe)
+	versoes.incrementar([instance.pk])
+
+
+@receiver(post_save, sender=Inscricao)
+@receiver(post_delete, sender=Inscricao)
+def versao_api_inscricao(sender, instance, created=False, **kwargs):
+	# inscricoes_count do evento (ETags e /api/eventos/changes/)
+	if remocao.em_lote():
 		return
-	ev = instance
-	inscricoes = Inscricao.objects.filter(evento=ev)
-	for ins in inscricoes:
-		changed = False
-		if not ins.certificado_evento_nome:
-			ins.certificado_evento_nome = ev.nome
-			changed = True
-		if not ins.certificado_data_inicio:
-			ins.certificado_data_inicio = ev.data_inicio
-			changed = True
-		if not ins.certificado_local:
-			ins.certificado_local = ev.local
-			changed = True
-		if not ins.certificado_carga_horaria_minutos and ev.carga_horaria_minutos:
-			ins.certificado_carga_horaria_minutos = ev.carga_horaria_minutos
-			changed = True
-		if changed:
-			ins.save()
-			# remove registro de certificado para não listar participante em evento removido
-		try:
-			if ins.certificado_gerado:
-				ins.certificado_gerado = False
-				ins.certificado_emitido_em = None
-				ins.save()
-			elif not ins.certificado_gerado:
-				# ensure not registered
-				ins.certificado_emitido_em = None
-				ins.save()
-		except Exception:
-			# be defensive in signal handler
-			pass
+	versoes.incrementar([instance.evento_id])
+	if instance.evento_id and (created or kwargs.get('signal') is post_delete):
+		sincronizacao.marcar_alterados([instance.evento_id])
+
+
+@receiver(post_save, sender=Inscricao)
+@receiver(post_delete, sender=Inscricao)
+def vagas_ao_vivo_inscricao(sender, instance, created=False, **kwargs):
+	# stream SSE da home; salvar uma inscrição existente não muda as vagas
+	if created or (kwargs.get('signal') is post_delete and not remocao.em_lote()):
+		vagas_ao_vivo.publicar([instance.evento_id])
+
+
+@receiver(post_save, sender=Evento)
+def vagas_ao_vivo_evento(sender, instance, created, **kwargs):
+	# total de vagas editado
+	if not created:
+		vagas_ao_vivo.publicar([instance.pk])
+
+
+@receiver(post_save, sender=User)
+def versao_api_responsavel(sender, instance, created, update_fields=None, **kwargs):
+	# `organizador` é o username do responsável
+	if created or (update_fields is not None and 'username' not in update_fields):
+		return
+	ids = list(Evento.objects.filter(responsavel=instance).values_list('id', flat=True))
+	if ids:
+		versoes.incrementar(ids)
+		sincronizacao.marcar_alterados(ids)
+
+
+@receiver(pre_save, sender=Inscricao)
+def detectar_mudanca_certificado(sender, instance, using=None, update_fields=None, **kwargs):
+	# só renderiza/apaga os arquivos quando `certificado_gerado` muda de valor
+	if update_fields is not None and 'certificado_gerado' not in update_fields:
+		instance._certificado_mudou = False
+	elif instance._state.adding:
+		instance._certificado_mudou = instance.certificado_gerado
+	else:
+		anterior = Inscricao.objects.using(using).filter(pk=instance.pk).values_list('certificado_gerado', flat=True).first()
+		instance._certificado_mudou = anterior != instance.certificado_gerado
+
+
+@receiver(post_save, sender=Inscricao)
+def certificado_ao_salvar_inscricao(sender, instance, **kwargs):
+	# emitido: pré-renderiza HTML/PDF após o commit; revogado: apaga os arquivos
+	if not instance.__dict__.pop('_certificado_mudou', True):
+		return
+	if instance.certificado_gerado:
+		certificados.agendar([instance.pk])
+	else:
+		certificados.invalidar([instance.pk])
+
+
+@receiver(post_delete, sender=Inscricao)
+def certificado_ao_remover_inscricao(sender, instance, **kwargs):
+	if remocao.em_lote():
+		# remocao.remover_usuarios apaga os arquivos depois do commit
+		return
+	certificados.invalidar([instance.pk])
+
+
+@receiver(pre_delete, sender=Evento)
+def snapshot_inscricoes_before_event_delete(sender, instance, **kwargs):
+	# preserva o snapshot do evento nas inscrições (SET_NULL); roda na transação do delete
+	remocao.snapshot_inscricoes([instance.pk])
+
+
+@receiver(pre_delete, sender=User)
+def liberar_vagas_do_usuario(sender, instance, **kwargs):
+	# as inscrições apagadas em cascata não passam por core.vagas; roda na transação do delete
+	por_evento = Counter(Inscricao.objects.filter(participante=instance, evento__isnull=False).values_list('evento_id', flat=True))
+	for evento_id, total in por_evento.items():
+		liberar_vaga(evento_id, total)
+
+
+@receiver(post_delete, sender=Token)
+def invalidar_token_em_cache(sender, instance, **kwargs):
+	autenticacao.invalidar_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidar_usuario_em_cache(sender, instance, **kwargs):
+	# desativação, troca de senha/dados ou remoção (core.autenticacao)
+	autenticacao.invalidar_usuario(instance.pk)
@@ -0,0 +1,111 @@
+"""Sincronização incremental de eventos (`/api/eventos/changes/?since=`).
+
+Cada gravação de `Evento` recebe um número de sequência (`Evento.alteracao`,
+reservado em `core.versoes.reservar` na mesma transação) e cada remoção deixa
+um `EventoRemovido` com o seu próprio número. O cursor devolvido ao cliente é
+o maior número já entregue; a próxima chamada recebe só o que veio depois,
+então o custo é proporcional ao número de mudanças, não de eventos.
+
+Os registros de remoção são apagados após `SYNC_RETENCAO_DIAS`
+(`limpar_removidos`); o maior número apagado vira o horizonte e cursores
+anteriores a ele recebem 410, pedindo uma sincronização completa
+(`since=0`).
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from .models import Evento, EventoRemovido, VersaoRecurso
+from .versoes import reservar
+
+HORIZONTE = 'eventos:sequencia:horizonte'
+
+
+class CursorExpirado(Exception):
+    pass
+
+
+def cursor(valor):
+    """Cursor recebido do cliente -> inteiro (ausente/vazio = 0); ValueError se inválido."""
+    if valor in (None, ''):
+        return 0
+    n = int(valor)
+    if n < 0:
+        raise ValueError(valor)
+    return n
+
+
+def horizonte():
+    return VersaoRecurso.objects.filter(chave=HORIZONTE).values_list('versao', flat=True).first() or 0
+
+
+def registrar_remocoes(evento_ids):
+    """Grava os tombstones dos eventos (chamado dentro da transação da remoção)."""
+    ids = sorted(set(evento_ids))
+    if not ids:
+        return
+    agora = timezone.now()
+    EventoRemovido.objects.bulk_create(
+        [EventoRemovido(evento_id=evento_id, alteracao=numero, removido_em=agora) for evento_id, numero in zip(ids, reservar(len(ids)))],
+        update_conflicts=True, unique_fields=['evento_id'], update_fields=['alteracao', 'removido_em'],
+    )
+
+
+def marcar_alterados(evento_ids):
+    """Numera como alterados eventos gravados com `update()` (que não passa por `save`)."""
+    ids = sorted(set(evento_ids))
+    if not ids:
+        return
+    agora = timezone.now()
+    with transaction.atomic():
+        for evento_id, numero in zip(ids, reservar(len(ids))):
+            Evento.objects.filter(pk=evento_id).update(alteracao=numero, atualizado_em=agora)
+
+
+def alteracoes(eventos, desde, limite):
+    """Eventos alterados e ids removidos depois de `desde`, no máximo `limite` no total.
+
+    `eventos` é o queryset base (anotações do serializer). Devolve
+    `(alterados, removidos, cursor, mais)`. Levanta `CursorExpirado` se `desde`
+    é anterior ao horizonte dos tombstones apagados.
+    """
+    if desde and desde < horizonte():
+        raise CursorExpirado(desde)
+    alterados = list(eventos.filter(alteracao__gt=desde).order_by('alteracao')[:limite + 1])
+    removidos = []
+    if desde:
+        # na sincronização completa (desde=0) os removidos não interessam
+        removidos = list(
+            EventoRemovido.objects.filter(alteracao__gt=desde).order_by('alteracao')
+            .values_list('alteracao', 'evento_id')[:limite + 1]
+        )
+    itens = sorted([(e.alteracao, e) for e in alterados] + removidos, key=lambda item: item[0])
+    mais = len(itens) > limite
+    itens = itens[:limite]
+    novo_cursor = itens[-1][0] if itens else desde
+    return (
+        [obj for _, obj in itens if not isinstance(obj, int)],
+        [obj for _, obj in itens if isinstance(obj, int)],
+        novo_cursor,
+        mais,
+    )
+
+
+def limpar_removidos(dias=None):
+    """Apaga tombstones mais antigos que `dias` (padrão SYNC_RETENCAO_DIAS); devolve quantos."""
+    if dias is None:
+        dias = int(getattr(settings, 'SYNC_RETENCAO_DIAS', 90))
+    limite = timezone.now() - timedelta(days=dias)
+    with transaction.atomic():
+        antigos = EventoRemovido.objects.filter(removido_em__lt=limite)
+        maior = antigos.aggregate(m=Max('alteracao'))['m']
+        if maior is None:
+            return 0
+        apagados, _ = antigos.filter(alteracao__lte=maior).delete()
+        registro, _ = VersaoRecurso.objects.select_for_update().get_or_create(chave=HORIZONTE)
+        if maior > registro.versao:
+            registro.versao = maior
+            registro.save(update_fields=['versao'])
+    return apagados
@@ -0,0 +1,157 @@
+"""Ajustes e manutenção do SQLite em produção.
+
+Cada conexão nova recebe os PRAGMAs de `SQLITE_PRAGMAS` (signal
+`connection_created`): WAL (leitores não bloqueiam o escritor e vice-versa),
+`busy_timeout` (espera o lock em vez de falhar com "database is locked"),
+`synchronous=NORMAL` (seguro com WAL, um fsync por checkpoint em vez de por
+commit), `mmap_size` e `cache_size`. `journal_mode` fica gravado no arquivo;
+os demais valem por conexão.
+
+Manutenção (comandos `backup_banco`, `otimizar_banco` e `verificar_banco`):
+- `backup` copia o banco com a API de backup do SQLite num único passo: em
+  WAL a cópia só segura um snapshot de leitura e não bloqueia quem grava;
+- `otimizar` roda `PRAGMA optimize` (ou `ANALYZE`) e o checkpoint do WAL;
+- `verificar` roda `integrity_check` (ou `quick_check`) e `foreign_key_check`.
+"""
+import os
+import re
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+PRAGMAS_PADRAO = {
+    'journal_mode': 'WAL',
+    'busy_timeout': 5000,
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -20000,
+    'temp_store': 'MEMORY',
+}
+_NOME = re.compile(r'^[a-z_]+$')
+_VALOR = re.compile(r'^-?\w+$')
+
+
+def pragmas():
+    """PRAGMAs aplicados a cada conexão (`SQLITE_PRAGMAS` sobrepõe os padrões; valor None remove)."""
+    resultado = dict(PRAGMAS_PADRAO)
+    resultado.update(getattr(settings, 'SQLITE_PRAGMAS', {}) or {})
+    return {nome: valor for nome, valor in resultado.items() if valor is not None}
+
+
+def _em_memoria(connection):
+    nome = str(connection.settings_dict.get('NAME') or '')
+    return not nome or nome == ':memory:' or 'mode=memory' in nome
+
+
+def _somente_leitura(connection):
+    # réplica (core.replica): abre com `PRAGMA query_only` e não pode mudar o journal
+    return 'query_only' in str(connection.settings_dict.get('OPTIONS', {}).get('init_command', ''))
+
+
+@receiver(connection_created)
+def configurar(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for nome, valor in pragmas().items():
+            if nome == 'journal_mode' and (_em_memoria(connection) or _somente_leitura(connection)):
+                continue
+            if not _NOME.match(nome) or not _VALOR.match(str(valor)):
+                raise ValueError(f'PRAGMA inválido em SQLITE_PRAGMAS: {nome}={valor!r}')
+            cursor.execute(f'PRAGMA {nome}={valor}')
+
+
+def _arquivo(using='default'):
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        raise ValueError('O banco configurado não é SQLite.')
+    if _em_memoria(connection):
+        raise ValueError('O banco está em memória.')
+    return str(connection.settings_dict['NAME'])
+
+
+def _conectar(caminho, **kwargs):
+    conexao = sqlite3.connect(caminho, **kwargs)
+    conexao.execute(f"PRAGMA busy_timeout={int(pragmas().get('busy_timeout', 5000))}")
+    return conexao
+
+
+def backup(destino, using='default'):
+    """Copia o banco para `destino` sem bloquear a aplicação; devolve o número de páginas.
+
+    A cópia vai para um arquivo temporário ao lado do destino e só então é
+    renomeada, então `destino` nunca fica pela metade. É feita num único passo
+    (`pages=-1`): em passos, cada escrita de outra conexão faria o SQLite
+    recomeçar do início, e com a escrita quase contínua da aplicação
+    (auditoria, throttle, sessões) a cópia poderia nunca terminar.
+    """
+    pasta = os.path.dirname(os.path.abspath(destino))
+    os.makedirs(pasta, exist_ok=True)
+    fd, temporario = tempfile.mkstemp(prefix='.backup-', suffix='.sqlite3', dir=pasta)
+    os.close(fd)
+    origem = _conectar(_arquivo(using))
+    copia = sqlite3.connect(temporario)
+    total = {'paginas': 0}
+
+    def passo(status, restantes, paginas_total):
+        total['paginas'] = paginas_total
+
+    try:
+        origem.backup(copia, pages=-1, progress=passo)
+        # a cópia sai como arquivo único (sem -wal), pronta para ser restaurada
+        copia.execute('PRAGMA journal_mode=DELETE')
+        copia.close()
+        os.replace(temporario, destino)
+    except BaseException:
+        copia.close()
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+    finally:
+        origem.close()
+    return total['paginas']
+
+
+def rotacionar(pasta, prefixo, manter):
+    """Apaga os backups mais antigos de `pasta` (`prefixo*`), mantendo os `manter` mais novos."""
+    arquivos = sorted(
+        (os.path.join(pasta, nome) for nome in os.listdir(pasta) if nome.startswith(prefixo)),
+        key=os.path.getmtime, reverse=True,
+    )
+    for caminho in arquivos[manter:]:
+        os.remove(caminho)
+    return arquivos[manter:]
+
+
+def otimizar(analyze=False, checkpoint=True, using='default'):
+    """`PRAGMA optimize` (ou `ANALYZE` completo) e checkpoint do WAL; devolve os passos e os segundos de cada um."""
+    passos = []
+    with connections[using].cursor() as cursor:
+        for sql in (['ANALYZE'] if analyze else []) + ['PRAGMA optimize'] + (['PRAGMA wal_checkpoint(TRUNCATE)'] if checkpoint else []):
+            inicio = time.monotonic()
+            cursor.execute(sql)
+            cursor.fetchall()
+            passos.append((sql, time.monotonic() - inicio))
+    return passos
+
+
+def verificar(rapido=False, caminho=None, using='default'):
+    """Problemas encontrados por `integrity_check`/`quick_check` e `foreign_key_check` (lista vazia = ok).
+
+    Com `caminho`, verifica esse arquivo (ex.: um backup) em vez do banco configurado.
+    """
+    conexao = _conectar(Path(caminho or _arquivo(using)).resolve().as_uri() + '?mode=ro', uri=True)
+    try:
+        linhas = conexao.execute('PRAGMA quick_check' if rapido else 'PRAGMA integrity_check').fetchall()
+        problemas = [linha[0] for linha in linhas if linha[0] != 'ok']
+        for tabela, rowid, pai, _ in conexao.execute('PRAGMA foreign_key_check').fetchall():
+            problemas.append(f'{tabela} rowid={rowid}: referência inválida para {pai}')
+        return problemas
+    finally:
+        conexao.close()
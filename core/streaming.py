@@ -0,0 +1,37 @@
+"""Respostas em streaming que continuam em streaming no ASGI.
+
+No ASGI o Django não serve um `StreamingHttpResponse` de iterador síncrono
+em pedaços: lê o iterador inteiro para a memória antes do primeiro byte.
+`resposta` entrega o iterador como está no WSGI e, no ASGI, o embrulha num
+gerador assíncrono que puxa um pedaço por vez numa thread (`sync_to_async`,
+sempre a mesma, então as consultas usam a mesma conexão do banco).
+"""
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+_FIM = object()
+
+
+async def assincrono(iterador):
+    """Gerador assíncrono com os itens de `iterador`, lidos numa thread."""
+    iterador = iter(iterador)
+    proximo = sync_to_async(next)
+    try:
+        while True:
+            item = await proximo(iterador, _FIM)
+            if item is _FIM:
+                return
+            yield item
+    finally:
+        # cliente desconectou: fecha o gerador na mesma thread em que rodou
+        fechar = getattr(iterador, 'close', None)
+        if fechar is not None:
+            await sync_to_async(fechar)()
+
+
+def resposta(request, iterador, **kwargs):
+    """`StreamingHttpResponse` de `iterador`, assíncrono se `request` veio pelo ASGI."""
+    if isinstance(request, ASGIRequest):
+        iterador = assincrono(iterador)
+    return StreamingHttpResponse(iterador, **kwargs)
@@ -0,0 +1,31 @@
+from unittest import mock
+
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from core import audit
+
+
+@override_settings(AUDIT_ASYNC=True)
+class AuditTransacaoTests(TestCase):
+    def test_registro_de_transacao_desfeita_e_descartado(self):
+        with mock.patch.object(audit.writer, 'enqueue') as enqueue:
+            with self.captureOnCommitCallbacks(execute=True):
+                try:
+                    with transaction.atomic():
+                        audit.log_audit(None, 'Teste', 'desfeito')
+                        audit.log_audit_many([(None, 'Teste', 'desfeito em lote')])
+                        raise RuntimeError
+                except RuntimeError:
+                    pass
+                audit.log_audit(None, 'Teste', 'mantido')
+        self.assertEqual([c.args[0].detalhes for c in enqueue.call_args_list], ['mantido'])
+
+    def test_registro_so_entra_na_fila_depois_do_commit(self):
+        with mock.patch.object(audit.writer, 'enqueue') as enqueue:
+            with self.captureOnCommitCallbacks() as callbacks:
+                audit.log_audit(None, 'Teste', 'pendente')
+                enqueue.assert_not_called()
+            for callback in callbacks:
+                callback()
+        enqueue.assert_called_once()
@@ -0,0 +1,66 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import Evento, ExportacaoCertificados, Inscricao
+
+User = get_user_model()
+
+
+@mock.patch('core.certificados.invalidar')
+@mock.patch('core.certificados.agendar')
+class CertificadoAoSalvarTests(TestCase):
+    def setUp(self):
+        responsavel = User.objects.create_user('prof', 'prof@example.com', 'x')
+        aluno = User.objects.create_user('aluno', 'aluno@example.com', 'x')
+        inicio = timezone.now() + timedelta(days=7)
+        evento = Evento.objects.create(
+            nome='Evento', local='Sala 1', vagas=5, responsavel=responsavel,
+            data_inicio=inicio, data_fim=inicio + timedelta(hours=2),
+        )
+        self.insc = Inscricao.objects.create(evento=evento, participante=aluno)
+
+    def test_salvar_sem_mudar_o_certificado_nao_mexe_nos_arquivos(self, agendar, invalidar):
+        self.insc.participante_first_name = 'Ana'
+        self.insc.save()
+        self.insc.certificado_gerado = True
+        self.insc.save(update_fields=['participante_first_name'])
+        agendar.assert_not_called()
+        invalidar.assert_not_called()
+
+    def test_emitir_e_revogar(self, agendar, invalidar):
+        self.insc.certificado_gerado = True
+        self.insc.save()
+        agendar.assert_called_once_with([self.insc.pk])
+        self.insc.save()
+        agendar.assert_called_once()
+        self.insc.certificado_gerado = False
+        self.insc.save(update_fields=['certificado_gerado'])
+        invalidar.assert_called_once_with([self.insc.pk])
+
+
+class ExportacaoZipJobTests(TestCase):
+    def setUp(self):
+        self.staff = [User.objects.create_user(f'staff{i}', f'staff{i}@example.com', 'x', is_staff=True) for i in range(2)]
+        inicio = timezone.now() + timedelta(days=7)
+        self.evento = Evento.objects.create(
+            nome='Evento', local='Sala 1', vagas=5, responsavel=self.staff[0],
+            data_inicio=inicio, data_fim=inicio + timedelta(hours=2),
+        )
+
+    def exportar(self, user, job):
+        self.client.force_login(user)
+        r = self.client.get(f'/admin-area/certificados/{self.evento.pk}/zip/', {'job': job})
+        b''.join(r.streaming_content)
+        return r
+
+    def test_job_e_escopado_ao_usuario(self):
+        self.assertEqual(self.exportar(self.staff[0], 'job-comum')['X-Job-Id'], 'job-comum')
+        self.assertEqual(self.client.get('/admin-api/certificados/job-comum/').status_code, 200)
+        self.client.force_login(self.staff[1])
+        self.assertEqual(self.client.get('/admin-api/certificados/job-comum/').status_code, 404)
+        self.exportar(self.staff[1], 'job-comum')
+        self.assertEqual(ExportacaoCertificados.objects.filter(job_id__endswith=':job-comum').count(), 2)
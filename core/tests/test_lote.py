@@ -0,0 +1,63 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core import lote
+from core.models import Evento, Inscricao
+from core.vagas import reservar_vagas_disponiveis
+
+User = get_user_model()
+
+
+class CriarEmLoteTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+        inicio = timezone.now() + timedelta(days=7)
+        self.evento = Evento.objects.create(
+            nome='Evento', local='Sala 1', vagas=5, responsavel=self.admin,
+            data_inicio=inicio, data_fim=inicio + timedelta(hours=2),
+        )
+        self.alunos = [User.objects.create_user(f'aluno{i}', f'aluno{i}@example.com', 'x') for i in range(3)]
+
+    def test_inscricao_concorrente_refaz_o_lote(self):
+        chamadas = []
+
+        def reservar(evento_id, quantidade):
+            # inscrição individual que entra depois da conferência, na primeira tentativa
+            if not chamadas:
+                Inscricao.objects.create(evento=self.evento, participante=self.alunos[0])
+            chamadas.append(quantidade)
+            return reservar_vagas_disponiveis(evento_id, quantidade)
+
+        with mock.patch('core.lote.reservar_vagas_disponiveis', side_effect=reservar):
+            resultados, _ = lote.criar(self.evento, self.alunos, self.admin)
+        self.assertEqual(len(chamadas), 2)
+        self.assertEqual(sorted(r['status'] for r in resultados), ['ok', 'ok', 'ok'])
+        self.assertEqual(Inscricao.objects.filter(evento=self.evento).count(), 3)
+        self.assertEqual(Evento.objects.get(pk=self.evento.pk).vagas_ocupadas, 3)
+
+    def test_ja_inscrito_recebe_erro(self):
+        Inscricao.objects.create(evento=self.evento, participante=self.alunos[0])
+        Evento.objects.filter(pk=self.evento.pk).update(vagas_ocupadas=1)
+        resultados, _ = lote.criar(self.evento, self.alunos, self.admin)
+        erros = [r['participante_id'] for r in resultados if r['status'] == 'error']
+        self.assertEqual(erros, [self.alunos[0].id])
+        self.assertEqual(Evento.objects.get(pk=self.evento.pk).vagas_ocupadas, 3)
+
+    def test_acesso_negado_usa_a_chave_enviada(self):
+        professor = User.objects.create_user('prof', 'prof@example.com', 'x')
+        professor.groups.add(Group.objects.get_or_create(name='Professor')[0])
+        Inscricao.objects.create(evento=self.evento, participante=self.alunos[0])
+        client = APIClient()
+        client.force_authenticate(professor)
+        r = client.post('/api/internal/inscricoes/bulk/', {
+            'action': 'confirm', 'evento_id': self.evento.pk, 'participante_ids': [self.alunos[0].id],
+        }, format='json')
+        self.assertEqual(r.json()['results'], [
+            {'participante_id': self.alunos[0].id, 'status': 'error', 'error': 'Acesso negado'},
+        ])
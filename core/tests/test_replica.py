@@ -0,0 +1,125 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import warnings
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.test import Client, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from core import replica
+from core.audit import flush_audit
+from core.autenticacao import CacheLRU
+from core.models import Evento
+
+User = get_user_model()
+
+ADERENCIA = 0.5
+
+
+class ReplicaTests(TransactionTestCase):
+    """Leituras na réplica, escritas no principal e read-your-writes (core.replica).
+
+    A réplica é uma cópia do banco de teste num diretório temporário, feita
+    antes de criar o evento: até ser atualizada, ele só existe no principal.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.pasta = tempfile.mkdtemp(prefix='sgea-replica-')
+        cls.caminho = os.path.join(cls.pasta, 'replica.sqlite3')
+        config = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': cls.caminho,
+            'OPTIONS': {'init_command': 'PRAGMA query_only=ON'},
+            # espelho: o TransactionTestCase não tenta limpar a réplica
+            'TEST': {'MIRROR': DEFAULT_DB_ALIAS},
+        }
+        bancos = {**settings.DATABASES, replica.ALIAS: config}
+        with warnings.catch_warnings():
+            # só acrescenta o alias; o 'default' continua o mesmo
+            warnings.simplefilter('ignore')
+            cls.sobrescrita = override_settings(DATABASES=bancos, REPLICA_ADERENCIA_SEGUNDOS=ADERENCIA)
+            cls.sobrescrita.enable()
+        connections.settings[replica.ALIAS] = connections.configure_settings(bancos)[replica.ALIAS]
+        # só depois de o alias existir: o runner prepara os bancos de `databases`
+        cls.databases = {DEFAULT_DB_ALIAS, replica.ALIAS}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[replica.ALIAS].close()
+        del connections[replica.ALIAS]
+        del connections.settings[replica.ALIAS]
+        cls.sobrescrita.disable()
+        shutil.rmtree(cls.pasta, ignore_errors=True)
+
+    def setUp(self):
+        # a marca por usuário usa a aderência de quando o módulo foi importado
+        patcher = mock.patch.object(replica, 'escritas', CacheLRU(100, ADERENCIA))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(flush_audit)
+
+        self.leitor = User.objects.create_user('leitor', 'leitor@example.com', 'x')
+        self.escritor = User.objects.create_user('escritor', 'escritor@example.com', 'x')
+        self.tokens = {u.pk: Token.objects.create(user=u).key for u in (self.leitor, self.escritor)}
+        self.copiar()
+        inicio = timezone.now() + timedelta(days=7)
+        self.evento = Evento.objects.create(
+            nome='Teste de réplica', local='Sala 1', vagas=10, responsavel=self.escritor,
+            data_inicio=inicio, data_fim=inicio + timedelta(hours=2),
+        )
+
+    def copiar(self):
+        """(Re)cria a réplica com o conteúdo atual do banco de teste."""
+        connections[replica.ALIAS].close()
+        origem = connections[DEFAULT_DB_ALIAS]
+        origem.ensure_connection()
+        destino = sqlite3.connect(self.caminho)
+        try:
+            origem.connection.backup(destino)
+        finally:
+            destino.close()
+
+    def ver_evento(self, user, client=None):
+        r = (client or Client()).get(
+            f'/api/eventos/{self.evento.pk}/',
+            HTTP_AUTHORIZATION='Token ' + self.tokens[user.pk], HTTP_ACCEPT='application/json',
+        )
+        return r.status_code
+
+    def test_leitura_sem_escrita_vem_da_replica(self):
+        self.assertEqual(self.ver_evento(self.leitor), 404)
+
+    def test_replica_recusa_escritas(self):
+        with self.assertRaises(DatabaseError):
+            with connections[replica.ALIAS].cursor() as cursor:
+                cursor.execute('DELETE FROM core_evento WHERE id = %s', [self.evento.pk])
+
+    def test_quem_gravou_le_do_principal_durante_a_aderencia(self):
+        navegador = Client()
+        r = navegador.post(
+            '/api/inscricoes/', {'evento': self.evento.pk}, content_type='application/json',
+            HTTP_AUTHORIZATION='Token ' + self.tokens[self.escritor.pk], HTTP_ACCEPT='application/json',
+        )
+        self.assertEqual(r.status_code, 201)
+        # com o cookie e, para clientes sem cookie, só com o token
+        self.assertEqual(self.ver_evento(self.escritor, navegador), 200)
+        self.assertEqual(self.ver_evento(self.escritor), 200)
+        self.assertEqual(self.ver_evento(self.leitor), 404)
+
+        time.sleep(ADERENCIA + 0.5)
+        self.assertEqual(self.ver_evento(self.escritor, navegador), 404)
+
+    def test_replica_atualizada_mostra_o_evento(self):
+        self.copiar()
+        self.assertEqual(self.ver_evento(self.leitor), 200)
@@ -0,0 +1,26 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from core.models import Auditoria
+
+User = get_user_model()
+
+
+class ExportacaoAsgiTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', 'admin@example.com', 'x')
+        Auditoria.objects.bulk_create(Auditoria(usuario=self.admin, acao='Teste', detalhes=f'registro {i}') for i in range(3))
+
+    async def test_exportacao_usa_iterador_assincrono_no_asgi(self):
+        await self.async_client.aforce_login(self.admin)
+        r = await self.async_client.get('/admin-area/auditoria/', {'download': 'csv', 'exclude_access': '1'})
+        self.assertEqual(r.status_code, 200)
+        self.assertTrue(r.is_async)
+        corpo = b''.join([pedaco async for pedaco in r.streaming_content]).decode()
+        self.assertIn('registro 2', corpo)
+
+    def test_exportacao_continua_sincrona_no_wsgi(self):
+        self.client.force_login(self.admin)
+        r = self.client.get('/admin-area/auditoria/', {'download': 'csv', 'exclude_access': '1'})
+        self.assertFalse(r.is_async)
+        self.assertIn('registro 2', b''.join(r.streaming_content).decode())
@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from core.models import Evento, Inscricao
+from core.vagas import criar_inscricao, reservar_vaga
+
+User = get_user_model()
+
+
+class VagasTests(TestCase):
+    def setUp(self):
+        self.responsavel = User.objects.create_user('prof', 'prof@example.com', 'x')
+        inicio = timezone.now() + timedelta(days=7)
+        self.evento = Evento.objects.create(
+            nome='Evento', local='Sala 1', vagas=2, responsavel=self.responsavel,
+            data_inicio=inicio, data_fim=inicio + timedelta(hours=2),
+        )
+
+    def ocupadas(self):
+        return Evento.objects.values_list('vagas_ocupadas', flat=True).get(pk=self.evento.pk)
+
+    def test_save_completo_nao_desfaz_reserva_concorrente(self):
+        carregado = Evento.objects.get(pk=self.evento.pk)
+        self.assertTrue(reservar_vaga(self.evento.pk))
+        carregado.nome = 'Evento editado'
+        carregado.save()
+        self.assertEqual(self.ocupadas(), 1)
+        self.assertEqual(Evento.objects.get(pk=self.evento.pk).nome, 'Evento editado')
+
+    def test_remover_usuario_libera_as_vagas(self):
+        aluno = User.objects.create_user('aluno', 'aluno@example.com', 'x')
+        outro = User.objects.create_user('outro', 'outro@example.com', 'x')
+        criar_inscricao(Inscricao(evento=self.evento, participante=aluno))
+        criar_inscricao(Inscricao(evento=self.evento, participante=outro))
+        self.assertEqual(self.ocupadas(), 2)
+        aluno.delete()
+        self.assertEqual(self.ocupadas(), 1)
+        self.assertEqual(Inscricao.objects.filter(evento=self.evento).count(), 1)
@@ -0,0 +1,97 @@
+"""Throttle da API com estado compartilhado no banco (balde de tokens).
+
+O throttle padrão do DRF guarda o histórico de cada chave no cache; sem
+CACHES configurado isso é um LocMem por processo, então cada worker tinha o
+seu próprio limite e a lista de horários crescia a cada requisição. Aqui cada
+chave (escopo + usuário/IP) é uma linha de `ThrottleBalde` com o saldo de
+tokens e o instante da última atualização. A taxa `N/período` vira um balde
+de capacidade N que se reabastece a N/período tokens por segundo, e consumir
+um token é um único UPDATE condicional. O custo é uma linha por chave e uma
+escrita por requisição, sem corrida entre processos.
+
+As classes mantêm os nomes e o comportamento das do DRF (`ScopedRateThrottle`,
+`UserRateThrottle`); só o armazenamento muda. Se o banco falhar, a requisição
+é permitida (e contada como erro nas métricas).
+"""
+import logging
+import time
+
+from django.db import DatabaseError
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Least
+from django.db.models.lookups import GreaterThanOrEqual
+from rest_framework import throttling
+from .metrics import registry as metrics_registry
+from .models import ThrottleBalde
+
+logger = logging.getLogger(__name__)
+
+
+def consumir(chave, capacidade, periodo, agora=None):
+    """Tenta tirar um token do balde `chave`; devolve `(permitido, espera em segundos)`."""
+    agora = time.time() if agora is None else agora
+    taxa = capacidade / float(periodo)
+    disponivel = Least(
+        Value(float(capacidade)),
+        F('tokens') + (Value(agora) - F('atualizado_em')) * Value(taxa),
+        output_field=FloatField(),
+    )
+    for _ in range(2):
+        # as expressões do SET usam os valores anteriores da linha
+        if ThrottleBalde.objects.filter(GreaterThanOrEqual(disponivel, 1.0), chave=chave).update(
+            tokens=disponivel - 1,
+            atualizado_em=agora,
+            cheio_em=Value(agora) + (Value(float(capacidade)) - disponivel + 1) / Value(taxa),
+        ):
+            return True, None
+        balde, criado = ThrottleBalde.objects.get_or_create(chave=chave, defaults={
+            'tokens': capacidade - 1,
+            'atualizado_em': agora,
+            'cheio_em': agora + 1 / taxa,
+        })
+        if criado:
+            return True, None
+        saldo = min(capacidade, balde.tokens + (agora - balde.atualizado_em) * taxa)
+        if saldo < 1:
+            return False, (1 - saldo) / taxa
+        # reabasteceu entre o UPDATE e a leitura: tenta de novo
+    return False, 1 / taxa
+
+
+def limpar(agora=None):
+    """Apaga baldes já cheios de novo (equivalem a chave sem histórico); devolve quantos."""
+    agora = time.time() if agora is None else agora
+    apagados, _ = ThrottleBalde.objects.filter(cheio_em__lte=agora).delete()
+    return apagados
+
+
+class BaldeThrottleMixin:
+    """Substitui o histórico em cache do `SimpleRateThrottle` por `consumir`."""
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        escopo = getattr(self, 'scope', None) or 'default'
+        try:
+            permitido, self._espera = consumir(self.key, self.num_requests, self.duration)
+        except DatabaseError:
+            logger.warning('Throttle indisponível para %s; requisição permitida.', self.key, exc_info=True)
+            metrics_registry.record_throttle(escopo, 'erro')
+            return True
+        metrics_registry.record_throttle(escopo, 'permitida' if permitido else 'bloqueada')
+        return permitido
+
+    def wait(self):
+        return getattr(self, '_espera', None)
+
+
+class ScopedRateThrottle(throttling.ScopedRateThrottle, BaldeThrottleMixin, throttling.SimpleRateThrottle):
+    # ScopedRateThrottle.allow_request resolve o escopo da view e chama o mixin via super()
+    pass
+
+
+class UserRateThrottle(BaldeThrottleMixin, throttling.UserRateThrottle):
+    pass
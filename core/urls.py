@@ -1,7 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import EventoViewSet, InscricaoViewSet, emitir_certificado_view, api_login, sair, login_view, home, admin_area, admin_event_inscritos, cancelar_inscricao, admin_auditoria, admin_clear_auditoria, download_auditoria_backup, admin_api_overview, admin_api_audits, api_cancel_inscricao, api_confirm_inscricao, api_generate_code, api_cancel_inscricao_as, api_confirm_inscricao_as, api_create_inscricao_as, api_list_event_inscricoes
-from .views import cancelar_minha_inscricao, confirmar_presenca, generate_confirmation_code, confirmar_codigo_participante
+from .views import EventoViewSet, InscricaoViewSet, emitir_certificado_view, api_login, sair, login_view, home, admin_area, admin_event_inscritos, cancelar_inscricao, admin_auditoria, admin_clear_auditoria, download_auditoria_backup, admin_api_overview, admin_api_metrics, admin_api_email_job, admin_api_certificados_job, admin_certificados_zip, admin_api_audits, api_cancel_inscricao, api_confirm_inscricao, api_generate_code, api_cancel_inscricao_as, api_confirm_inscricao_as, api_create_inscricao_as, api_bulk_inscricoes, api_list_event_inscricoes
+from .views import cancelar_minha_inscricao, confirmar_presenca, generate_confirmation_code, confirmar_codigo_participante, vagas_stream
 from .views import register_view, verify_view, profile_view, change_password_view
 from .views import resend_verification
 
@@ -14,6 +14,9 @@ urlpatterns = [
 	path('api/', include(router.urls)),
 	path('admin-api/', admin_api_overview, name='admin_api_overview'),
 	path('admin-api/audits/', admin_api_audits, name='admin_api_audits'),
+	path('admin-api/metrics/', admin_api_metrics, name='admin_api_metrics'),
+	path('admin-api/emails/<str:job_id>/', admin_api_email_job, name='admin_api_email_job'),
+	path('admin-api/certificados/<str:job_id>/', admin_api_certificados_job, name='admin_api_certificados_job'),
 	# APIs internas para admin/testes (casam com UI admin)
 	path('api/internal/inscricoes/<int:insc_id>/cancel/', api_cancel_inscricao, name='api_cancel_inscricao'),
 	path('api/internal/inscricoes/<int:insc_id>/confirm/', api_confirm_inscricao, name='api_confirm_inscricao'),
@@ -21,6 +24,7 @@ urlpatterns = [
 	path('api/internal/inscricoes/<int:insc_id>/cancel-as/', api_cancel_inscricao_as, name='api_cancel_inscricao_as'),
 	path('api/internal/inscricoes/<int:insc_id>/confirm-as/', api_confirm_inscricao_as, name='api_confirm_inscricao_as'),
 	path('api/internal/inscricoes/create-as/', api_create_inscricao_as, name='api_create_inscricao_as'),
+	path('api/internal/inscricoes/bulk/', api_bulk_inscricoes, name='api_bulk_inscricoes'),
 	# endpoints que aceitam evento_id + target_user_id + as_user_id no JSON
 	path('api/internal/inscricoes/cancel-by/', api_cancel_inscricao_as, name='api_cancel_inscricao_by'),
 	path('api/internal/inscricoes/confirm-by/', api_confirm_inscricao_as, name='api_confirm_inscricao_by'),
@@ -29,6 +33,8 @@ urlpatterns = [
 	path('sair/', sair, name='sair'),
 	path('admin-area/', admin_area, name='admin_area'),
 	path('admin-area/inscritos/<int:event_id>/', admin_event_inscritos, name='admin_event_inscritos'),
+	path('admin-area/certificados/zip/', admin_certificados_zip, name='admin_certificados_zip_periodo'),
+	path('admin-area/certificados/<int:event_id>/zip/', admin_certificados_zip, name='admin_certificados_zip'),
 	path('admin-area/auditoria/', admin_auditoria, name='admin_auditoria'),
     path('admin-area/auditoria/clear/', admin_clear_auditoria, name='admin_auditoria_clear'),
 		path('admin-area/auditoria/backup/<str:filename>/', download_auditoria_backup, name='admin_auditoria_backup'),
@@ -44,5 +50,6 @@ urlpatterns = [
 		path('perfil/', profile_view, name='perfil'),
 		path('perfil/alterar-senha/', change_password_view, name='alterar_senha'),
 	path('home/', home, name='home'),
+	path('vagas/stream/', vagas_stream, name='vagas_stream'),
 	path('', login_view),
 ]
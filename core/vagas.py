@@ -0,0 +1,96 @@
+"""Controle atômico de vagas dos eventos.
+
+`Evento.vagas_ocupadas` é mantido com UPDATE condicional dentro de transação,
+de modo que a checagem de vagas é O(1) e duas requisições simultâneas não
+conseguem ocupar a mesma última vaga.
+"""
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from .models import Evento, Inscricao
+
+
+def reservar_vaga(evento_id, quantidade=1):
+    """Ocupa `quantidade` vagas se houver espaço; retorna True se conseguiu."""
+    if not evento_id or quantidade <= 0:
+        return quantidade <= 0
+    updated = Evento.objects.filter(
+        pk=evento_id,
+        vagas_ocupadas__lte=F('vagas') - quantidade,
+    ).update(vagas_ocupadas=F('vagas_ocupadas') + quantidade)
+    return updated == 1
+
+
+def reservar_vagas_disponiveis(evento_id, quantidade):
+    """Ocupa até `quantidade` vagas (o que houver livre); retorna quantas ocupou."""
+    for _ in range(5):
+        row = Evento.objects.filter(pk=evento_id).values_list('vagas', 'vagas_ocupadas').first()
+        if not row:
+            return 0
+        n = min(max(0, row[0] - row[1]), quantidade)
+        if n <= 0:
+            return 0
+        # compare-and-set: só aplica se ninguém alterou o contador nesse meio tempo
+        if Evento.objects.filter(pk=evento_id, vagas_ocupadas=row[1]).update(vagas_ocupadas=F('vagas_ocupadas') + n):
+            return n
+    return 0
+
+
+def liberar_vaga(evento_id, quantidade=1):
+    """Devolve `quantidade` vagas sem deixar o contador negativo."""
+    if not evento_id or quantidade <= 0:
+        return
+    updated = Evento.objects.filter(pk=evento_id, vagas_ocupadas__gte=quantidade).update(
+        vagas_ocupadas=F('vagas_ocupadas') - quantidade
+    )
+    if not updated:
+        Evento.objects.filter(pk=evento_id).update(vagas_ocupadas=0)
+
+
+def criar_inscricao(inscricao):
+    """Salva a inscrição ocupando uma vaga na mesma transação.
+
+    Levanta `ValidationError` se o evento estiver lotado; se o INSERT falhar
+    (ex.: inscrição duplicada) a reserva é desfeita junto com a transação.
+    """
+    with transaction.atomic():
+        if inscricao.evento_id and not reservar_vaga(inscricao.evento_id):
+            raise ValidationError('Vagas esgotadas para este evento.')
+        inscricao.save()
+    return inscricao
+
+
+def remover_inscricao(inscricao):
+    """Remove a inscrição e libera a vaga correspondente."""
+    evento_id = inscricao.evento_id
+    with transaction.atomic():
+        inscricao.delete()
+        liberar_vaga(evento_id)
+
+
+def contagem_real():
+    """Subquery com o número de inscrições de cada evento (para recalcular)."""
+    return Coalesce(
+        Subquery(
+            Inscricao.objects.filter(evento=OuterRef('pk'))
+            .order_by()
+            .values('evento')
+            .annotate(total=Count('id'))
+            .values('total')[:1]
+        ),
+        Value(0),
+    )
+
+
+def divergencias(eventos=None):
+    """Eventos cujo contador difere da contagem real: [(id, contador, real)]."""
+    qs = Evento.objects.all() if eventos is None else eventos
+    qs = qs.annotate(_real=Count('inscricoes')).exclude(vagas_ocupadas=F('_real'))
+    return list(qs.values_list('id', 'vagas_ocupadas', '_real'))
+
+
+def recalcular_vagas(eventos=None):
+    """Recalcula `vagas_ocupadas` a partir das inscrições; retorna linhas afetadas."""
+    qs = Evento.objects.all() if eventos is None else eventos
+    return qs.update(vagas_ocupadas=contagem_real())
@@ -0,0 +1,162 @@
+"""Vagas ao vivo: stream SSE com as vagas restantes dos eventos.
+
+Criar ou remover inscrições (ver `core.signals`) chama `publicar` depois do
+commit. As publicações são agrupadas em janelas de `SSE_INTERVALO` segundos:
+no fim da janela uma única consulta lê as vagas dos eventos alterados e o
+resultado vai para todas as conexões abertas. Assim, uma rajada de 200
+inscrições gera no máximo uma mensagem por janela. Cada conexão também junta
+o que ainda não conseguiu enviar, então um cliente lento recebe só o estado
+mais recente.
+
+O pub/sub é em memória: cada processo só avisa as conexões abertas nele sobre
+as inscrições feitas nele. Com vários workers, cada página ainda recebe o
+estado atual ao conectar (e a cada reconexão); use um único worker ASGI para
+o stream se precisar de todas as mudanças ao vivo.
+
+O stream só funciona no ASGI (`disponivel`): no WSGI o `StreamingHttpResponse`
+tenta consumir o gerador assíncrono inteiro antes de enviar o primeiro byte, e
+ele nunca termina.
+"""
+import asyncio
+import json
+import logging
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connections, transaction
+from .models import Evento
+
+logger = logging.getLogger(__name__)
+
+# eventos aceitos em ?eventos= numa conexão
+MAX_EVENTOS = 200
+
+
+def _config(nome, padrao):
+    return getattr(settings, nome, padrao)
+
+
+def disponivel(request):
+    """Verdadeiro se a requisição veio pelo ASGI (o único que serve o stream)."""
+    return isinstance(request, ASGIRequest)
+
+
+def restantes(evento_ids):
+    """{evento_id: vagas restantes} dos eventos que ainda existem."""
+    linhas = Evento.objects.filter(id__in=list(evento_ids)).values_list('id', 'vagas', 'vagas_ocupadas')
+    return {evento_id: max(0, (vagas or 0) - (ocupadas or 0)) for evento_id, vagas, ocupadas in linhas}
+
+
+class Assinatura:
+    """Uma conexão SSE: acumula as vagas recebidas até o stream enviá-las."""
+
+    def __init__(self, eventos=None):
+        self.loop = asyncio.get_running_loop()
+        self.eventos = eventos
+        self._estado = {}
+        self._lock = threading.Lock()
+        self._sinal = asyncio.Event()
+
+    def entregar(self, vagas):
+        # chamado na thread do Canal; o sinal é ligado no loop da conexão
+        if self.eventos is not None:
+            vagas = {k: v for k, v in vagas.items() if k in self.eventos}
+        if not vagas:
+            return
+        with self._lock:
+            self._estado.update(vagas)
+        try:
+            self.loop.call_soon_threadsafe(self._sinal.set)
+        except RuntimeError:
+            # loop já encerrado (conexão fechando)
+            pass
+
+    async def proximo(self, timeout):
+        """Vagas pendentes, ou None se nada chegou em `timeout` segundos."""
+        try:
+            await asyncio.wait_for(self._sinal.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        self._sinal.clear()
+        with self._lock:
+            estado, self._estado = self._estado, {}
+        return estado
+
+
+class Canal:
+    """Pub/sub do processo: junta os eventos alterados e despacha por janela."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._assinaturas = set()
+        self._pendentes = set()
+        self._timer = None
+
+    def assinar(self, eventos=None):
+        assinatura = Assinatura(eventos)
+        with self._lock:
+            self._assinaturas.add(assinatura)
+        return assinatura
+
+    def cancelar(self, assinatura):
+        with self._lock:
+            self._assinaturas.discard(assinatura)
+
+    def publicar(self, evento_ids):
+        with self._lock:
+            if not self._assinaturas:
+                # ninguém conectado: nem consulta o banco
+                return
+            self._pendentes.update(i for i in evento_ids if i)
+            if self._timer is None and self._pendentes:
+                self._timer = threading.Timer(float(_config('SSE_INTERVALO', 0.5)), self._despachar)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _despachar(self):
+        with self._lock:
+            ids, self._pendentes = self._pendentes, set()
+            self._timer = None
+            assinaturas = list(self._assinaturas)
+        if not ids or not assinaturas:
+            return
+        try:
+            vagas = restantes(ids)
+        except Exception:
+            logger.exception('Falha ao ler as vagas de %d evento(s) para o stream.', len(ids))
+            return
+        finally:
+            connections.close_all()
+        for assinatura in assinaturas:
+            assinatura.entregar(vagas)
+
+
+canal = Canal()
+
+
+def publicar(evento_ids):
+    """Avisa as conexões abertas sobre mudança de vagas, depois do commit."""
+    ids = [i for i in evento_ids if i]
+    if ids:
+        transaction.on_commit(lambda: canal.publicar(ids))
+
+
+def _mensagem(vagas):
+    return f"event: vagas\ndata: {json.dumps({str(k): v for k, v in vagas.items()})}\n\n"
+
+
+async def stream(eventos=None):
+    """Gerador assíncrono do `text/event-stream` (estado inicial, mudanças e keepalive)."""
+    assinatura = canal.assinar(eventos)
+    try:
+        yield f"retry: {int(_config('SSE_RECONEXAO_MS', 3000))}\n\n"
+        if eventos:
+            # a página pode ter sido montada a partir do feed em cache
+            yield _mensagem(await sync_to_async(restantes)(eventos))
+        while True:
+            vagas = await assinatura.proximo(float(_config('SSE_KEEPALIVE', 15)))
+            yield _mensagem(vagas) if vagas else ': keepalive\n\n'
+    finally:
+        canal.cancelar(assinatura)
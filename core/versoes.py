@@ -0,0 +1,68 @@
+"""Contadores de versão da API de eventos (ETag / If-None-Match).
+
+Há um contador global (`eventos`, muda com qualquer evento ou inscrição) e um
+por evento (`evento:<id>`). Os contadores ficam numa tabela (`VersaoRecurso`)
+e não no cache: sem cache compartilhado entre processos, um contador em
+memória deixaria workers diferentes respondendo 304 com dados antigos.
+
+`incrementar` é chamado pelos signals de `Evento`/`Inscricao` (ver
+`core.signals`) e nos pontos que gravam sem signals (`bulk_create`,
+`update`). O incremento roda depois do commit, num UPDATE curto, para não
+segurar a linha do contador global durante a transação de quem grava.
+
+`reservar` é o oposto: numera as alterações de `Evento` (cursor de
+`core.sincronizacao`) dentro da transação de quem grava, que segura a linha
+da sequência até o commit; assim a numeração segue a ordem dos commits.
+"""
+import hashlib
+
+from django.db import transaction
+from django.db.models import F
+from .models import VersaoRecurso
+
+GLOBAL = 'eventos'
+SEQUENCIA = 'eventos:sequencia'
+
+
+def chave_evento(evento_id):
+    return f'evento:{evento_id}'
+
+
+def _aplicar(chaves):
+    atualizadas = VersaoRecurso.objects.filter(chave__in=chaves).update(versao=F('versao') + 1)
+    if atualizadas < len(chaves):
+        existentes = set(VersaoRecurso.objects.filter(chave__in=chaves).values_list('chave', flat=True))
+        VersaoRecurso.objects.bulk_create(
+            [VersaoRecurso(chave=c, versao=1) for c in chaves if c not in existentes],
+            ignore_conflicts=True,
+        )
+
+
+def incrementar(evento_ids=()):
+    """Incrementa a versão global e a de cada evento de `evento_ids` após o commit."""
+    chaves = [GLOBAL] + sorted({chave_evento(i) for i in evento_ids if i})
+    transaction.on_commit(lambda: _aplicar(chaves))
+
+
+def reservar(n=1, chave=SEQUENCIA):
+    """Reserva `n` números consecutivos da sequência `chave`; devolve um `range`."""
+    with transaction.atomic():
+        if not VersaoRecurso.objects.filter(chave=chave).update(versao=F('versao') + n):
+            VersaoRecurso.objects.get_or_create(chave=chave)
+            VersaoRecurso.objects.filter(chave=chave).update(versao=F('versao') + n)
+        fim = VersaoRecurso.objects.filter(chave=chave).values_list('versao', flat=True).get()
+    return range(fim - n + 1, fim + 1)
+
+
+def versao(chave):
+    return VersaoRecurso.objects.filter(chave=chave).values_list('versao', flat=True).first() or 0
+
+
+def etag(chave, *variacoes):
+    """ETag forte da versão atual de `chave`, distinto para cada combinação de `variacoes`.
+
+    As variações são o que muda a representação sem mudar os dados (URL com
+    filtros/paginação, host das URLs absolutas, formato da resposta).
+    """
+    base = '\n'.join([chave, str(versao(chave))] + [str(v) for v in variacoes])
+    return f'"{hashlib.sha256(base.encode("utf-8")).hexdigest()[:32]}"'
@@ -2,19 +2,19 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.utils.dateparse import parse_datetime
 from django.core.files.uploadedfile import UploadedFile
-from django.http import HttpResponseForbidden, JsonResponse, FileResponse, Http404
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse, FileResponse, Http404, StreamingHttpResponse
 from django.utils import timezone
 import logging
 import json
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action, api_view, permission_classes, throttle_classes
 from rest_framework.response import Response
-from rest_framework.throttling import UserRateThrottle, ScopedRateThrottle
-from rest_framework.authtoken.models import Token
 from django.contrib.auth import logout, authenticate, login
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from django.db.models import Q
+from django.db import IntegrityError
+from django.core.exceptions import ValidationError
 from .models import Evento, Inscricao, Auditoria
 from django.db.models import Count
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
@@ -24,6 +24,8 @@ from django.utils import timezone as dj_timezone
 from django.utils.timezone import make_aware, get_current_timezone
 from django.views.decorators.csrf import csrf_exempt, csrf_protect
 from django.views.decorators.cache import never_cache
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 from django.core.mail import send_mail, EmailMultiAlternatives
 from django.template.loader import render_to_string
 from django.conf import settings
@@ -31,9 +33,26 @@ import os
 from django.contrib.sites.shortcuts import get_current_site
 from django.templatetags.static import static
 import secrets, string
+import re
+import uuid
 from datetime import timedelta
+from asgiref.sync import sync_to_async
 from django.utils import timezone as dj_tz
-from .audit import log_audit
+from .audit import log_audit, log_audit_many, flush_audit
+from .audit_export import filtrar_auditoria, exportar_response, arquivados, ResultadoAuditoria
+from .audit_archive import arquivar
+from .audit_schema import ACOES
+from itertools import islice
+from . import lote
+from .vagas import criar_inscricao, remover_inscricao
+from .roles import get_roles, is_staff_like, is_organizador_or_superuser
+from .metrics import registry as metrics_registry
+from .throttling import UserRateThrottle, ScopedRateThrottle
+from .autenticacao import token_para
+from .feed import pagina_feed, inscricoes_usuario
+from .replica import LeituraReplicaMixin, ler_da_replica
+from . import outbox
+from . import certificados, certificados_zip, imagens, sincronizacao, streaming, vagas_ao_vivo, versoes
 
 User = get_user_model()
 
@@ -46,28 +65,85 @@ class InscricaoRateThrottle(UserRateThrottle):
     scope = 'inscricao'
 
 
-class EventoViewSet(viewsets.ReadOnlyModelViewSet):
+class EventoViewSet(LeituraReplicaMixin, viewsets.ReadOnlyModelViewSet):
     # adiciona contagem de inscrições aos eventos para uso do serializer/UI
-    queryset = Evento.objects.all().annotate(inscricoes_count=Count('inscricoes'))
+    queryset = Evento.objects.select_related('responsavel').annotate(inscricoes_count=Count('inscricoes')).order_by('data_inicio', 'id')
     serializer_class = EventoSerializer
     permission_classes = [permissions.IsAuthenticated]
     throttle_classes = [ScopedRateThrottle]
     throttle_scope = 'event-list'
+    # ordenação usada no modo ?pagination=cursor (core.pagination)
+    cursor_ordering = ('data_inicio', 'id')
+
+    def _condicional(self, request, chave):
+        """ETag da versão atual e, se o cliente já a tem, o 304 (sem consulta nem serializer).
+
+        Roda depois de `initial()`: autenticação, permissões e throttle já foram aplicados.
+        """
+        etag = versoes.etag(chave, request.get_full_path(), request.get_host(), request.accepted_media_type)
+        resposta = get_conditional_response(request, etag=etag)
+        if resposta is not None:
+            resposta['ETag'] = etag
+            patch_cache_control(resposta, private=True, no_cache=True)
+        return etag, resposta
+
+    def _com_etag(self, response, etag):
+        if response.status_code == 200:
+            response['ETag'] = etag
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
 
     def list(self, request, *args, **kwargs):
         if request.user.is_authenticated:
             log_audit(request.user, 'Consulta API', 'Listou eventos via API')
-        return super().list(request, *args, **kwargs)
+        etag, nao_modificado = self._condicional(request, versoes.GLOBAL)
+        if nao_modificado is not None:
+            return nao_modificado
+        return self._com_etag(super().list(request, *args, **kwargs), etag)
     
     def retrieve(self, request, *args, **kwargs):
         # registra acesso a evento via API
+        pk = kwargs.get('pk') or (args[0] if args else None)
         if request.user.is_authenticated:
-            pk = kwargs.get('pk') or (args[0] if args else None)
             try:
-                log_audit(request.user, 'Consulta API', f'Requisitou evento id={pk}')
+                log_audit(request.user, 'Consulta API', f'Requisitou evento id={pk}', evento=pk)
             except Exception:
                 pass
-        return super().retrieve(request, *args, **kwargs)
+        etag, nao_modificado = self._condicional(request, versoes.chave_evento(pk))
+        if nao_modificado is not None:
+            return nao_modificado
+        return self._com_etag(super().retrieve(request, *args, **kwargs), etag)
+
+    @action(detail=False, url_path='changes')
+    def changes(self, request):
+        """Delta sync: events changed and ids deleted after `?since=<cursor>` (core.sincronizacao).
+
+        Start with `since=0` (full sync, no tombstones); keep the returned
+        `cursor` and repeat while `has_more`. 410 means the cursor is older
+        than the tombstone retention and the client must sync from 0 again.
+        """
+        if request.user.is_authenticated:
+            log_audit(request.user, 'Consulta API', 'Sincronizou eventos via API')
+        try:
+            desde = sincronizacao.cursor(request.query_params.get('since'))
+            limite = int(request.query_params.get('page_size') or getattr(settings, 'SYNC_PAGE_SIZE', 100))
+        except ValueError:
+            return Response({'error': 'Parâmetros since/page_size inválidos.'}, status=status.HTTP_400_BAD_REQUEST)
+        limite = max(1, min(limite, getattr(settings, 'API_MAX_PAGE_SIZE', 100)))
+        etag, nao_modificado = self._condicional(request, versoes.GLOBAL)
+        if nao_modificado is not None:
+            return nao_modificado
+        try:
+            alterados, removidos, cursor, mais = sincronizacao.alteracoes(self.get_queryset(), desde, limite)
+        except sincronizacao.CursorExpirado:
+            return Response({'error': 'Cursor expirado; sincronize novamente com since=0.', 'reset': True}, status=status.HTTP_410_GONE)
+        data = {
+            'cursor': str(cursor),
+            'has_more': mais,
+            'changed': self.get_serializer(alterados, many=True).data,
+            'deleted': removidos,
+        }
+        return self._com_etag(Response(data), etag)
 
 
 class InscricaoViewSet(viewsets.ModelViewSet):
@@ -77,9 +153,10 @@ class InscricaoViewSet(viewsets.ModelViewSet):
     throttle_classes = [ScopedRateThrottle]
     throttle_scope = 'inscricao'
     http_method_names = ['post', 'get']
+    cursor_ordering = ('data_inscricao', 'id')
 
     def get_queryset(self):
-        return Inscricao.objects.filter(participante=self.request.user)
+        return Inscricao.objects.filter(participante=self.request.user).order_by('data_inscricao', 'id')
 
     def list(self, request, *args, **kwargs):
         if request.user.is_authenticated:
@@ -98,7 +175,7 @@ class InscricaoViewSet(viewsets.ModelViewSet):
         else:
             evento_id = request.POST.get('evento')
         # organizador não pode se inscrever: checa permissão primeiro
-        if request.user.groups.filter(name='Organizador').exists():
+        if get_roles(request.user).is_organizador:
             accept = request.META.get('HTTP_ACCEPT', '')
             msg = 'Você faz parte do grupo Organizador e não pode se inscrever em eventos. Use uma conta de Aluno/Professor ou entre em contato com o administrador.'
             if 'text/html' in accept:
@@ -162,11 +239,14 @@ class InscricaoViewSet(viewsets.ModelViewSet):
                         ev_name = ev_obj.nome if ev_obj else ''
                     except Exception:
                         ev_name = ''
-                    log_audit(request.user, 'Inscrição criada', f'Inscrição id={insc_id} evento_id={evento_id} evento_name="{ev_name}"')
+                    log_audit(request.user, 'Inscrição criada', f'Inscrição id={insc_id} evento_id={evento_id} evento_name="{ev_name}"', inscricao=insc_id, evento=evento_id, alvo=request.user)
             except Exception:
                 pass
             return resp
         except Exception as e:
+            # vagas esgotadas / duplicidade (ValidationError do modelo) -> 400
+            if isinstance(e, ValidationError):
+                return Response({'error': ' '.join(e.messages)}, status=status.HTTP_400_BAD_REQUEST)
             # Se o serializer levantou erro de permissão, retorna mensagem amigável
             from rest_framework.exceptions import PermissionDenied as DRFPerm
             if isinstance(e, DRFPerm) or (hasattr(e, 'detail') and 'Organizador' in str(e)):
@@ -183,11 +263,26 @@ class InscricaoViewSet(viewsets.ModelViewSet):
 
 
 @login_required
+@ler_da_replica
 def emitir_certificado_view(request, inscricao_id):
-    inscricao = get_object_or_404(Inscricao, id=inscricao_id)
+    inscricao = get_object_or_404(Inscricao.objects.select_related('participante', 'evento'), id=inscricao_id)
     # só mostra se certificado existir
     if not inscricao.certificado_gerado:
         return HttpResponseForbidden('Certificado ainda não disponível.')
+    # documento pré-renderizado (HTML ou ?formato=pdf), endereçado pelo snapshot
+    formato = 'pdf' if request.GET.get('formato') == 'pdf' else 'html'
+    doc = certificados.documento(inscricao, formato)
+    # revalidação (If-None-Match/If-Modified-Since): 304 sem reabrir o arquivo nem auditar
+    resp = get_conditional_response(request, etag=doc.etag, last_modified=int(doc.modificado.timestamp()))
+    if resp is None:
+        resp = FileResponse(open(doc.caminho, 'rb'), content_type=doc.content_type)
+        if formato == 'pdf':
+            resp['Content-Disposition'] = f'inline; filename="certificado-{inscricao.id}.pdf"'
+    resp['ETag'] = doc.etag
+    resp['Last-Modified'] = http_date(doc.modificado.timestamp())
+    patch_cache_control(resp, private=True, no_cache=True)
+    if resp.status_code != 200:
+        return resp
     # registra visualização/download do certificado
     try:
         usuario = request.user if request.user.is_authenticated else None
@@ -195,47 +290,39 @@ def emitir_certificado_view(request, inscricao_id):
             participante_name = (inscricao.participante.get_full_name() or inscricao.participante.username) if inscricao.participante else None
         except Exception:
             participante_name = None
-        log_audit(usuario, 'Visualizou/Baixou certificado', f'Inscrição id={inscricao.id} participante_id={inscricao.participante_id} participante_name="{participante_name}"')
+        log_audit(usuario, 'Visualizou/Baixou certificado', f'Inscrição id={inscricao.id} participante_id={inscricao.participante_id} participante_name="{participante_name}"', inscricao=inscricao, evento=inscricao.evento_id, alvo=inscricao.participante_id, dados={'formato': formato})
     except Exception:
         pass
-    return render(request, 'core/certificado.html', {'inscricao': inscricao, 'data_atual': timezone.now()})
+    return resp
 
 
 @never_cache
+@ler_da_replica
 def home(request):
     if not request.user.is_authenticated:
         return redirect('login')
-    inscricoes = Inscricao.objects.filter(participante=request.user)
-    eventos_qs = Evento.objects.all().annotate(inscricoes_count=Count('inscricoes')).order_by('data_inicio')
-    inscricao_event_ids = list(inscricoes.values_list('evento_id', flat=True))
-
-    # paginação no servidor (param page via GET)
-    page_num = request.GET.get('page', 1)
-    paginator = Paginator(eventos_qs, 6)  # 6 per page to match API PAGE_SIZE
-    try:
-        page_obj = paginator.page(page_num)
-    except PageNotAnInteger:
-        page_obj = paginator.page(1)
-    except EmptyPage:
-        page_obj = paginator.page(paginator.num_pages)
+    # feed compartilhado (cache versionado) + inscrições do usuário (core.feed)
+    inscricoes = inscricoes_usuario(request.user)
+    inscricao_event_ids = {ins.evento_id for ins in inscricoes if ins.evento_id}
+    page_obj = pagina_feed(request.GET.get('page', 1))
 
     feed_events = []
-    for evento in page_obj.object_list:
-        inscritos_count = getattr(evento, 'inscricoes_count', None)
-        if inscritos_count is None:
-            inscritos_count = evento.inscricoes.count()
-        remaining = max(0, evento.vagas - inscritos_count)
+    for evento, remaining in page_obj.items:
         is_inscrito = evento.id in inscricao_event_ids
         feed_events.append({'evento': evento, 'remaining': remaining, 'is_inscrito': is_inscrito})
+    # grupos carregados uma única vez (core.roles)
+    roles = get_roles(request.user)
     response = render(request, 'core/index.html', {
         'inscricoes': inscricoes,
         'feed_events': feed_events,
         'page_obj': page_obj,
-        'show_admin': request.user.is_authenticated and (request.user.is_staff or request.user.is_superuser or request.user.groups.filter(name__in=['Professor', 'Organizador']).exists()),
-        'user_inscricoes_event_ids': list(inscricoes.values_list('evento_id', flat=True)),
-        'is_organizador': request.user.groups.filter(name='Organizador').exists(),
-        'is_professor': request.user.groups.filter(name='Professor').exists(),
+        'show_admin': roles.is_staff_like,
+        'user_inscricoes_event_ids': list(inscricao_event_ids),
+        'is_organizador': roles.is_organizador,
+        'is_professor': roles.is_professor,
         'now': timezone.now(),
+        # o script do stream de vagas só entra na página servida pelo ASGI
+        'vagas_ao_vivo': vagas_ao_vivo.disponivel(request),
     })
     # evita cache da página autenticada
     response['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
@@ -243,6 +330,30 @@ def home(request):
     return response
 
 
+async def vagas_stream(request):
+    """Server-sent events with remaining seats (core.vagas_ao_vivo).
+
+    `?eventos=1,2,3` limits the stream to the events on the page. Only served
+    by the ASGI entry point (setup/asgi.py): under WSGI the endless async
+    generator would never send a byte and would hold a worker thread forever,
+    so the view answers 204, which tells EventSource not to reconnect.
+    """
+    if not vagas_ao_vivo.disponivel(request):
+        return HttpResponse(status=204)
+    autenticado = await sync_to_async(lambda: request.user.is_authenticated)()
+    if not autenticado:
+        return HttpResponseForbidden('Autenticação necessária.')
+    eventos = None
+    ids = [p for p in (request.GET.get('eventos') or '').split(',') if p.strip().isdigit()]
+    if ids:
+        eventos = {int(p) for p in ids[:vagas_ao_vivo.MAX_EVENTOS]}
+    response = StreamingHttpResponse(vagas_ao_vivo.stream(eventos), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # proxies (nginx) não devem segurar os pedaços do stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 def sair(request):
     try:
         user = request.user if request.user.is_authenticated else None
@@ -256,11 +367,11 @@ def sair(request):
 @login_required
 def admin_area(request):
     # se usuário não tem acesso admin, mostra aviso com botão voltar
-    if not (request.user.is_staff or request.user.is_superuser or request.user.groups.filter(name__in=['Professor', 'Organizador']).exists()):
+    if not get_roles(request.user).is_staff_like:
         return render(request, 'core/admin_no_access.html', {})
     # área admin simples com estatísticas rápidas
     # Professores veem só eventos que criaram
-    if request.user.groups.filter(name='Professor').exists():
+    if get_roles(request.user).is_professor:
         recent_events = Evento.objects.filter(responsavel=request.user).order_by('-data_inicio')[:12]
         total_eventos = Evento.objects.filter(responsavel=request.user).count()
         # Professores veem inscrições só dos seus eventos
@@ -272,10 +383,10 @@ def admin_area(request):
         total_inscricoes = Inscricao.objects.filter(evento__isnull=False).count()
 
     # define quem pode criar eventos: Organizadores e staff (exclui Professores)
-    can_create = request.user.groups.filter(name='Organizador').exists() or (request.user.is_staff and not request.user.groups.filter(name='Professor').exists())
+    can_create = get_roles(request.user).is_organizador or (request.user.is_staff and not get_roles(request.user).is_professor)
 
     # opções de responsável: organizador vê Professores para atribuir
-    if request.user.groups.filter(name='Organizador').exists():
+    if get_roles(request.user).is_organizador:
         responsaveis = User.objects.filter(groups__name='Professor').distinct().order_by('first_name')
     else:
         # staff pode escolher outros staff (exclui superuser puro salvo se organizador)
@@ -286,7 +397,7 @@ def admin_area(request):
     if request.method == 'POST':
         # bloqueia criar/editar/remover para Professores
         
-        if request.user.groups.filter(name='Professor').exists() and request.POST.get('action') in ('create_event','edit_event','delete_event'):
+        if get_roles(request.user).is_professor and request.POST.get('action') in ('create_event','edit_event','delete_event'):
             message = 'Ação não permitida: professores não podem criar/editar/remover eventos.'
             message_type = 'danger'
         else:
@@ -302,6 +413,7 @@ def admin_area(request):
                 except Exception:
                     vagas = 0
                 banner = request.FILES.get('banner')
+                erro_banner = imagens.erro_imagem(banner) if isinstance(banner, UploadedFile) else None
 
                 # detecta AJAX para retornar erros em JSON
                 is_ajax = (
@@ -314,6 +426,9 @@ def admin_area(request):
                 if not nome or not descricao or not data_inicio_raw or not data_fim_raw or not local or not banner:
                     message = 'Todos os campos são obrigatórios, incluindo o banner.'
                     message_type = 'danger'
+                elif erro_banner:
+                    message = erro_banner
+                    message_type = 'danger'
                 else:
                     # parseia datas e aplica timezone
                     from datetime import datetime
@@ -406,7 +521,7 @@ def admin_area(request):
                                 if banner_url:
                                     created_lines.append(f"banner_url: {banner_url}")
                                 details_txt = "\n".join(created_lines)
-                                log_audit(request.user, 'Criou evento', details_txt)
+                                log_audit(request.user, 'Criou evento', details_txt, evento=evento)
                             except Exception:
                                 pass
                             # se AJAX, retorna JSON com dados do evento e contagens
@@ -417,7 +532,7 @@ def admin_area(request):
                             )
                             if is_ajax:
                                 # recomputa totais como no topo da view
-                                if request.user.groups.filter(name='Professor').exists():
+                                if get_roles(request.user).is_professor:
                                     total_eventos = Evento.objects.filter(responsavel=request.user).count()
                                     total_inscricoes = Inscricao.objects.filter(evento__responsavel=request.user).count()
                                 else:
@@ -468,6 +583,7 @@ def admin_area(request):
                     except Exception:
                         vagas = evento_obj.vagas
                     banner = request.FILES.get('banner')
+                    erro_banner = imagens.erro_imagem(banner) if isinstance(banner, UploadedFile) else None
 
                     from datetime import datetime
                     def parse_dt_local(s):
@@ -498,6 +614,9 @@ def admin_area(request):
                     if not nome or not descricao or not data_inicio or not data_fim or not local:
                         message = 'Todos os campos são obrigatórios (banner pode ficar inalterado no edit).'
                         message_type = 'danger'
+                    elif erro_banner:
+                        message = erro_banner
+                        message_type = 'danger'
                     else:
                         if data_fim <= data_inicio:
                             message = 'Datas inválidas: fim deve ser posterior ao início.'
@@ -566,7 +685,7 @@ def admin_area(request):
                                         diffs.append(f"banner_old: {old_banner_url}")
                                         diffs.append(f"banner_new: {new_banner_url}")
                                     details = "\n".join(diffs) if diffs else f'Evento id={evento_obj.id} sem alterações detectadas.'
-                                    log_audit(request.user, 'Editou evento', f'Evento id={evento_obj.id}\n{details}')
+                                    log_audit(request.user, 'Editou evento', f'Evento id={evento_obj.id}\n{details}', evento=evento_obj)
                                 except Exception:
                                     pass
                                 # se AJAX, retorna JSON com evento atualizado e contagens
@@ -576,7 +695,7 @@ def admin_area(request):
                                     or 'application/json' in request.META.get('HTTP_ACCEPT', '')
                                 )
                                 if is_ajax:
-                                    if request.user.groups.filter(name='Professor').exists():
+                                    if get_roles(request.user).is_professor:
                                         total_eventos = Evento.objects.filter(responsavel=request.user).count()
                                         total_inscricoes = Inscricao.objects.filter(evento__responsavel=request.user).count()
                                     else:
@@ -626,7 +745,7 @@ def admin_area(request):
                     message_type = 'success'
                     # registra auditoria da remoção do evento
                     try:
-                        log_audit(request.user, 'Removeu evento', f'Evento id={_ev_id} nome="{_ev_nome}"')
+                        log_audit(request.user, 'Removeu evento', f'Evento id={_ev_id} nome="{_ev_nome}"', evento=_ev_id)
                     except Exception:
                         pass
                     # se AJAX, retorna JSON com totais atualizados
@@ -636,7 +755,7 @@ def admin_area(request):
                         or 'application/json' in request.META.get('HTTP_ACCEPT', '')
                     )
                     if is_ajax:
-                        if request.user.groups.filter(name='Professor').exists():
+                        if get_roles(request.user).is_professor:
                             total_eventos = Evento.objects.filter(responsavel=request.user).count()
                             total_inscricoes = Inscricao.objects.filter(evento__responsavel=request.user).count()
                         else:
@@ -652,7 +771,7 @@ def admin_area(request):
     # refresh (already computed above)
 
     # mostra botão de auditoria para Organizadores e superusers
-    show_audit_button = request.user.groups.filter(name='Organizador').exists() or request.user.is_superuser
+    show_audit_button = get_roles(request.user).is_organizador or request.user.is_superuser
 
     return render(request, 'core/admin_area.html', {
         'total_eventos': total_eventos,
@@ -670,7 +789,7 @@ def admin_area(request):
     ):
         try:
             # recomputa totais para a resposta
-            if request.user.groups.filter(name='Professor').exists():
+            if get_roles(request.user).is_professor:
                 total_eventos = Evento.objects.filter(responsavel=request.user).count()
                 total_inscricoes = Inscricao.objects.filter(evento__responsavel=request.user).count()
             else:
@@ -684,56 +803,36 @@ def admin_area(request):
 
 
 @login_required
-@user_passes_test(lambda u: u.groups.filter(name='Organizador').exists() or u.is_superuser)
+@user_passes_test(is_organizador_or_superuser)
+@ler_da_replica
 def admin_auditoria(request):
     # Auditoria list with filtering and pagination for Organizadores and superusers
-    qs = Auditoria.objects.select_related('usuario').order_by('-data_hora')
-
-    # filters: action, usuario (id or username), date_from, date_to
-    action_q = (request.GET.get('action') or '').strip()
-    usuario_q = (request.GET.get('usuario') or '').strip()
-    date_from = (request.GET.get('date_from') or '').strip()
-    date_to = (request.GET.get('date_to') or '').strip()
-
-    if action_q:
-        qs = qs.filter(acao__icontains=action_q)
-    if usuario_q:
-        # allow datalist values like "1 - Full Name" or plain id/username
-        import re
-        m = re.match(r'^\s*(\d+)', usuario_q)
-        if m:
-            qs = qs.filter(usuario__id=int(m.group(1)))
-        else:
-            qs = qs.filter(usuario__username__icontains=usuario_q)
-    from datetime import datetime, timedelta
+    # filters: action, usuario (id or username), date_from, date_to, exclude_access
+    qs, filtros = filtrar_auditoria(request.GET)
+    action_q, usuario_q = filtros['action'], filtros['usuario']
+    date_from, date_to = filtros['date_from'], filtros['date_to']
+    exclude_access_flag = filtros['exclude_access']
+
+    # record audit access of the auditoria (unless excluded explicitly)
     try:
-        if date_from:
-            dt = datetime.strptime(date_from, '%Y-%m-%d')
-            qs = qs.filter(data_hora__gte=dt)
-        if date_to:
-            dt2 = datetime.strptime(date_to, '%Y-%m-%d') + timedelta(days=1)
-            qs = qs.filter(data_hora__lt=dt2)
+        if not exclude_access_flag:
+            log_audit(request.user, 'Acesso Auditoria', f'Visualizou auditoria (filtros: q={filtros["q"]} action={action_q} usuario={usuario_q} date_from={date_from} date_to={date_to})')
     except Exception:
-        # ignore parse errors and continue unfiltered by date
         pass
 
-    # optional: exclude access/view logs (to avoid self-noise)
-    # optional: exclude access/view logs (to avoid self-noise)
-    # default behaviour: when the page is first visited (no GET params) hide access logs.
-    # If the user submitted the filters (request.GET present) and didn't include the checkbox,
-    # treat that as the user explicitly unchecking it. If the checkbox key is present, use its value.
-    if 'exclude_access' in request.GET:
-        exclude_access_flag = request.GET.get('exclude_access') in ('1', 'true', 'on')
-    else:
-        exclude_access_flag = True if not request.GET else False
-    if exclude_access_flag:
-        qs = qs.exclude(acao__icontains='Acesso Auditoria')
-        qs = qs.exclude(acao__icontains='Visualizou Auditoria')
+    # download of the currently filtered results (txt, csv or jsonl; &gzip=1 compresses),
+    # streamed in chunks so large exports don't build the file in memory
+    fmt = request.GET.get('download')
+    if fmt in ('txt', 'csv', 'jsonl'):
+        comprimir = request.GET.get('gzip') in ('1', 'true')
+        return exportar_response(request, qs, fmt, comprimir, extra=arquivados(filtros))
 
-    # pagination
+    # pagination (when the date filter reaches archived periods, their entries
+    # come after the ones still in the table)
     from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
     page_num = request.GET.get('page', 1)
-    paginator = Paginator(qs, 50)
+    resultado = ResultadoAuditoria(qs, filtros)
+    paginator = Paginator(resultado, 50)
     try:
         page_obj = paginator.page(page_num)
     except PageNotAnInteger:
@@ -743,29 +842,6 @@ def admin_auditoria(request):
 
     auditorias = page_obj.object_list
 
-    # record audit access of the auditoria (unless excluded explicitly)
-    try:
-        if not exclude_access_flag:
-            log_audit(request.user, 'Acesso Auditoria', f'Visualizou auditoria (filtros: action={action_q} usuario={usuario_q} date_from={date_from} date_to={date_to})')
-    except Exception:
-        pass
-
-    # support download as plain text of currently filtered results
-    if request.GET.get('download') == 'txt':
-        lines = []
-        for a in qs.order_by('-data_hora')[:1000]:
-            user_repr = f"{a.usuario.get_full_name() or a.usuario.username} (id:{a.usuario.id})" if a.usuario else '-'
-            try:
-                ts = a.data_hora.strftime('%d/%m/%Y %H:%M:%S')
-            except Exception:
-                ts = str(a.data_hora)
-            lines.append(f"{ts}\t{user_repr}\t{a.acao}\t{a.detalhes}")
-        content = '\n'.join(lines)
-        from django.http import HttpResponse
-        resp = HttpResponse(content, content_type='text/plain; charset=utf-8')
-        resp['Content-Disposition'] = 'attachment; filename="auditoria.txt"'
-        return resp
-
     # build base query string without page for pagination links
     from urllib.parse import urlencode
     params = request.GET.copy()
@@ -773,9 +849,8 @@ def admin_auditoria(request):
         params.pop('page')
     base_qs = params.urlencode()
 
-    action_choices = [
-        'Consulta API','Inscrição criada','API Login','Visualizou/Baixou certificado','Logout','Criou evento','Editou evento','Removeu evento','Acesso Auditoria','Cancelou inscrição','Confirmou presença','Gerou certificado','Revogou presença','Confirmou presença (por código)','Cancelou inscrição (usuário)','Login','Criação de Usuário','Acesso Inscritos','Gerou código de confirmação','Alterou senha','Reenviou verificação'
-    ]
+    # (codigo, rótulo) from the action catalog (core.audit_schema)
+    action_choices = sorted(ACOES.items(), key=lambda item: item[1])
     # provide user list for the usuario filter datalist
     users = User.objects.order_by('first_name', 'username').all()
 
@@ -783,60 +858,41 @@ def admin_auditoria(request):
         'auditorias': auditorias,
         'page_obj': page_obj,
         'base_qs': base_qs,
-        'filters': {'action': action_q, 'usuario': usuario_q, 'date_from': date_from, 'date_to': date_to, 'exclude_access': exclude_access_flag},
+        'filters': filtros,
+        'arquivados': len(resultado.arquivados),
+        'arquivados_truncado': resultado.truncado,
         'action_choices': action_choices,
         'users': users,
         'media_url': getattr(settings, 'MEDIA_URL', '/media/')
     })
 
 
-@user_passes_test(lambda u: u.is_staff or u.is_superuser or u.groups.filter(name__in=['Professor','Organizador']).exists())
+@user_passes_test(is_staff_like)
 @csrf_protect
 def admin_clear_auditoria(request):
     if request.method != 'POST':
         return HttpResponseForbidden('Método inválido')
-    # create a TXT backup of current auditoria, save it to media/auditoria_backups, create a backup log entry (undeletable), then delete other entries
+    # move every current entry to the compressed archive (core.audit_archive) instead of
+    # deleting it; archived periods stay searchable through the date filters
+    # grava antes os registros ainda na fila do writer para entrarem no arquivo
+    flush_audit()
     try:
-        qs_all = Auditoria.objects.order_by('data_hora').all()
-        lines = []
-        for a in qs_all:
-            user_repr = f"{a.usuario.get_full_name() or a.usuario.username} (id:{a.usuario.id})" if a.usuario else '-'
-            try:
-                ts = a.data_hora.strftime('%d/%m/%Y %H:%M:%S')
-            except Exception:
-                ts = str(a.data_hora)
-            lines.append(f"{ts}\t{user_repr}\t{a.acao}\t{a.detalhes}")
-        content = '\n'.join(lines)
-        # ensure folder exists
-        backup_dir = os.path.join(settings.MEDIA_ROOT or 'media', 'auditoria_backups')
-        os.makedirs(backup_dir, exist_ok=True)
-        import datetime
-        fname = f"auditoria_backup_{datetime.datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}.txt"
-        fpath = os.path.join(backup_dir, fname)
-        with open(fpath, 'w', encoding='utf-8') as fh:
-            fh.write(content)
-        # store only filename in backup log (we'll provide a download view)
-        try:
-            backup_log = Auditoria.objects.create(usuario=request.user if request.user.is_authenticated else None, acao='Limpou auditoria', detalhes=fname)
-        except Exception:
-            backup_log = None
-        # delete all entries except any 'Limpou auditoria' logs (preserve backups)
-        try:
-            if backup_log:
-                Auditoria.objects.exclude(id=backup_log.id).exclude(acao='Limpou auditoria').delete()
-            else:
-                Auditoria.objects.exclude(acao='Limpou auditoria').delete()
-        except Exception:
-            pass
+        resultado = arquivar(dj_tz.now())
+        total = sum(resultado.values())
+        reason = (request.POST.get('reason') or '').strip()
+        detalhes = f'{total} registro(s) arquivado(s): ' + (', '.join(f'{p}={n}' for p, n in sorted(resultado.items())) or '-')
+        if reason:
+            detalhes += f'\nMotivo: {reason}'
+        log_audit(request.user if request.user.is_authenticated else None, 'Arquivou auditoria', detalhes)
     except Exception as e:
-        return JsonResponse({'status': 'error', 'message': f'Falha ao limpar auditoria: {e}'}, status=500)
+        return JsonResponse({'status': 'error', 'message': f'Falha ao arquivar auditoria: {e}'}, status=500)
     # respond with JSON for AJAX or redirect back
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
         return JsonResponse({'status': 'ok'})
     return redirect('admin_auditoria')
 
 
-@user_passes_test(lambda u: u.is_staff or u.is_superuser or u.groups.filter(name__in=['Professor','Organizador']).exists())
+@user_passes_test(is_staff_like)
 def download_auditoria_backup(request, filename):
     # validate filename to avoid directory traversal
     import re
@@ -859,9 +915,9 @@ def admin_event_inscritos(request, event_id):
     # permission checks
     if request.user.is_superuser or request.user.is_staff:
         allowed = True
-    elif request.user.groups.filter(name='Organizador').exists():
+    elif get_roles(request.user).is_organizador:
         allowed = True
-    elif request.user.groups.filter(name='Professor').exists() and evento.responsavel == request.user:
+    elif get_roles(request.user).is_professor and evento.responsavel == request.user:
         allowed = True
     else:
         allowed = False
@@ -872,22 +928,22 @@ def admin_event_inscritos(request, event_id):
     can_generate_code = False
     if request.user.is_staff or request.user.is_superuser:
         can_generate_code = True
-    if request.user.groups.filter(name='Organizador').exists():
+    if get_roles(request.user).is_organizador:
         can_generate_code = True
-    if request.user.groups.filter(name='Professor').exists() and evento.responsavel == request.user:
+    if get_roles(request.user).is_professor and evento.responsavel == request.user:
         can_generate_code = True
 
     # note: rendering the inscritos list is an audit-worthy access
     try:
-        log_audit(request.user, 'Acesso Inscritos', f'Visualizou inscritos do evento id={evento.id} evento_name="{evento.nome if evento else ''}"')
+        log_audit(request.user, 'Acesso Inscritos', f'Visualizou inscritos do evento id={evento.id} evento_name="{evento.nome if evento else ""}"', evento=evento)
     except Exception:
         pass
     # indicate if current user is Professor or Organizador (used by template for popup behavior)
-    is_prof_or_org = request.user.groups.filter(name__in=['Professor','Organizador']).exists()
+    is_prof_or_org = get_roles(request.user).is_prof_or_org
     return render(request, 'core/admin_inscritos.html', {'evento': evento, 'inscritos': inscritos, 'can_generate_code': can_generate_code, 'is_prof_or_org': is_prof_or_org})
 
 
-@user_passes_test(lambda u: u.is_staff or u.is_superuser or u.groups.filter(name__in=['Professor','Organizador']).exists())
+@user_passes_test(is_staff_like)
 @csrf_protect
 def cancelar_inscricao(request):
     if request.method != 'POST':
@@ -898,32 +954,32 @@ def cancelar_inscricao(request):
         return HttpResponseForbidden('Inscrição não encontrada')
     evento = inscr.evento
     # permission: Professors can only cancel for events they created
-    if request.user.groups.filter(name='Professor').exists():
+    if get_roles(request.user).is_professor:
         if not evento or evento.responsavel != request.user:
             return HttpResponseForbidden('Acesso negado')
     # capture details before deletion
     participante = inscr.participante
     evento = inscr.evento
     inscr_id = inscr.id
-    # perform cancel
-    inscr.delete()
+    # perform cancel (libera a vaga na mesma transação)
+    remover_inscricao(inscr)
     # log who canceled and context (Professor/Organizador/Staff)
     try:
         actor = request.user
-        role = 'Staff' if (actor.is_staff or actor.is_superuser) else ('Organizador' if actor.groups.filter(name='Organizador').exists() else ('Professor' if actor.groups.filter(name='Professor').exists() else 'Unknown'))
+        role = get_roles(actor).label
         participante_name = None
         try:
             participante_name = (participante.get_full_name() or participante.username) if participante else None
         except Exception:
             participante_name = None
         details = f'Inscrição id={inscr_id} evento_id={evento.id if evento else None} participante_id={participante.id if participante else None} participante_name="{participante_name}"'
-        log_audit(actor, f'Cancelou inscrição ({role})', details)
+        log_audit(actor, f'Cancelou inscrição ({role})', details, inscricao=inscr_id, evento=evento, alvo=participante)
     except Exception:
         pass
     return JsonResponse({'status': 'ok'})
 
 
-@user_passes_test(lambda u: u.is_staff or u.is_superuser or u.groups.filter(name__in=['Professor','Organizador']).exists())
+@user_passes_test(is_staff_like)
 @csrf_protect
 def confirmar_presenca(request):
     if request.method != 'POST':
@@ -935,7 +991,7 @@ def confirmar_presenca(request):
         return JsonResponse({'status': 'error', 'message': 'Inscrição não encontrada'}, status=404)
     evento = inscr.evento
     # permission: Professors can only confirm for events they created
-    if request.user.groups.filter(name='Professor').exists():
+    if get_roles(request.user).is_professor:
         if not evento or evento.responsavel != request.user:
             return HttpResponseForbidden('Acesso negado')
 
@@ -962,7 +1018,7 @@ def confirmar_presenca(request):
         # log confirmation by admin (Professor/Organizador/Staff)
         try:
             actor = request.user
-            role = 'Staff' if (actor.is_staff or actor.is_superuser) else ('Organizador' if actor.groups.filter(name='Organizador').exists() else ('Professor' if actor.groups.filter(name='Professor').exists() else 'Unknown'))
+            role = get_roles(actor).label
             participante_name = None
             try:
                 participante_name = (inscr.participante.get_full_name() or inscr.participante.username) if inscr.participante else None
@@ -973,10 +1029,10 @@ def confirmar_presenca(request):
             except Exception:
                 ev_name = ''
             details = f'Inscrição id={inscr.id} evento_id={evento.id if evento else None} evento_name="{ev_name}" participante_id={inscr.participante_id} participante_name="{participante_name}"'
-            log_audit(actor, f'Confirmou presença ({role})', details)
+            log_audit(actor, f'Confirmou presença ({role})', details, inscricao=inscr, evento=evento, alvo=inscr.participante_id)
             # if certificate was generated now, log generation
             if inscr.certificado_gerado:
-                log_audit(actor, 'Gerou certificado', details)
+                log_audit(actor, 'Gerou certificado', details, inscricao=inscr, evento=evento, alvo=inscr.participante_id)
         except Exception:
             pass
         return JsonResponse({'status': 'ok', 'presenca': True})
@@ -989,7 +1045,7 @@ def confirmar_presenca(request):
         inscr.save()
         try:
             actor = request.user
-            role = 'Staff' if (actor.is_staff or actor.is_superuser) else ('Organizador' if actor.groups.filter(name='Organizador').exists() else ('Professor' if actor.groups.filter(name='Professor').exists() else 'Unknown'))
+            role = get_roles(actor).label
             try:
                 participante_name = (inscr.participante.get_full_name() or inscr.participante.username) if inscr.participante else None
             except Exception:
@@ -998,13 +1054,13 @@ def confirmar_presenca(request):
                 ev_name = evento.nome if evento else ''
             except Exception:
                 ev_name = ''
-            log_audit(actor, f'Revogou presença ({role})', f'Inscrição id={inscr.id} evento_id={evento.id if evento else None} evento_name="{ev_name}" participante_id={inscr.participante_id} participante_name="{participante_name}"')
+            log_audit(actor, f'Revogou presença ({role})', f'Inscrição id={inscr.id} evento_id={evento.id if evento else None} evento_name="{ev_name}" participante_id={inscr.participante_id} participante_name="{participante_name}"', inscricao=inscr, evento=evento, alvo=inscr.participante_id)
         except Exception:
             pass
         return JsonResponse({'status': 'ok', 'presenca': False})
 
 
-@user_passes_test(lambda u: u.is_staff or u.is_superuser or u.groups.filter(name__in=['Professor','Organizador']).exists())
+@user_passes_test(is_staff_like)
 @csrf_protect
 def generate_confirmation_code(request, event_id):
     # Only authorized users can generate a code
@@ -1013,7 +1069,7 @@ def generate_confirmation_code(request, event_id):
         return JsonResponse({'error': 'Evento não encontrado'}, status=404)
 
     # permission check: professor must be owner
-    if request.user.groups.filter(name='Professor').exists() and evento.responsavel != request.user:
+    if get_roles(request.user).is_professor and evento.responsavel != request.user:
         return HttpResponseForbidden('Acesso negado')
 
     # only one code per event: return existing if present
@@ -1039,7 +1095,7 @@ def generate_confirmation_code(request, event_id):
                     ev_name = evento.nome if evento else ''
                 except Exception:
                     ev_name = ''
-                log_audit(request.user, 'Gerou código de confirmação', f'Evento id={evento.id} evento_name="{ev_name}" code={code}')
+                log_audit(request.user, 'Gerou código de confirmação', f'Evento id={evento.id} evento_name="{ev_name}" code={code}', evento=evento)
             except Exception:
                 pass
             # if caller requested, send the code by email to all inscritos
@@ -1061,28 +1117,25 @@ def generate_confirmation_code(request, event_id):
                 send_flag = False
 
             if send_flag:
+                # grava as mensagens na fila (core.outbox) e responde na hora;
+                # o envio acontece fora da requisição
+                job_id = None
                 try:
-                    from django.core.mail import EmailMultiAlternatives
-                    from django.template.loader import render_to_string
-                    from django.templatetags.static import static
-                    from django.conf import settings
                     subject = f'Código de confirmação do evento {evento.nome}'
-                    from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', None) or None
+                    logo_url = static('img/logo.png')
+                    mensagens = []
                     inscricoes = Inscricao.objects.filter(evento=evento).select_related('participante')
                     for ins in inscricoes:
-                        try:
-                            participante = ins.participante
-                            if not participante or not participante.email:
-                                continue
-                            text_content = render_to_string('core/email_event_code.txt', {'user': participante, 'evento': evento, 'code': code})
-                            html_content = render_to_string('core/email_event_code.html', {'user': participante, 'evento': evento, 'code': code, 'logo_url': static('img/logo.png')})
-                            msg = EmailMultiAlternatives(subject, text_content, from_email, [participante.email])
-                            msg.attach_alternative(html_content, 'text/html')
-                            msg.send(fail_silently=True)
-                        except Exception:
+                        participante = ins.participante
+                        if not participante or not participante.email:
                             continue
-                except Exception:
-                    pass
+                        text_content = render_to_string('core/email_event_code.txt', {'user': participante, 'evento': evento, 'code': code})
+                        html_content = render_to_string('core/email_event_code.html', {'user': participante, 'evento': evento, 'code': code, 'logo_url': logo_url})
+                        mensagens.append(outbox.mensagem(participante.email, subject, text_content, html_content))
+                    job_id = outbox.enfileirar(mensagens)
+                except Exception as e:
+                    logging.getLogger(__name__).warning('Falha ao enfileirar códigos do evento %s: %s', evento.id, e)
+                return JsonResponse({'code': code, 'job_id': job_id})
 
             return JsonResponse({'code': code})
     return JsonResponse({'error': 'Não foi possível gerar código'}, status=500)
@@ -1132,9 +1185,9 @@ def confirmar_codigo_participante(request, inscricao_id):
                     except Exception:
                         ev_name = ''
                     details = f'Inscrição id={inscr.id} evento_id={evento.id if evento else None} evento_name="{ev_name}" participante_id={inscr.participante_id} participante_name="{participante_name}"'
-                    log_audit(request.user, 'Confirmou presença (por código)', details)
+                    log_audit(request.user, 'Confirmou presença (por código)', details, inscricao=inscr, evento=evento, alvo=request.user)
                     if inscr.certificado_gerado:
-                        log_audit(request.user, 'Gerou certificado', details)
+                        log_audit(request.user, 'Gerou certificado', details, inscricao=inscr, evento=evento, alvo=request.user)
                 except Exception:
                     pass
                 success = True
@@ -1160,10 +1213,10 @@ def cancelar_minha_inscricao(request):
             ev_name = ev_obj.nome if ev_obj else ''
         except Exception:
             ev_name = ''
-        log_audit(request.user, 'Cancelou inscrição (usuário)', f'Inscrição id={inscr.id} evento_id={inscr.evento_id} evento_name="{ev_name}" participante_id={request.user.id} participante_name="{participante_name}"')
+        log_audit(request.user, 'Cancelou inscrição (usuário)', f'Inscrição id={inscr.id} evento_id={inscr.evento_id} evento_name="{ev_name}" participante_id={request.user.id} participante_name="{participante_name}"', inscricao=inscr, evento=inscr.evento_id, alvo=request.user)
     except Exception:
         pass
-    inscr.delete()
+    remover_inscricao(inscr)
     return redirect('home')
 
 
@@ -1197,6 +1250,7 @@ def login_view(request):
 
 @csrf_exempt
 @api_view(['POST'])
+@permission_classes([permissions.AllowAny])
 def api_login(request):
     # Simple token auth endpoint used by JS/admin scripts
     username = None
@@ -1213,7 +1267,9 @@ def api_login(request):
     user = authenticate(request, username=username, password=password)
     if not user:
         return Response({'error': 'Credenciais inválidas'}, status=401)
-    token, _ = Token.objects.get_or_create(user=user)
+    # reaproveita o token (troca se expirado ou com rotate=true) e já o deixa em cache
+    rotacionar = isinstance(request.data, dict) and str(request.data.get('rotate', '')).lower() in ('1', 'true')
+    token = token_para(user, rotacionar=rotacionar)
     try:
         log_audit(user, 'API Login', 'Autenticou via API token')
     except Exception:
@@ -1315,26 +1371,23 @@ def register_view(request):
                                 ]
                                 details_txt = "\n".join(details_lines)
                                 try:
-                                    log_audit(user, 'Criação de Usuário', details_txt)
+                                    log_audit(user, 'Criação de Usuário', details_txt, alvo=user)
                                 except Exception:
                                     pass
                             except Exception:
                                 pass
                             ev = EmailVerification.objects.create(user=user, code=code, purpose='activate', target_email=email)
                             try:
-                                log_audit(user, 'Enviou verificação', f'Verification id={ev.id} target={email}')
+                                log_audit(user, 'Enviou verificação', f'Verification id={ev.id} target={email}', alvo=user, dados={'verification_id': ev.id})
                             except Exception:
                                 pass
                             subject = 'Código de verificação - SGEA'
                             text_content = render_to_string('core/email_verification.txt', {'user': user, 'code': code})
                             html_content = render_to_string('core/email_verification.html', {'user': user, 'code': code})
-                            from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', None) or None
                             try:
-                                msg = EmailMultiAlternatives(subject, text_content, from_email, [email])
-                                msg.attach_alternative(html_content, "text/html")
-                                msg.send(fail_silently=False)
+                                outbox.enfileirar_email(email, subject, text_content, html_content)
                             except Exception as e:
-                                logging.getLogger(__name__).warning('Falha ao enviar e-mail de verificação: %s', e)
+                                logging.getLogger(__name__).warning('Falha ao enfileirar e-mail de verificação: %s', e)
                             return redirect('verify', verification_id=ev.id)
                     except Exception as e:
                         error = f'Falha ao criar usuário: {e}'
@@ -1353,8 +1406,8 @@ def admin_api_overview(request):
         # disallow users in the 'Professor' group even if they are staff
         if request.user.is_authenticated and (
             request.user.is_superuser or (
-                (request.user.is_staff or request.user.groups.filter(name='Organizador').exists())
-                and not request.user.groups.filter(name='Professor').exists()
+                (request.user.is_staff or get_roles(request.user).is_organizador)
+                and not get_roles(request.user).is_professor
             )
         ):
             allowed = True
@@ -1373,6 +1426,8 @@ def admin_api_overview(request):
         {'path': '/api/internal/inscricoes/cancel-by/', 'desc': 'Cancelar inscrição por evento+usuario (JSON). POST {"evento_id":id, "target_user_id":id, "as_user_id":id}.'},
         {'path': '/api/internal/inscricoes/confirm-by/', 'desc': 'Confirmar presença por evento+usuario (JSON). POST {"evento_id":id, "target_user_id":id, "as_user_id":id}.'},
         {'path': '/api/internal/eventos/<id>/generate-code/', 'desc': 'Gerar código de confirmação para evento. POST JSON opcional: {"actor_user_id": id}.'},
+        {'path': '/api/internal/inscricoes/bulk/', 'desc': 'Operações em lote (uma transação). POST {"action": "confirm|revoke|cancel|create", "inscricao_ids": [...]} ou {"action": ..., "evento_id": id, "participante_ids": [...]}.'},
+        {'path': '/admin-api/metrics/', 'desc': 'Métricas por rota (queries, tempo de SQL, p50/p95/p99). Query param opcional: reset=1.'},
     ]
     try:
         log_audit(request.user, 'Acesso API Overview', 'Visualizou lista de endpoints API')
@@ -1381,36 +1436,121 @@ def admin_api_overview(request):
     return render(request, 'core/api_overview.html', {'endpoints': endpoints})
 
 
+def admin_api_metrics(request):
+    """Return per-route request metrics (query count, SQL time, latency percentiles).
+
+    Same access rule as admin_api_overview. `reset=1` clears the samples after reading.
+    """
+    roles = get_roles(request.user)
+    if not (request.user.is_authenticated and (request.user.is_superuser or (
+        (request.user.is_staff or roles.is_organizador) and not roles.is_professor
+    ))):
+        return JsonResponse({'error': 'Acesso negado'}, status=403)
+    data = metrics_registry.snapshot()
+    throttle = metrics_registry.throttle_snapshot()
+    if request.GET.get('reset') in ('1', 'true'):
+        metrics_registry.reset()
+    return JsonResponse({'routes': data, 'throttle': throttle})
+
+
+
+@login_required
+def admin_certificados_zip(request, event_id=None):
+    """Stream a ZIP with every issued certificate of an event (or of events in a date range).
+
+    Staff/organizers can export any event or a `date_from`/`date_to` range;
+    professors only events they are responsible for. `formato=html` packs the
+    HTML version instead of PDF. Pass `job` (client-chosen id) to follow the
+    progress at `admin-api/certificados/<job>/`; it is stored scoped to the
+    requesting user, so other users can neither overwrite nor read it.
+    """
+    roles = get_roles(request.user)
+    evento = None
+    if event_id is not None:
+        evento = Evento.objects.filter(id=event_id).first()
+        if not evento:
+            return HttpResponseForbidden('Evento não encontrado')
+        allowed = request.user.is_staff or request.user.is_superuser or roles.is_organizador or (roles.is_professor and evento.responsavel_id == request.user.id)
+    else:
+        allowed = request.user.is_staff or request.user.is_superuser or roles.is_organizador
+    if not allowed:
+        return HttpResponseForbidden('Acesso negado')
+    inicio, fim = certificados_zip.intervalo(request.GET.get('date_from'), request.GET.get('date_to'))
+    if evento is None and inicio is None and fim is None:
+        return JsonResponse({'error': 'Informe um evento ou date_from/date_to.'}, status=400)
+    formato = 'html' if request.GET.get('formato') == 'html' else 'pdf'
+    job_id = request.GET.get('job') or ''
+    if not re.fullmatch(r'[\w-]{8,40}', job_id):
+        job_id = uuid.uuid4().hex
+    qs = certificados_zip.inscricoes(event_id, inicio, fim)
+    nome = f'certificados-evento-{evento.id}' if evento else f'certificados-{request.GET.get("date_from") or "inicio"}-{request.GET.get("date_to") or "fim"}'
+    chave = certificados_zip.chave_job(request.user.pk, job_id)
+    resp = streaming.resposta(request, certificados_zip.iter_zip(qs, formato, job_id=chave), content_type='application/zip')
+    resp['Content-Disposition'] = f'attachment; filename="{nome}.zip"'
+    resp['X-Job-Id'] = job_id
+    try:
+        detalhes = f'Evento id={evento.id}' if evento else f'date_from={request.GET.get("date_from") or ""} date_to={request.GET.get("date_to") or ""}'
+        log_audit(request.user, 'Exportou certificados', f'{detalhes} formato={formato} job={job_id}', evento=evento, dados={'formato': formato, 'job': job_id})
+    except Exception:
+        pass
+    return resp
+
+
+@user_passes_test(is_staff_like)
+def admin_api_certificados_job(request, job_id):
+    """Return the progress of one of the user's certificate ZIP exports (total, prontos, status)."""
+    info = certificados_zip.progresso(certificados_zip.chave_job(request.user.pk, job_id))
+    if info is None:
+        return JsonResponse({'error': 'Job não encontrado'}, status=404)
+    return JsonResponse({'job_id': job_id, **info})
+
+
+@user_passes_test(is_staff_like)
+def admin_api_email_job(request, job_id):
+    """Return the delivery status of an email job (counts per outbox status)."""
+    counts = outbox.status_job(job_id)
+    if not counts:
+        return JsonResponse({'error': 'Job não encontrado'}, status=404)
+    return JsonResponse({'job_id': job_id, 'status': counts})
+
+
+@ler_da_replica
 def admin_api_audits(request):
     """Return recent auditoria entries as JSON for admin/organizador users.
 
-    Accept optional GET param `q` to filter action/detalhes, and `limit`.
+    Accept optional GET params `q` (full-text search in action/detalhes: every term
+    is a prefix, results ranked by relevance unless `order=date`), the indexed filters
+    `action` (action code), `usuario`, `evento`, `inscricao`, `date_from`/`date_to`
+    (YYYY-MM-DD) and `limit`. Date ranges that reach archived periods also return
+    the archived entries (flagged with `arquivado`), after the ones in the table.
     """
     # permission check: only staff/superuser or Organizadores
     try:
         # same rule as admin_api_overview: superusers allowed; block 'Professor' group
         if not (request.user.is_authenticated and (
             request.user.is_superuser or (
-                (request.user.is_staff or request.user.groups.filter(name='Organizador').exists())
-                and not request.user.groups.filter(name='Professor').exists()
+                (request.user.is_staff or get_roles(request.user).is_organizador)
+                and not get_roles(request.user).is_professor
             )
         )):
             return JsonResponse({'error': 'Acesso negado'}, status=403)
     except Exception:
         return JsonResponse({'error': 'Acesso negado'}, status=403)
 
-    q = (request.GET.get('q') or '').strip()
     try:
         limit = int(request.GET.get('limit') or 200)
     except Exception:
         limit = 200
 
-    qs = Auditoria.objects.select_related('usuario').order_by('-data_hora')
-    if q:
-        qs = qs.filter(Q(acao__icontains=q) | Q(detalhes__icontains=q))
-    qs = qs[:min(limit, 1000)]
+    limit = min(limit, 1000)
+    params = request.GET.copy()
+    params.setdefault('exclude_access', '0')
+    qs, filtros = filtrar_auditoria(params, ranquear=request.GET.get('order') != 'date')
+    rows = list(qs[:limit])
+    if len(rows) < limit:
+        rows += islice(arquivados(filtros), limit - len(rows))
     items = []
-    for a in qs:
+    for a in rows:
         usuario_repr = None
         try:
             usuario_repr = {'id': a.usuario.id, 'username': a.usuario.username}
@@ -1422,6 +1562,13 @@ def admin_api_audits(request):
             'acao': a.acao,
             'detalhes': a.detalhes,
             'data_hora': a.data_hora.isoformat() if a.data_hora else None,
+            'codigo': a.codigo,
+            'evento_id': a.evento_id,
+            'inscricao_id': a.inscricao_id,
+            'alvo_usuario_id': a.alvo_usuario_id,
+            'dados': a.dados,
+            'arquivado': getattr(a, 'arquivado', False),
+            'relevancia': getattr(a, 'relevancia', None),
         })
     return JsonResponse({'audits': items})
 
@@ -1434,12 +1581,13 @@ def api_cancel_inscricao(request, insc_id):
     inscr = Inscricao.objects.filter(id=insc_id).select_related('evento', 'participante').first()
     if not inscr:
         return Response({'error': 'Inscrição não encontrada'}, status=404)
-    if request.user == inscr.participante or request.user.is_staff or request.user.is_superuser or request.user.groups.filter(name='Organizador').exists():
+    if request.user == inscr.participante or get_roles(request.user).is_admin:
         try:
             details = f'Inscrição id={inscr.id} evento_id={inscr.evento_id} participante_id={inscr.participante_id}'
-            inscr.delete()
+            campos = {'inscricao': inscr.id, 'evento': inscr.evento_id, 'alvo': inscr.participante_id}
+            remover_inscricao(inscr)
             try:
-                log_audit(request.user, 'Cancelou inscrição (API)', details)
+                log_audit(request.user, 'Cancelou inscrição (API)', details, **campos)
             except Exception:
                 pass
             return Response({'status': 'ok'})
@@ -1476,7 +1624,7 @@ def api_cancel_inscricao_as(request, insc_id=None):
     # resolve acting user
     acting_user = None
     if as_user_id:
-        if not (request.user.is_staff or request.user.is_superuser or request.user.groups.filter(name='Organizador').exists()):
+        if not get_roles(request.user).is_admin:
             return Response({'error': 'Apenas administradores podem simular outro usuário'}, status=403)
         acting_user = User.objects.filter(id=as_user_id).first()
         if not acting_user:
@@ -1488,12 +1636,13 @@ def api_cancel_inscricao_as(request, insc_id=None):
         acting_user = request.user
 
     # permission check: acting_user must be participant or caller must be admin/organizador
-    if acting_user == insc.participante or request.user.is_staff or request.user.is_superuser or request.user.groups.filter(name='Organizador').exists():
+    if acting_user == insc.participante or get_roles(request.user).is_admin:
         try:
             details = f'Inscrição id={insc.id} evento_id={insc.evento_id} participante_id={insc.participante_id} (cancelada por caller_id={request.user.id} acting_as={acting_user.id})'
-            insc.delete()
+            campos = {'inscricao': insc.id, 'evento': insc.evento_id, 'alvo': insc.participante_id, 'dados': {'via': 'API', 'caller_id': request.user.id}}
+            remover_inscricao(insc)
             try:
-                log_audit(request.user, 'Cancelou inscrição (API)', details)
+                log_audit(request.user, 'Cancelou inscrição (API)', details, **campos)
             except Exception:
                 pass
             return Response({'status': 'ok'})
@@ -1525,7 +1674,7 @@ def api_confirm_inscricao_as(request, insc_id=None):
 
     acting_user = None
     if as_user_id:
-        if not (request.user.is_staff or request.user.is_superuser or request.user.groups.filter(name='Organizador').exists()):
+        if not get_roles(request.user).is_admin:
             return Response({'error': 'Apenas administradores podem simular outro usuário'}, status=403)
         acting_user = User.objects.filter(id=as_user_id).first()
         if not acting_user:
@@ -1536,7 +1685,7 @@ def api_confirm_inscricao_as(request, insc_id=None):
         acting_user = request.user
 
     user = request.user
-    if user.is_staff or user.is_superuser or user.groups.filter(name='Organizador').exists() or acting_user == insc.participante:
+    if get_roles(user).is_admin or acting_user == insc.participante:
         insc.presenca_confirmada = True
         if not insc.certificado_gerado:
             evt = insc.evento
@@ -1549,7 +1698,7 @@ def api_confirm_inscricao_as(request, insc_id=None):
                 insc.certificado_gerado = True
         insc.save()
         try:
-            log_audit(request.user, 'Confirmou presença (API)', f'Inscrição id={insc.id} evento_id={insc.evento_id} participante_id={insc.participante_id} (confirmada por caller_id={request.user.id} acting_as={acting_user.id})')
+            log_audit(request.user, 'Confirmou presença (API)', f'Inscrição id={insc.id} evento_id={insc.evento_id} participante_id={insc.participante_id} (confirmada por caller_id={request.user.id} acting_as={acting_user.id})', inscricao=insc, evento=insc.evento_id, alvo=insc.participante_id, dados={'via': 'API', 'caller_id': request.user.id})
         except Exception:
             pass
         return Response({'status': 'ok'})
@@ -1572,13 +1721,13 @@ def api_create_inscricao_as(request):
     if not evento_id or not user_id:
         return Response({'error': 'Forneça evento e user_id'}, status=400)
     # only staff/superuser or organizador may simulate
-    if not (request.user.is_staff or request.user.is_superuser or request.user.groups.filter(name='Organizador').exists()):
+    if not get_roles(request.user).is_admin:
         return Response({'error': 'Apenas administradores podem criar inscrição como outro usuário'}, status=403)
     target_user = User.objects.filter(id=user_id).first()
     if not target_user:
         return Response({'error': 'Usuário não encontrado'}, status=404)
     # disallow creating inscrição for organizers (maintain rule)
-    if target_user.groups.filter(name='Organizador').exists():
+    if get_roles(target_user).is_organizador:
         return Response({'error': 'Não é permitido inscrever um usuário do grupo Organizador'}, status=400)
     evento = Evento.objects.filter(id=evento_id).first()
     if not evento:
@@ -1591,16 +1740,115 @@ def api_create_inscricao_as(request):
     # prevent duplicate
     if Inscricao.objects.filter(evento=evento, participante=target_user).exists():
         return Response({'error': 'Já existe inscrição para este usuário neste evento'}, status=400)
-    insc = Inscricao(evento=evento, participante=target_user, criado_em=timezone.now())
-    insc.save()
+    insc = Inscricao(evento=evento, participante=target_user)
+    try:
+        criar_inscricao(insc)
+    except ValidationError as e:
+        return Response({'error': ' '.join(e.messages)}, status=400)
+    except IntegrityError:
+        return Response({'error': 'Já existe inscrição para este usuário neste evento'}, status=400)
     try:
-        log_audit(request.user, 'Criou inscrição (simulada)', f'Inscrição id={insc.id} evento_id={evento.id} participante_id={target_user.id}')
+        log_audit(request.user, 'Criou inscrição (simulada)', f'Inscrição id={insc.id} evento_id={evento.id} participante_id={target_user.id}', inscricao=insc, evento=evento, alvo=target_user)
     except Exception:
         pass
     return Response({'status': 'ok', 'id': insc.id})
 api_create_inscricao_as.throttle_scope = 'event-list'
 
 
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+@throttle_classes([ScopedRateThrottle])
+def api_bulk_inscricoes(request):
+    """Confirm/revoke/cancel/create many inscrições in a single transaction.
+
+    JSON body: {"action": "confirm"|"revoke"|"cancel"|"create", "inscricao_ids": [...]}
+    or {"action": ..., "evento_id": id, "participante_ids": [...]} ("create" requires the latter).
+    Returns one result per item.
+    """
+    try:
+        data = request.data if isinstance(request.data, dict) else json.loads(request.body.decode('utf-8') or '{}')
+    except Exception:
+        data = {}
+    action_name = data.get('action')
+    if action_name not in ('confirm', 'revoke', 'cancel', 'create'):
+        return Response({'error': 'action deve ser confirm, revoke, cancel ou create'}, status=400)
+    try:
+        inscricao_ids = [int(i) for i in (data.get('inscricao_ids') or [])]
+        participante_ids = [int(i) for i in (data.get('participante_ids') or [])]
+        evento_id = int(data['evento_id']) if data.get('evento_id') else None
+    except (TypeError, ValueError):
+        return Response({'error': 'IDs inválidos'}, status=400)
+    max_items = getattr(settings, 'BULK_MAX_ITEMS', 1000)
+    if len(inscricao_ids) > max_items or len(participante_ids) > max_items:
+        return Response({'error': f'Máximo de {max_items} itens por requisição'}, status=400)
+
+    roles = get_roles(request.user)
+
+    def pode_gerenciar(evento):
+        return roles.is_admin or (roles.is_professor and evento is not None and evento.responsavel_id == request.user.id)
+
+    if action_name == 'create':
+        if not evento_id or not participante_ids:
+            return Response({'error': 'Forneça evento_id e participante_ids'}, status=400)
+        evento = Evento.objects.filter(id=evento_id).first()
+        if not evento:
+            return Response({'error': 'Evento não encontrado'}, status=404)
+        if not roles.is_admin:
+            return Response({'error': 'Apenas administradores podem criar inscrições em lote'}, status=403)
+        now = timezone.now()
+        if evento.data_fim and evento.data_fim <= now:
+            return Response({'error': 'O evento já terminou'}, status=400)
+        if evento.data_inicio and evento.data_inicio <= now:
+            return Response({'error': 'O evento já começou'}, status=400)
+        ids = list(dict.fromkeys(participante_ids))
+        users = {u.id: u for u in User.objects.filter(id__in=ids)}
+        organizadores = set(User.objects.filter(id__in=ids, groups__name='Organizador').values_list('id', flat=True))
+        results = []
+        elegiveis = []
+        for uid in ids:
+            if uid not in users:
+                results.append({'participante_id': uid, 'status': 'error', 'error': 'Usuário não encontrado'})
+            elif uid in organizadores:
+                results.append({'participante_id': uid, 'status': 'error', 'error': 'Não é permitido inscrever um usuário do grupo Organizador'})
+            else:
+                elegiveis.append(users[uid])
+        # quem já está inscrito é conferido por lote.criar, dentro da transação
+        criados, audit_entries = lote.criar(evento, elegiveis, request.user)
+        log_audit_many(audit_entries)
+        return Response({'status': 'ok', 'action': action_name, 'results': results + criados})
+
+    # confirm / revoke / cancel: resolve inscrições por id ou evento+participantes
+    qs = Inscricao.objects.select_related('evento')
+    if inscricao_ids:
+        qs = qs.filter(id__in=inscricao_ids)
+        requested = list(dict.fromkeys(inscricao_ids))
+        key = 'id'
+    elif evento_id and participante_ids:
+        qs = qs.filter(evento_id=evento_id, participante_id__in=participante_ids)
+        requested = list(dict.fromkeys(participante_ids))
+        key = 'participante_id'
+    else:
+        return Response({'error': 'Forneça inscricao_ids ou evento_id + participante_ids'}, status=400)
+    found = {getattr(i, key): i for i in qs}
+    results = []
+    allowed = []
+    for ident in requested:
+        insc = found.get(ident)
+        if insc is None:
+            results.append({key: ident, 'status': 'error', 'error': 'Inscrição não encontrada'})
+        elif not pode_gerenciar(insc.evento):
+            results.append({key: ident, 'status': 'error', 'error': 'Acesso negado'})
+        else:
+            allowed.append(insc)
+    if allowed:
+        operacao = {'confirm': lote.confirmar, 'revoke': lote.revogar, 'cancel': lote.cancelar}[action_name]
+        ok_results, audit_entries = operacao(allowed, request.user)
+        results.extend(ok_results)
+        log_audit_many(audit_entries)
+    return Response({'status': 'ok', 'action': action_name, 'results': results})
+api_bulk_inscricoes.throttle_scope = 'event-list'
+
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 @throttle_classes([ScopedRateThrottle])
@@ -1614,14 +1862,14 @@ def api_list_event_inscricoes(request, event_id):
     actor = request.user
     if req_user_id:
         # only admin/organizador may request on behalf of another user
-        if not (request.user.is_staff or request.user.is_superuser or request.user.groups.filter(name='Organizador').exists()):
+        if not get_roles(request.user).is_admin:
             return Response({'error': 'Apenas administradores podem consultar em nome de outro usuário'}, status=403)
         actor = User.objects.filter(id=req_user_id).first()
         if not actor:
             return Response({'error': 'Usuário requisitante não encontrado'}, status=404)
 
     # permission: staff/superuser or organizador or professor owner (for the actor)
-    if not (actor.is_staff or actor.is_superuser or actor.groups.filter(name='Organizador').exists() or (actor.groups.filter(name='Professor').exists() and evento.responsavel == actor)):
+    if not (get_roles(actor).is_admin or (get_roles(actor).is_professor and evento.responsavel == actor)):
         return Response({'error': 'Acesso negado'}, status=403)
     inscricoes = Inscricao.objects.filter(evento=evento).select_related('participante')
     out = []
@@ -1641,7 +1889,7 @@ def api_confirm_inscricao(request, insc_id):
         return Response({'error': 'Inscrição não encontrada'}, status=404)
     # permission: staff/superuser or organizador or professor owner
     user = request.user
-    if user.is_staff or user.is_superuser or user.groups.filter(name='Organizador').exists() or (user.groups.filter(name='Professor').exists() and inscr.evento and inscr.evento.responsavel == user):
+    if get_roles(user).is_admin or (get_roles(user).is_professor and inscr.evento and inscr.evento.responsavel == user):
         inscr.presenca_confirmada = True
         if not inscr.certificado_gerado:
             evt = inscr.evento
@@ -1654,7 +1902,7 @@ def api_confirm_inscricao(request, insc_id):
                 inscr.certificado_gerado = True
         inscr.save()
         try:
-            log_audit(request.user, 'Confirmou presença (API)', f'Inscrição id={inscr.id} evento_id={inscr.evento_id} participante_id={inscr.participante_id}')
+            log_audit(request.user, 'Confirmou presença (API)', f'Inscrição id={inscr.id} evento_id={inscr.evento_id} participante_id={inscr.participante_id}', inscricao=inscr, evento=inscr.evento_id, alvo=inscr.participante_id)
         except Exception:
             pass
         return Response({'status': 'ok'})
@@ -1679,7 +1927,7 @@ def api_generate_code(request, event_id):
     actor = None
     if actor_user_id:
         # only allow simulation by admins/organizadores
-        if not (request.user.is_staff or request.user.is_superuser or request.user.groups.filter(name='Organizador').exists()):
+        if not get_roles(request.user).is_admin:
             return Response({'error': 'Apenas administradores podem gerar código em nome de outro usuário'}, status=403)
         actor = User.objects.filter(id=actor_user_id).first()
         if not actor:
@@ -1688,10 +1936,10 @@ def api_generate_code(request, event_id):
         actor = request.user
 
     # forbid students explicitly as actors
-    if actor.groups.filter(name='Aluno').exists():
+    if get_roles(actor).is_aluno:
         return Response({'error': 'Acesso negado para alunos'}, status=403)
     # permission: staff/superuser or organizador or professor owner
-    if actor.groups.filter(name='Professor').exists() and evento.responsavel != actor and not (actor.is_staff or actor.is_superuser or actor.groups.filter(name='Organizador').exists()):
+    if get_roles(actor).is_professor and evento.responsavel != actor and not get_roles(actor).is_admin:
         return Response({'error': 'Acesso negado'}, status=403)
     if evento.confirmation_code:
         return Response({'code': evento.confirmation_code})
@@ -1705,7 +1953,7 @@ def api_generate_code(request, event_id):
             evento.confirmation_code = code
             evento.save()
             try:
-                log_audit(request.user, 'Gerou código de confirmação (API)', f'Evento id={evento.id} code={code} actor_id={actor.id} caller_id={request.user.id}')
+                log_audit(request.user, 'Gerou código de confirmação (API)', f'Evento id={evento.id} code={code} actor_id={actor.id} caller_id={request.user.id}', evento=evento, dados={'via': 'API', 'actor_id': actor.id, 'caller_id': request.user.id})
             except Exception:
                 pass
             return Response({'code': code})
@@ -1752,7 +2000,7 @@ def verify_view(request, verification_id):
             u.is_active = True
             u.save()
             try:
-                log_audit(u, 'Confirmou verificação', f'Verification id={ev.id} target={ev.target_email}')
+                log_audit(u, 'Confirmou verificação', f'Verification id={ev.id} target={ev.target_email}', alvo=u, dados={'verification_id': ev.id})
             except Exception:
                 pass
             ev.used = True
@@ -1760,12 +2008,9 @@ def verify_view(request, verification_id):
             # send welcome email with logo and user name
             try:
                 subject_w = 'Bem-vindo ao SGEA'
-                from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', None) or None
                 text_content = render_to_string('core/email_welcome.txt', {'user': u})
                 html_content = render_to_string('core/email_welcome.html', {'user': u, 'logo_url': static('img/logo.png')})
-                msg2 = EmailMultiAlternatives(subject_w, text_content, from_email, [u.email])
-                msg2.attach_alternative(html_content, 'text/html')
-                msg2.send(fail_silently=True)
+                outbox.enfileirar_email(u.email, subject_w, text_content, html_content)
             except Exception:
                 pass
             # auto-login and redirect to home
@@ -1797,20 +2042,18 @@ def resend_verification(request, verification_id):
     subject = 'Código de verificação - SGEA'
     text_content = render_to_string('core/email_verification.txt', {'user': ev.user, 'code': code})
     html_content = render_to_string('core/email_verification.html', {'user': ev.user, 'code': code})
-    from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', None) or None
+    job_id = None
     try:
-        msg = EmailMultiAlternatives(subject, text_content, from_email, [email])
-        msg.attach_alternative(html_content, "text/html")
-        msg.send(fail_silently=False)
+        job_id = outbox.enfileirar_email(email, subject, text_content, html_content)
     except Exception as e:
-        logging.getLogger(__name__).warning('Falha ao reenviar e-mail de verificação: %s', e)
+        logging.getLogger(__name__).warning('Falha ao enfileirar reenvio de verificação: %s', e)
 
     # audit resend
     try:
-        log_audit(request.user if request.user.is_authenticated else None, 'Reenviou verificação', f'Verification id={ev.id} target={email}')
+        log_audit(request.user if request.user.is_authenticated else None, 'Reenviou verificação', f'Verification id={ev.id} target={email}', alvo=ev.user_id, dados={'verification_id': ev.id})
     except Exception:
         pass
-    return JsonResponse({'status': 'ok', 'new_id': ev.id})
+    return JsonResponse({'status': 'ok', 'new_id': ev.id, 'job_id': job_id})
 
 
 @login_required
@@ -1854,6 +2097,7 @@ def profile_view(request):
         old_profile_tel = profile.telefone if profile else ''
         old_profile_dob = getattr(profile, 'data_nascimento', None)
         old_photo_name = None
+        erro_foto = None
         try:
             if profile and getattr(profile, 'photo', None):
                 old_photo_name = profile.photo.name
@@ -1915,9 +2159,11 @@ def profile_view(request):
                 except Exception:
                     pass
             if 'photo' in request.FILES:
-                profile.photo = request.FILES['photo']
+                erro_foto = imagens.erro_imagem(request.FILES['photo'])
+                if not erro_foto:
+                    profile.photo = request.FILES['photo']
             profile.save()
-        msg = 'Dados atualizados.'
+        msg = erro_foto or 'Dados atualizados.'
         # build audit details comparing old and new
         try:
             changes = []
@@ -1978,16 +2224,13 @@ def change_password_view(request):
                     subject = 'Código para alteração de senha - SGEA'
                     text_content = render_to_string('core/email_password_change.txt', {'user': request.user, 'code': code})
                     html_content = render_to_string('core/email_password_change.html', {'user': request.user, 'code': code})
-                    from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', None) or None
                     try:
-                        msg = EmailMultiAlternatives(subject, text_content, from_email, [email])
-                        msg.attach_alternative(html_content, 'text/html')
-                        msg.send(fail_silently=True)
-                        # render template with verification info
-                        return render(request, 'core/change_password.html', {'code_requested': True, 'verification': ev})
+                        outbox.enfileirar_email(email, subject, text_content, html_content)
                     except Exception:
                         # failure to send is not fatal for user flow
-                        return render(request, 'core/change_password.html', {'code_requested': True, 'verification': ev})
+                        pass
+                    # render template with verification info
+                    return render(request, 'core/change_password.html', {'code_requested': True, 'verification': ev})
         if action == 'confirm_code':
             vid = request.POST.get('verification_id')
             code = (request.POST.get('code') or '').strip()
@@ -1,24 +1,110 @@
-import sqlite3, urllib.request, json, time
-
-db='db.sqlite3'
-conn=sqlite3.connect(db)
-row=conn.execute('select key from authtoken_token where user_id=(select id from auth_user where username=?)',('apitest',)).fetchone()
-if not row:
-    print('NO_TOKEN')
-    raise SystemExit(1)
-token=row[0]
-url='http://127.0.0.1:8000/api/eventos/'
-headers={'Authorization':'Token '+token, 'Accept':'application/json'}
-
-for i in range(1,23):
-    req=urllib.request.Request(url, headers=headers, method='GET')
-    try:
-        with urllib.request.urlopen(req, timeout=10) as r:
-            status=r.getcode()
-            data=r.read().decode('utf-8')
-            print(f"{i} => {status}")
-    except urllib.error.HTTPError as e:
-        print(f"{i} => {e.code} {e.reason}")
-    except Exception as e:
-        print(f"{i} => ERROR {e}")
-    time.sleep(0.2)
+#!/usr/bin/env python3
+"""Verifica o limite do escopo `event-list` com vários processos concorrentes.
+
+Cada processo faz requisições a /api/eventos/ com o token do usuário
+`apitest` (criado se não existir). O saldo dele é zerado antes do teste. No
+fim, o total de respostas 200 de todos os processos tem de ser exatamente o
+limite do escopo (DEFAULT_THROTTLE_RATES['event-list']), e as demais têm de
+ser 429 com Retry-After. Com um throttle por processo cada worker aceitaria o
+limite inteiro.
+
+Sem --url cada processo roda o Django em memória (test Client) sobre o mesmo
+banco. Com --url as requisições vão para um servidor já rodando, de
+preferência com vários workers.
+
+Uso:
+    python scripts/api_throttle_test.py [--processos 4] [--requisicoes 10] [--url http://127.0.0.1:8000]
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import urllib.error
+import urllib.request
+from collections import Counter
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'setup.settings')
+sys.path.insert(0, str(BASE_DIR))
+
+CAMINHO = '/api/eventos/'
+
+
+def _iniciar_worker():
+    import django
+    django.setup()
+    from django.test.utils import setup_test_environment
+    # permite o host 'testserver' do Client e não envia e-mails
+    setup_test_environment()
+
+
+def _requisitar(args):
+    token, url, quantidade = args
+    resultado = Counter()
+    if url:
+        for _ in range(quantidade):
+            req = urllib.request.Request(url.rstrip('/') + CAMINHO, headers={'Authorization': 'Token ' + token, 'Accept': 'application/json'})
+            try:
+                with urllib.request.urlopen(req, timeout=30) as r:
+                    resultado[r.getcode()] += 1
+            except urllib.error.HTTPError as e:
+                resultado[e.code] += 1
+                if e.code == 429 and not e.headers.get('Retry-After'):
+                    resultado['429_sem_retry_after'] += 1
+        return resultado
+    from django.test import Client
+    client = Client()
+    for _ in range(quantidade):
+        r = client.get(CAMINHO, HTTP_AUTHORIZATION='Token ' + token, HTTP_ACCEPT='application/json')
+        resultado[r.status_code] += 1
+        if r.status_code == 429 and not r.get('Retry-After'):
+            resultado['429_sem_retry_after'] += 1
+    from core.audit import flush_audit
+    flush_audit()
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--processos', type=int, default=4)
+    parser.add_argument('--requisicoes', type=int, default=10, help='Requisições por processo.')
+    parser.add_argument('--url', default='', help='Servidor já rodando (ex.: http://127.0.0.1:8000).')
+    args = parser.parse_args()
+
+    import django
+    django.setup()
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.db import connections
+    from rest_framework.authtoken.models import Token
+    from rest_framework.throttling import SimpleRateThrottle
+    from core.models import ThrottleBalde
+
+    User = get_user_model()
+    user, criado = User.objects.get_or_create(username='apitest', defaults={'email': 'apitest@example.com'})
+    if criado:
+        user.set_unusable_password()
+        user.save()
+    token, _ = Token.objects.get_or_create(user=user)
+    ThrottleBalde.objects.filter(chave=f'throttle_event-list_{user.pk}').delete()
+    limite, periodo = SimpleRateThrottle.parse_rate(None, settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']['event-list'])
+    connections.close_all()
+
+    total = args.processos * args.requisicoes
+    print(f'{args.processos} processo(s) x {args.requisicoes} requisição(ões); limite event-list = {limite}/{periodo}s')
+    contexto = multiprocessing.get_context('spawn')
+    with contexto.Pool(args.processos, initializer=_iniciar_worker) as pool:
+        resultados = pool.map(_requisitar, [(token.key, args.url, args.requisicoes)] * args.processos)
+    for i, r in enumerate(resultados, 1):
+        print(f'  processo {i}: ' + ', '.join(f'{k} => {v}' for k, v in sorted(r.items(), key=str)))
+    soma = sum(resultados, Counter())
+    esperado = min(limite, total)
+    ok = soma[200] == esperado and soma[429] == total - esperado and not soma['429_sem_retry_after']
+    print(f'total: 200 => {soma[200]} (esperado {esperado}), 429 => {soma[429]} (esperado {total - esperado})')
+    print('OK' if ok else 'FALHOU')
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
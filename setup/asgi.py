@@ -3,4 +3,9 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'setup.settings')
 
+# servidor ASGI (ex.: uvicorn setup.asgi:application); necessário para o
+# stream de vagas (/vagas/stream/) não ocupar uma thread por conexão. As
+# outras respostas em streaming (exportação da auditoria, ZIP de certificados)
+# usam iterador assíncrono no ASGI para não irem inteiras para a memória
+# (core.streaming)
 application = get_asgi_application()
@@ -38,11 +38,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+	# mede queries/tempo por requisição (Server-Timing + /admin-api/metrics/)
+	'core.middleware.RequestMetricsMiddleware',
 	'django.middleware.security.SecurityMiddleware',
 	'django.contrib.sessions.middleware.SessionMiddleware',
 	'django.middleware.common.CommonMiddleware',
 	'django.middleware.csrf.CsrfViewMiddleware',
 	'django.contrib.auth.middleware.AuthenticationMiddleware',
+	# prende ao banco principal quem acabou de gravar (core.replica)
+	'core.replica.ReplicaMiddleware',
 	'django.contrib.messages.middleware.MessageMiddleware',
 	'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -65,6 +69,7 @@ TEMPLATES = [
 				'django.template.context_processors.request',
 				'django.contrib.auth.context_processors.auth',
 				'django.contrib.messages.context_processors.messages',
+				'core.context_processors.roles',
 			],
 		},
 	},
@@ -75,12 +80,42 @@ WSGI_APPLICATION = 'setup.wsgi.application'
 
 # Database
 # Using SQLite for local development
+# DB_NAME troca o arquivo (ex.: banco separado para os testes de carga)
 DATABASES = {
 	'default': {
 		'ENGINE': 'django.db.backends.sqlite3',
-		'NAME': BASE_DIR / 'db.sqlite3',
+		'NAME': os.environ.get('DB_NAME') or BASE_DIR / 'db.sqlite3',
+		'OPTIONS': {
+			# BEGIN IMMEDIATE: a transação pega o lock de escrita no início e
+			# espera o busy_timeout; com DEFERRED a troca de leitura para escrita
+			# falha na hora com "database is locked"
+			'transaction_mode': os.environ.get('SQLITE_TRANSACTION_MODE', 'IMMEDIATE'),
+		},
+	}
+}
+# réplica de leitura (core.replica): DB_REPLICA_NAME aponta para a cópia do
+# banco; sem ela todas as leituras vão para o 'default'
+if os.environ.get('DB_REPLICA_NAME'):
+	DATABASES['replica'] = {
+		'ENGINE': 'django.db.backends.sqlite3',
+		'NAME': os.environ['DB_REPLICA_NAME'],
+		'OPTIONS': {'init_command': 'PRAGMA query_only=ON'},
+		'TEST': {'MIRROR': 'default'},
 	}
+DATABASE_ROUTERS = ['core.replica.RoteadorReplica']
+# segundos em que quem acabou de gravar lê do banco principal (read-your-writes)
+REPLICA_ADERENCIA_SEGUNDOS = float(os.environ.get('REPLICA_ADERENCIA_SEGUNDOS', 5))
+# PRAGMAs aplicados a cada conexão (core.sqlite); None desliga um item
+SQLITE_PRAGMAS = {
+	'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+	'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),
+	'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+	'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+	'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE', -20000)),
 }
+# pasta e quantidade de arquivos mantidos pelo comando `backup_banco`
+SQLITE_BACKUP_DIR = os.environ.get('SQLITE_BACKUP_DIR', os.path.join(BASE_DIR, 'backups'))
+SQLITE_BACKUP_MANTER = int(os.environ.get('SQLITE_BACKUP_MANTER', 7))
 
 
 # Password validation
@@ -119,18 +154,34 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 
+# Autenticação com cache (core.autenticacao): token da API e usuário da sessão
+# ficam num LRU por processo (AUTH_CACHE_TAMANHO entradas, AUTH_CACHE_TTL
+# segundos, que também limitam quanto tempo outro worker leva para ver um
+# usuário desativado). TOKEN_VALIDADE_HORAS=0: tokens não expiram.
+AUTHENTICATION_BACKENDS = ['core.autenticacao.ModelBackend']
+AUTH_CACHE_TAMANHO = int(os.environ.get('AUTH_CACHE_TAMANHO', 10000))
+AUTH_CACHE_TTL = float(os.environ.get('AUTH_CACHE_TTL', 60))
+TOKEN_VALIDADE_HORAS = float(os.environ.get('TOKEN_VALIDADE_HORAS', 0))
+# sessões no banco com cache (cached_db), cada entrada no cache por até
+# SESSION_CACHE_TTL segundos (core.sessoes)
+SESSION_ENGINE = os.environ.get('SESSION_ENGINE', 'core.sessoes')
+SESSION_CACHE_TTL = int(os.environ.get('SESSION_CACHE_TTL', 60))
+
+
 REST_FRAMEWORK = {
 	'DEFAULT_AUTHENTICATION_CLASSES': [
-		'rest_framework.authentication.TokenAuthentication',
+		'core.autenticacao.TokenAuthentication',
 		'rest_framework.authentication.SessionAuthentication',
 	],
 	'DEFAULT_PERMISSION_CLASSES': [
 		'rest_framework.permissions.IsAuthenticated',
 	],
+	# mesmos escopos do DRF, com o estado compartilhado no banco (core.throttling)
 	'DEFAULT_THROTTLE_CLASSES': [
-		'rest_framework.throttling.ScopedRateThrottle',
+		'core.throttling.ScopedRateThrottle',
 	],
-	'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+	# por página (padrão), ?pagination=cursor para keyset e ?count=false sem COUNT(*)
+	'DEFAULT_PAGINATION_CLASS': 'core.pagination.SGEAPagination',
 	'PAGE_SIZE': 6,
 	'DEFAULT_THROTTLE_RATES': {
 		'user': '1000/day',
@@ -140,6 +191,16 @@ REST_FRAMEWORK = {
 }
 
 
+# maior page_size aceito via ?page_size= na API
+API_MAX_PAGE_SIZE = 100
+# /api/eventos/changes/: itens por chamada (padrão) e dias de retenção dos
+# registros de eventos removidos (cursores mais antigos recebem 410)
+SYNC_PAGE_SIZE = int(os.environ.get('SYNC_PAGE_SIZE', 100))
+SYNC_RETENCAO_DIAS = int(os.environ.get('SYNC_RETENCAO_DIAS', 90))
+# máximo de itens por chamada em /api/internal/inscricoes/bulk/
+BULK_MAX_ITEMS = 1000
+
+
 # Email configuration: prefer SMTP when environment variables are provided,
 # otherwise fall back to console backend for local development.
 EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', 'sgea25verify@gmail.com')
@@ -159,6 +220,79 @@ else:
 # Default From email used when sending messages
 DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', EMAIL_HOST_USER)
 
+# Fila de e-mails (core.outbox): as views gravam em EmailOutbox e o comando
+# `enviar_emails --loop` envia em lotes. Com EMAIL_OUTBOX_IMMEDIATE=1 cada job
+# também é enviado por uma thread logo após a requisição (útil sem worker).
+EMAIL_OUTBOX_IMMEDIATE = os.environ.get('EMAIL_OUTBOX_IMMEDIATE', '1') in ('1', 'true', 'True')
+EMAIL_OUTBOX_BATCH_SIZE = int(os.environ.get('EMAIL_OUTBOX_BATCH_SIZE', 50))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.environ.get('EMAIL_OUTBOX_MAX_ATTEMPTS', 5))
+# espera (segundos) antes da 1ª nova tentativa; dobra a cada falha
+EMAIL_OUTBOX_RETRY_BASE = int(os.environ.get('EMAIL_OUTBOX_RETRY_BASE', 60))
+
+# Auditoria: log_audit enfileira os registros e uma thread de fundo grava em
+# lote (bulk_create). Com AUDIT_ASYNC=0 a gravação volta a ser síncrona.
+AUDIT_ASYNC = os.environ.get('AUDIT_ASYNC', '1') in ('1', 'true', 'True')
+AUDIT_BATCH_SIZE = int(os.environ.get('AUDIT_BATCH_SIZE', 100))
+AUDIT_FLUSH_INTERVAL = float(os.environ.get('AUDIT_FLUSH_INTERVAL', 1.0))
+AUDIT_QUEUE_SIZE = int(os.environ.get('AUDIT_QUEUE_SIZE', 10000))
+# política com a fila cheia: 'sync' (grava na requisição), 'block' ou 'drop'
+AUDIT_QUEUE_OVERFLOW = os.environ.get('AUDIT_QUEUE_OVERFLOW', 'sync')
+# Arquivamento (comando `arquivar_auditoria`): registros com mais de
+# AUDIT_RETENTION_DAYS dias vão para arquivos mensais gzip em AUDIT_ARCHIVE_DIR.
+AUDIT_RETENTION_DAYS = int(os.environ.get('AUDIT_RETENTION_DAYS', 90))
+AUDIT_ARCHIVE_DIR = os.environ.get('AUDIT_ARCHIVE_DIR', os.path.join(BASE_DIR, 'auditoria_arquivo'))
+# máximo de registros arquivados carregados por consulta na página de auditoria
+AUDIT_ARCHIVE_QUERY_LIMIT = int(os.environ.get('AUDIT_ARCHIVE_QUERY_LIMIT', 10000))
+
+# Certificados (core.certificados): HTML e PDF gerados uma vez na emissão e
+# servidos do disco com ETag/Last-Modified. CERTIFICADO_PRERENDER=0 deixa a
+# geração para o primeiro acesso.
+CERTIFICADO_CACHE_DIR = os.environ.get('CERTIFICADO_CACHE_DIR', os.path.join(BASE_DIR, 'certificados'))
+CERTIFICADO_PRERENDER = os.environ.get('CERTIFICADO_PRERENDER', '1') in ('1', 'true', 'True')
+# processos usados para renderizar PDFs na exportação em ZIP (limitado ao nº de CPUs)
+CERTIFICADO_ZIP_WORKERS = int(os.environ.get('CERTIFICADO_ZIP_WORKERS', 2))
+# fonte TrueType do PDF (caminho ou nome); vazio procura DejaVu Sans/Arial no sistema
+CERTIFICADO_FONTE = os.environ.get('CERTIFICADO_FONTE', '')
+
+# Imagens enviadas (banner, foto de perfil): validadas com Pillow e
+# redimensionadas em variantes WebP/JPEG por IMAGEM_WORKERS threads após o
+# commit (core.imagens). IMAGEM_ASYNC=0 gera as variantes na própria requisição.
+IMAGEM_MAX_BYTES = int(os.environ.get('IMAGEM_MAX_BYTES', 15 * 1024 * 1024))
+IMAGEM_MAX_PIXELS = int(os.environ.get('IMAGEM_MAX_PIXELS', 40_000_000))
+IMAGEM_WORKERS = int(os.environ.get('IMAGEM_WORKERS', 1))
+IMAGEM_ASYNC = os.environ.get('IMAGEM_ASYNC', '1') in ('1', 'true', 'True')
+
+# Cache dos grupos do usuário entre requisições (segundos; 0 desativa).
+# Invalidado por sinais quando a associação usuário-grupo muda; só é usado
+# com um cache compartilhado entre processos (ignorado com o LocMem padrão).
+ROLES_CACHE_TIMEOUT = int(os.environ.get('ROLES_CACHE_TIMEOUT', 0))
+
+# Instrumentação por requisição (core.middleware.RequestMetricsMiddleware).
+# QUERY_BUDGETS usa o nome da rota (view_name) e gera aviso no log quando a
+# requisição passa do limite de queries.
+REQUEST_METRICS_ENABLED = os.environ.get('REQUEST_METRICS_ENABLED', '1') in ('1', 'true', 'True')
+REQUEST_METRICS_SAMPLES = 1000
+QUERY_BUDGET_DEFAULT = int(os.environ.get('QUERY_BUDGET_DEFAULT', 30))
+QUERY_BUDGETS = {
+	'home': 10,
+	'admin_area': 20,
+	'admin_auditoria': 15,
+	'eventos-list': 5,
+	'eventos-detail': 5,
+}
+
+# Stream de vagas da home (/vagas/stream/, core.vagas_ao_vivo): janela de
+# agrupamento das mudanças e intervalo do keepalive (segundos), e o tempo de
+# reconexão sugerido ao navegador (ms).
+SSE_INTERVALO = float(os.environ.get('SSE_INTERVALO', 0.5))
+SSE_KEEPALIVE = float(os.environ.get('SSE_KEEPALIVE', 15))
+SSE_RECONEXAO_MS = int(os.environ.get('SSE_RECONEXAO_MS', 3000))
+
+# Validade (segundos) das páginas do feed da home em cache; 0 desativa. Só é
+# usado com um cache compartilhado entre processos (ignorado com o LocMem
+# padrão, em que a invalidação só chegaria ao processo que gravou).
+FEED_CACHE_TIMEOUT = int(os.environ.get('FEED_CACHE_TIMEOUT', 30))
+
 # login URL for decorators
 LOGIN_URL = '/login/'
 